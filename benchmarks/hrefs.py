@@ -0,0 +1,79 @@
+"""
+Compares extracting the links from a rendered description by building a full
+html5lib tree against warehouse.utils.html.hrefs, which only tokenizes it.
+
+    $ python benchmarks/hrefs.py [--sections N] [--repeat N]
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import timeit
+
+from xml.etree import ElementTree
+
+import html5lib
+import html5lib.treebuilders
+
+from warehouse.utils.html import hrefs
+
+
+SECTION = """
+<div class="section" id="section-{n}">
+<h2>Section {n}</h2>
+<p>Some text describing <a class="reference external"
+href="https://example.com/{n}/">a feature</a> with <tt class="docutils
+literal">inline literals</tt>, <em>emphasis</em> and a
+<a class="reference internal" href="#section-{n}">self reference</a>.</p>
+<pre class="literal-block">
+&gt;&gt;&gt; import example
+&gt;&gt;&gt; example.run({n})
+</pre>
+<ul class="simple">
+<li><a class="reference external"
+href="https://docs.example.com/{n}">Docs</a></li>
+<li>An item without a link</li>
+</ul>
+<table class="docutils"><tr><td>{n}</td><td>cell</td></tr></table>
+</div>
+"""
+
+
+def tree_hrefs(html):
+    parser = html5lib.HTMLParser(
+        tree=html5lib.treebuilders.getTreeBuilder("etree", ElementTree),
+        namespaceHTMLElements=False,
+    )
+    parsed = parser.parse(html)
+    return [anchor.attrib["href"]
+                for anchor in parsed.iter("a") if "href" in anchor.attrib]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--sections", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    html = "".join(SECTION.format(n=n) for n in range(args.sections))
+
+    assert tree_hrefs(html) == hrefs(html)
+
+    print("Document: {0} KB, {1} links".format(
+        len(html.encode("utf-8")) // 1024,
+        len(hrefs(html)),
+    ))
+
+    for name, func in [("tree", tree_hrefs), ("tokenizer", hrefs)]:
+        best = min(timeit.repeat(
+                    lambda: func(html),  # pylint: disable=W0640
+                    number=1,
+                    repeat=args.repeat,
+                ))
+        print("{0:>10}: {1:.1f} ms".format(name, best * 1000))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Compares filtering the releases of a project by calling
+VersionPredicate.match on each of them against VersionPredicate.filter,
+which bisects a sorted list of version keys.
+
+    $ python benchmarks/predicates.py [--versions N] [--repeat N]
+"""
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import timeit
+
+from warehouse.utils.version import SortedVersions, Version, VersionPredicate
+
+
+PREDICATES = [
+    "foo (>=1.0)",
+    "foo (>=1.2, <3.0)",
+    "foo (>=1.0, !=1.4.2, !=2.0.1, <4.0)",
+    "foo (==2.3.1)",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("--versions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    versions = [
+        Version("{0}.{1}.{2}".format(n // 100, (n // 10) % 10, n % 10))
+        for n in range(100, 100 + args.versions)
+    ]
+    predicates = [VersionPredicate(x) for x in PREDICATES]
+    presorted = SortedVersions(versions)
+
+    def match():
+        for predicate in predicates:
+            [x for x in versions if predicate.match(x)]
+
+    def filtered():
+        for predicate in predicates:
+            predicate.filter(versions)
+
+    def prebuilt():
+        for predicate in predicates:
+            predicate.filter(presorted)
+
+    for predicate in predicates:
+        assert (predicate.filter(versions) ==
+                    [x for x in versions if predicate.match(x)])
+
+    print("{0} versions, {1} predicates".format(
+        len(versions),
+        len(predicates),
+    ))
+
+    for name, func in [
+            ("match", match),
+            ("filter", filtered),
+            ("presorted", prebuilt)]:
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print("{0:>10}: {1:.2f} ms".format(name, best * 1000))
+
+
+if __name__ == "__main__":
+    main()
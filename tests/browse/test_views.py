@@ -0,0 +1,75 @@
+import json
+
+import flask
+import pretend
+
+from warehouse.browse import views
+
+
+def make_app():
+    app = flask.Flask(__name__)
+    app.config["SERVER_NAME"] = "warehouse.local"
+    app.add_url_rule("/simple/<project>/", "simple.detail", subdomain="api")
+    app.register_blueprint(views.browse)
+    return app
+
+
+def get(app, url):
+    resp = app.test_client().get(url, base_url="http://api.warehouse.local")
+    assert resp.status_code == 200
+    return json.loads(resp.data)
+
+
+def test_classifiers(monkeypatch):
+    monkeypatch.setattr(views.query, "classifiers",
+        lambda: [("Framework :: Flask", 2)],
+    )
+
+    assert get(make_app(), "/browse/") == {
+        "classifiers": [{"trove": "Framework :: Flask", "count": 2}],
+    }
+
+
+def test_projects(monkeypatch):
+    projects = pretend.call_recorder(lambda trove, facets, after, limit: {
+        "count": 3,
+        "projects": [("Foo", "foo"), ("bar_baz", "bar-baz")],
+        "next": "bar-baz",
+    })
+    monkeypatch.setattr(views.query, "projects", projects)
+
+    data = get(make_app(),
+                "/browse/Framework :: Flask?with=License :: OSI Approved"
+                "&limit=2&after=a",
+            )
+
+    assert projects.calls == [
+        pretend.call("Framework :: Flask",
+            facets=["License :: OSI Approved"],
+            after="a",
+            limit=2,
+        ),
+    ]
+    assert data["count"] == 3
+    assert data["facets"] == ["License :: OSI Approved"]
+    assert [x["name"] for x in data["projects"]] == ["Foo", "bar_baz"]
+    assert data["projects"][0]["url"] == (
+        "http://api.warehouse.local/simple/Foo/"
+    )
+    assert data["next"].startswith(
+        "http://api.warehouse.local/browse/Framework%20::%20Flask?",
+    )
+    assert "after=bar-baz" in data["next"]
+    assert "with=License" in data["next"]
+
+
+def test_projects_last_page(monkeypatch):
+    monkeypatch.setattr(views.query, "projects",
+        lambda trove, facets, after, limit: {
+            "count": 0,
+            "projects": [],
+            "next": None,
+        },
+    )
+
+    assert get(make_app(), "/browse/Nothing")["next"] is None
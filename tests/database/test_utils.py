@@ -0,0 +1,60 @@
+import pretend
+import pytest
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from warehouse.database.utils import after_commit
+
+
+@pytest.fixture
+def session():
+    session = Session(bind=create_engine("sqlite://"))
+
+    # Flask-SQLAlchemy tracks the changes of every session
+    session._model_changes = {}
+
+    return session
+
+
+def test_after_commit(session):
+    callback = pretend.call_recorder(lambda: None)
+
+    after_commit(callback, session=session)
+    session.execute("SELECT 1")
+
+    assert callback.calls == []
+
+    session.commit()
+
+    assert callback.calls == [pretend.call()]
+
+    # Every callback is only ever called once
+    session.commit()
+
+    assert callback.calls == [pretend.call()]
+
+
+def test_after_commit_nested(session):
+    callback = pretend.call_recorder(lambda: None)
+
+    session.begin_nested()
+    after_commit(callback, session=session)
+    session.commit()
+
+    assert callback.calls == []
+
+    session.commit()
+
+    assert callback.calls == [pretend.call()]
+
+
+def test_after_commit_rolled_back(session):
+    callback = pretend.call_recorder(lambda: None)
+
+    after_commit(callback, session=session)
+    session.execute("SELECT 1")
+    session.rollback()
+    session.commit()
+
+    assert callback.calls == []
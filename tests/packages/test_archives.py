@@ -0,0 +1,236 @@
+import io
+import os
+import tarfile
+import zipfile
+
+import pytest
+
+from warehouse.packages import archives
+
+
+REQUIRES = b"requests>=1.0\nsix\n\n[tests]\npytest==2.3\n"
+
+
+def make_tar(members, compression="gz"):
+    data = io.BytesIO()
+    tar = tarfile.open(mode="w:%s" % compression, fileobj=data)
+
+    for name, content in members:
+        info = tarfile.TarInfo(name)
+        info.size = len(content)
+        tar.addfile(info, io.BytesIO(content))
+
+    tar.close()
+    data.seek(0)
+    return data
+
+
+def make_zip(members):
+    data = io.BytesIO()
+    zipf = zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED)
+
+    for name, content in members:
+        zipf.writestr(name, content)
+
+    zipf.close()
+    data.seek(0)
+    return data
+
+
+class CountingReader(object):
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.read_bytes = 0
+
+    def read(self, size=-1):
+        data = self.fileobj.read(size)
+        self.read_bytes += len(data)
+        return data
+
+    def seek(self, *args):
+        return self.fileobj.seek(*args)
+
+    def tell(self):
+        return self.fileobj.tell()
+
+
+@pytest.mark.parametrize(("filename", "expected"), [
+    ("foo-1.0.tar.gz", "gz"),
+    ("foo-1.0.tgz", "gz"),
+    ("foo-1.0.tar.bz2", "bz2"),
+    ("foo-1.0.zip", "zip"),
+    ("foo-1.0-py2.py3-none-any.whl", "zip"),
+    ("foo-1.0.rpm", None),
+    ("foo-1.0.egg", None),
+])
+def test_compression(filename, expected):
+    assert archives.compression(filename) == expected
+
+
+def test_compression_invalid():
+    with pytest.raises(ValueError):
+        archives.compression("foo-1.0.exe")
+
+
+@pytest.mark.parametrize(("filename", "compression"), [
+    ("foo-1.0.tar.gz", "gz"),
+    ("foo-1.0.tar.bz2", "bz2"),
+])
+def test_tar_closest_to_root(filename, compression):
+    archive = make_tar([
+        ("foo-1.0/tests/nested.egg-info/requires.txt", b"wrong\n"),
+        ("foo-1.0/PKG-INFO", b""),
+        ("foo-1.0/foo.egg-info/requires.txt", REQUIRES),
+    ], compression=compression)
+
+    found = archives.member(filename, archive, archives.REQUIRES_PATTERN)
+
+    assert found == REQUIRES
+
+
+def test_tar_without_common_root_keeps_looking():
+    archive = make_tar([
+        ("foo-1.0/setup.py", b""),
+        ("setup.cfg", b""),
+        ("foo-1.0/foo.egg-info/requires.txt", b"wrong\n"),
+        ("bar.egg-info/requires.txt", REQUIRES),
+    ])
+
+    found = archives.member("foo.tar.gz", archive, archives.REQUIRES_PATTERN)
+
+    assert found == REQUIRES
+
+
+def test_tar_stops_at_first_match():
+    archive = make_tar([
+        ("foo-1.0/foo.egg-info/requires.txt", REQUIRES),
+        ("foo-1.0/data.bin", os.urandom(1024 * 1024)),
+    ])
+    size = len(archive.getvalue())
+    reader = CountingReader(archive)
+
+    found = archives.member("foo.tar.gz", reader, archives.REQUIRES_PATTERN)
+
+    assert found == REQUIRES
+    assert reader.read_bytes < size
+
+
+def test_tar_leading_dot():
+    archive = make_tar([("./foo.egg-info/requires.txt", REQUIRES)])
+    found = archives.member("foo.tar.gz", archive, archives.REQUIRES_PATTERN)
+    assert found == REQUIRES
+
+
+@pytest.mark.parametrize("filename", ["foo.tar.gz", "foo.tar.bz2", "foo.zip"])
+def test_invalid_archive(filename):
+    archive = io.BytesIO(b"This is not an archive")
+    assert archives.member(filename, archive, "*") is None
+
+
+def test_zip_closest_to_root():
+    archive = make_zip([
+        ("foo-1.0/tests/nested.egg-info/requires.txt", b"wrong\n"),
+        ("foo-1.0/foo.egg-info/requires.txt", REQUIRES),
+    ])
+
+    found = archives.member("foo.zip", archive, archives.REQUIRES_PATTERN)
+
+    assert found == REQUIRES
+
+
+def test_missing_member():
+    archive = make_tar([("foo-1.0/setup.py", b"")])
+    assert archives.setuptools_requires("foo.tar.gz", archive) is None
+
+
+def test_setuptools_requires():
+    archive = make_tar([("foo-1.0/foo.egg-info/requires.txt", REQUIRES)])
+
+    assert archives.setuptools_requires("foo.tar.gz", archive) == [
+        {"name": "requests", "versions": [">=1.0"]},
+        {"name": "six"},
+        {
+            "name": "pytest",
+            "versions": ["==2.3"],
+            "environment": "extra = 'tests'",
+        },
+    ]
+
+
+METADATA = (
+    b"Metadata-Version: 2.0\n"
+    b"Name: foo\n"
+    b"Version: 1.0\n"
+    b"Requires-Dist: requests (>=1.0,<3)\n"
+    b"Requires-Dist: six\n"
+    b"Requires-Dist: pytest (==2.3); extra == 'tests'\n"
+    b"Requires-Dist: pywin32>=1.0 ; sys_platform == 'win32'\n"
+    b"Requires-Dist: cryptography[ssl] >= 0.5\n"
+    b"\n"
+    b"A description with a Requires-Dist: fake line in it\n"
+)
+
+
+@pytest.mark.parametrize(("requires", "expected"), [
+    ("six", {"name": "six"}),
+    ("requests (>=1.0,<3)", {"name": "requests", "versions": [">=1.0", "<3"]}),
+    ("requests>= 1.0, <3", {"name": "requests", "versions": [">=1.0", "<3"]}),
+    (
+        "pytest (==2.3); extra == 'tests'",
+        {
+            "name": "pytest",
+            "versions": ["==2.3"],
+            "environment": "extra == 'tests'",
+        },
+    ),
+    ("zope.interface[test]", {"name": "zope.interface"}),
+    ("foo @ https://example.com/foo.zip", {"name": "foo"}),
+])
+def test_parse_requires_dist(requires, expected):
+    assert archives.parse_requires_dist(requires) == expected
+
+
+def test_parse_requires_dist_invalid():
+    with pytest.raises(ValueError):
+        archives.parse_requires_dist("(>=1.0)")
+
+
+def test_wheel_requires():
+    data = make_zip([
+        ("foo/__init__.py", b""),
+        ("foo-1.0.dist-info/METADATA", METADATA),
+    ])
+
+    assert archives.wheel_requires("foo-1.0-py2.py3-none-any.whl", data) == [
+        {"name": "requests", "versions": [">=1.0", "<3"]},
+        {"name": "six"},
+        {
+            "name": "pytest",
+            "versions": ["==2.3"],
+            "environment": "extra == 'tests'",
+        },
+        {
+            "name": "pywin32",
+            "versions": [">=1.0"],
+            "environment": "sys_platform == 'win32'",
+        },
+        {"name": "cryptography", "versions": [">=0.5"]},
+    ]
+
+
+def test_wheel_requires_only_reads_metadata():
+    data = CountingReader(make_zip([
+        ("foo/_speedups.so", os.urandom(1024 * 1024)),
+        ("foo-1.0.dist-info/METADATA", METADATA),
+    ]))
+
+    requires = archives.wheel_requires("foo-1.0-cp27-none-any.whl", data)
+
+    assert len(requires) == 5
+    assert data.read_bytes < 64 * 1024
+
+
+def test_wheel_requires_missing():
+    data = make_zip([("foo/__init__.py", b"")])
+    assert archives.wheel_requires("foo-1.0-py2-none-any.whl", data) is None
@@ -0,0 +1,81 @@
+import collections
+import datetime
+
+import pretend
+
+from warehouse.packages import commands
+
+
+def test_dependents_lists(monkeypatch, capsys):
+    of = pretend.call_recorder(lambda name: [("Foo", "1.0"), ("bar", "2.0")])
+    monkeypatch.setattr(commands, "Dependent", pretend.stub(of=of))
+
+    commands.Dependents().run(projects=[b"Django"])
+
+    assert of.calls == [pretend.call("Django")]
+    assert capsys.readouterr()[0] == "Django Foo 1.0\nDjango bar 2.0\n"
+
+
+def test_dependents_rebuild(monkeypatch):
+    rebuild = pretend.call_recorder(lambda progress: 3)
+    monkeypatch.setattr(commands, "rebuild_dependents", rebuild)
+
+    commands.Dependents().run(projects=[], rebuild=True, progress=False)
+
+    assert rebuild.calls == [pretend.call(progress=False)]
+
+
+def test_verify_reports(monkeypatch, capsys):
+    run = pretend.call_recorder(lambda processes, rate, resume: (
+        [commands.verify.Result("1", "foo-1.0.tar.gz", "missing")],
+        collections.Counter({"ok": 3, "missing": 1}),
+    ))
+    monkeypatch.setattr(commands.verify, "verify", run)
+
+    commands.Verify().run(processes=2, rate=50.0)
+
+    assert run.calls == [pretend.call(processes=2, rate=50.0, resume=False)]
+    assert capsys.readouterr()[0] == "missing foo-1.0.tar.gz\n"
+
+
+def test_gc_reports(monkeypatch, capsys):
+    def collect(grace, dry_run, threads, report):
+        report("orphaned", "ab/foo-1.0.tar.gz")
+        return collections.Counter(orphaned=1)
+
+    collect = pretend.call_recorder(collect)
+    monkeypatch.setattr(commands.garbage, "collect", collect)
+
+    commands.CollectGarbage().run(dry_run=True, grace=12)
+
+    assert collect.calls[0].kwargs["grace"] == datetime.timedelta(hours=12)
+    assert collect.calls[0].kwargs["dry_run"]
+    assert capsys.readouterr()[0] == "orphaned ab/foo-1.0.tar.gz\n"
+
+
+def test_rehash(monkeypatch):
+    backfill = pretend.call_recorder(
+        lambda algorithms, processes: collections.Counter(rehashed=2),
+    )
+    monkeypatch.setattr(commands.rehash, "backfill", backfill)
+
+    commands.Rehash().run(algorithms=[b"sha256", b"md5"], processes=0)
+
+    assert backfill.calls == [
+        pretend.call(algorithms=["sha256", "md5"], processes=0),
+    ]
+
+
+def test_by_hash(monkeypatch, capsys):
+    by_hash = pretend.call_recorder(lambda algorithm, digest: [
+        ("Foo", "1.0", "Foo-1.0.tar.gz", False),
+        ("Foo", "0.9", "Foo-0.9.tar.gz", True),
+    ])
+    monkeypatch.setattr(commands, "File", pretend.stub(by_hash=by_hash))
+
+    commands.ByHash().run(b"md5", b"abcd")
+
+    assert by_hash.calls == [pretend.call("md5", "abcd")]
+    assert capsys.readouterr()[0] == (
+        "Foo 1.0 Foo-1.0.tar.gz\nFoo 0.9 Foo-0.9.tar.gz (yanked)\n"
+    )
@@ -0,0 +1,69 @@
+import pytest
+
+from warehouse.packages import compatibility
+
+
+PY2 = ["2.%s" % x for x in range(0, 8)]
+PY3 = ["3.%s" % x for x in range(0, 14)]
+
+
+@pytest.mark.parametrize(("requires_python", "expected"), [
+    ("", None),
+    ("2.7", ["2.7"]),
+    ("3", PY3),
+    (">=2.6", PY2[6:] + PY3),
+    (">=3.5.2", PY3[5:]),
+    (">2.7", ["2.7"] + PY3),
+    ("<3", PY2),
+    ("<=3.1", PY2 + ["3.0", "3.1"]),
+    (">=2.7, !=3.0.*, !=3.1.*", ["2.7"] + PY3[2:]),
+    ("==3.4.*", ["3.4"]),
+    ("==2.7.3", ["2.7"]),
+    ("~=3.3", PY3[3:]),
+    ("~=2.6.1", ["2.6"]),
+    (">=2.6,<3,!=2.6.2", ["2.6", "2.7"]),
+    ("Python 2.7 only", None),
+])
+def test_from_requires_python(requires_python, expected):
+    assert compatibility.from_requires_python(requires_python) == expected
+
+
+@pytest.mark.parametrize(("classifiers", "expected"), [
+    ([], None),
+    (["License :: OSI Approved :: BSD License"], None),
+    (["Programming Language :: Python :: 2.7"], ["2.7"]),
+    (
+        [
+            "Programming Language :: Python :: 2",
+            "Programming Language :: Python :: 2.6",
+            "Programming Language :: Python :: 2.7",
+            "Programming Language :: Python :: 3",
+        ],
+        ["2.6", "2.7"] + PY3,
+    ),
+    (["Programming Language :: Python :: 3 :: Only"], None),
+])
+def test_from_classifiers(classifiers, expected):
+    assert compatibility.from_classifiers(classifiers) == expected
+
+
+@pytest.mark.parametrize(("requires_python", "classifiers", "expected"), [
+    ("", [], []),
+    (">=3.3", [], PY3[3:]),
+    ("", ["Programming Language :: Python :: 3.3"], ["3.3"]),
+    (
+        ">=2.7",
+        [
+            "Programming Language :: Python :: 2.6",
+            "Programming Language :: Python :: 2.7",
+            "Programming Language :: Python :: 3.3",
+        ],
+        ["2.7", "3.3"],
+    ),
+    ("bogus", ["Programming Language :: Python :: 2"], PY2),
+])
+def test_python_versions(requires_python, classifiers, expected):
+    assert compatibility.python_versions(
+                requires_python,
+                classifiers,
+            ) == expected
@@ -0,0 +1,112 @@
+import datetime
+import time
+
+import pretend
+import pytest
+
+from warehouse.packages import garbage
+
+
+def test_stored_in_byte_order(tmpdir):
+    for name in ["a/c", "a/b/d", "a-b", "a.b", "b", "ab"]:
+        tmpdir.join(name).write("x" * len(name), ensure=True)
+
+    found = list(garbage.stored(unicode(tmpdir)))
+
+    assert [x.name for x in found] == sorted(
+        ["a/c", "a/b/d", "a-b", "a.b", "b", "ab"],
+    )
+    assert [x.size for x in found] == [3, 3, 5, 3, 2, 1]
+
+
+def test_merge():
+    files = [garbage.Stored(x, 0, 0) for x in ["a", "b", "d"]]
+    names = [("b", True), ("c", True), ("d", False), ("e", False)]
+
+    merged = garbage.merge(files, names)
+
+    assert [(x, y is not None, z) for x, y, z in merged] == [
+        ("a", True, None),
+        ("b", True, True),
+        ("c", False, True),
+        ("d", True, False),
+        ("e", False, False),
+    ]
+
+
+def test_prefetch():
+    assert list(garbage.prefetch(iter(range(10)), size=2)) == range(10)
+
+
+def test_prefetch_raises():
+    def broken():
+        yield 1
+        raise ValueError("Broken")
+
+    fetched = garbage.prefetch(broken())
+
+    assert next(fetched) == 1
+    with pytest.raises(ValueError):
+        next(fetched)
+
+
+@pytest.mark.parametrize("dry_run", [True, False])
+def test_collect(monkeypatch, dry_run):
+    old, new = time.time() - 3 * 24 * 60 * 60, time.time()
+
+    monkeypatch.setattr(garbage, "stored", lambda location: iter([
+        garbage.Stored("blob", old, 10),
+        garbage.Stored("live", old, 20),
+        garbage.Stored("new", new, 30),
+        garbage.Stored("orphan", old, 40),
+        garbage.Stored("yanked", old, 50),
+    ]))
+    monkeypatch.setattr(garbage, "referenced", lambda grace: iter([
+        ("gone", True),
+        ("live", True),
+        ("yanked", False),
+    ]))
+
+    release = pretend.call_recorder(lambda name: name != "blob")
+    monkeypatch.setattr(garbage, "release", release)
+    monkeypatch.setattr(garbage, "db", pretend.stub(
+        session=pretend.stub(commit=lambda: None),
+    ))
+
+    storage = pretend.stub(
+        location="data",
+        delete=pretend.call_recorder(lambda name: None),
+    )
+    reported = []
+
+    counts = garbage.collect(
+                grace=datetime.timedelta(days=1),
+                dry_run=dry_run,
+                report=lambda status, name: reported.append((status, name)),
+                storage=storage,
+            )
+
+    assert reported == [
+        ("orphaned", "blob"),
+        ("missing", "gone"),
+        ("orphaned", "orphan"),
+        ("orphaned", "yanked"),
+    ]
+    assert counts["live"] == 1
+    assert counts["recent"] == 1
+    assert counts["orphaned"] == 3
+    assert counts["orphaned bytes"] == 100
+
+    if dry_run:
+        assert release.calls == []
+        assert storage.delete.calls == []
+    else:
+        assert release.calls == [
+            pretend.call("blob"),
+            pretend.call("orphan"),
+            pretend.call("yanked"),
+        ]
+        deleted = sorted(x.args[0] for x in storage.delete.calls)
+        assert deleted == ["orphan", "yanked"]
+        assert counts["deleted"] == 2
+        assert counts["deleted bytes"] == 90
@@ -0,0 +1,99 @@
+import multiprocessing
+
+import pretend
+import pytest
+
+from warehouse.packages import metadata
+from warehouse.packages.metadata import MetadataExtractor
+
+from .test_archives import METADATA, REQUIRES, make_tar, make_zip
+
+
+@pytest.fixture
+def sdist(tmpdir):
+    path = tmpdir.join("test-1.0.tar.gz")
+    path.write(
+        make_tar([("test-1.0/test.egg-info/requires.txt", REQUIRES)]).read(),
+        mode="wb",
+    )
+    return str(path)
+
+
+def test_extract(sdist):
+    assert metadata.extract("test-1.0.tar.gz", sdist) == {
+        "requires": [
+            {"name": "requests", "versions": [">=1.0"]},
+            {"name": "six"},
+            {"name": "pytest", "versions": ["==2.3"],
+                "environment": "extra = 'tests'"},
+        ],
+    }
+
+
+def test_extract_wheel(tmpdir):
+    path = tmpdir.join("test-1.0-py2.py3-none-any.whl")
+    path.write(
+        make_zip([("test-1.0.dist-info/METADATA", METADATA)]).read(),
+        mode="wb",
+    )
+
+    extracted = metadata.extract(path.basename, str(path))
+
+    assert list(extracted) == ["requires_dist"]
+    assert extracted["requires_dist"][1] == {"name": "six"}
+
+
+def test_extract_ignored_type(sdist):
+    assert metadata.extract("test-1.0.rpm", sdist) == {}
+
+
+def test_extractor_inline(sdist):
+    extractor = MetadataExtractor(processes=0)
+
+    handle = extractor.submit("test-1.0.tar.gz", sdist)
+
+    assert extractor.result(handle)["requires"][1] == {"name": "six"}
+    assert extractor._pool is None
+
+
+def test_extractor_inline_error():
+    extractor = MetadataExtractor(processes=0)
+
+    handle = extractor.submit("test-1.0.exe", "/does/not/exist")
+
+    assert extractor.result(handle) is None
+
+
+def test_extractor_pool(sdist):
+    extractor = MetadataExtractor(processes=1)
+
+    try:
+        handle = extractor.submit("test-1.0.tar.gz", sdist)
+        assert extractor.result(handle)["requires"][0]["name"] == "requests"
+    finally:
+        extractor.close()
+
+    assert extractor._pool is None
+
+
+def test_extractor_timeout():
+    def get(timeout):
+        raise multiprocessing.TimeoutError
+
+    pool = pretend.stub(terminate=pretend.call_recorder(lambda: None))
+    extractor = MetadataExtractor(processes=1, timeout=5)
+    extractor._pool = pool
+
+    assert extractor.result(("test-1.0.tar.gz", pool,
+                                pretend.stub(get=get))) is None
+    assert pool.terminate.calls == [pretend.call()]
+    assert extractor._pool is None
+
+
+def test_extractor_lost_after_terminate():
+    pool = pretend.stub()
+    extractor = MetadataExtractor(processes=1)
+
+    result = pretend.stub(ready=lambda: False)
+
+    assert extractor.result(("test-1.0.tar.gz", pool, result)) is None
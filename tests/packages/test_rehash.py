@@ -0,0 +1,223 @@
+import hashlib
+
+import flask
+import pretend
+import pytest
+
+from warehouse.packages import rehash
+from warehouse.simple import models
+from warehouse.simple.models import SimpleLink, SimpleLinkType
+
+
+DATA = b"Hello World!"
+
+
+def test_compute(tmpdir):
+    path = tmpdir.join("foo-1.0.tar.gz")
+    path.write(DATA, mode="wb")
+
+    assert rehash.compute(("1", str(path), ["md5", "sha256"])) == ("1", {
+        "md5": hashlib.md5(DATA).hexdigest(),
+        "sha256": hashlib.sha256(DATA).hexdigest(),
+    })
+
+
+def test_compute_unreadable(tmpdir):
+    path = tmpdir.join("missing")
+    assert rehash.compute(("1", str(path), ["sha256"])) == ("1", None)
+
+
+def row(id_, name, hashes):
+    return pretend.stub(id=id_, file=name,
+                uri="https://files.warehouse.local/" + name,
+                hashes=hashes,
+                project_id="p%s" % id_,
+            )
+
+
+def fake_projects(monkeypatch):
+    query = pretend.stub(
+        filter=lambda projects: [pretend.stub(id=x) for x in sorted(projects)],
+    )
+    monkeypatch.setattr(rehash, "Project", pretend.stub(
+        id=pretend.stub(in_=lambda projects: projects),
+        query=query,
+    ))
+
+    rebuild = pretend.call_recorder(lambda project: True)
+    monkeypatch.setattr(rehash, "SimpleLink", pretend.stub(rebuild=rebuild))
+
+    return rebuild
+
+
+def test_backfill(monkeypatch, tmpdir):
+    tmpdir.join("good").write(DATA, mode="wb")
+
+    missing = pretend.call_recorder(lambda algorithms, uri_hash: iter([
+        [row(1, "good", {"md5": "abc"}), row(2, "gone", {"md5": "abc"})],
+    ]))
+    monkeypatch.setattr(rehash, "missing", missing)
+
+    update = pretend.call_recorder(lambda rows: None)
+    monkeypatch.setattr(rehash, "update", update)
+
+    commit = pretend.call_recorder(lambda: None)
+    monkeypatch.setattr(rehash, "db",
+        pretend.stub(session=pretend.stub(commit=commit)),
+    )
+
+    rebuild = fake_projects(monkeypatch)
+
+    storage = pretend.stub(path=lambda name: str(tmpdir.join(name)))
+
+    app = flask.Flask(__name__)
+    app.config["FILE_URI_HASH"] = "sha256"
+
+    with app.app_context():
+        counts = rehash.backfill(processes=0, storage=storage)
+
+    digest = hashlib.sha256(DATA).hexdigest()
+
+    assert counts == {"rehashed": 1, "unreadable": 1}
+    assert missing.calls == [pretend.call(["sha256"], uri_hash="sha256")]
+    assert update.calls == [
+        pretend.call([
+            {
+                "id": 1,
+                "hashes": {"sha256": digest},
+                "uri": "https://files.warehouse.local/good",
+                "hashed_uri": "https://files.warehouse.local/good#sha256="
+                    + digest,
+            },
+        ]),
+    ]
+    assert [x.args[0].id for x in rebuild.calls] == ["p1"]
+    assert commit.calls == [pretend.call()]
+
+
+def test_backfill_regenerates(monkeypatch, tmpdir):
+    # The configured hash was changed to one every file already has, so the
+    #   files do not need to be read again
+    missing = pretend.call_recorder(lambda algorithms, uri_hash: iter([
+        [row(1, "gone", {"md5": "abc", "sha256": "def"})],
+    ]))
+    monkeypatch.setattr(rehash, "missing", missing)
+
+    update = pretend.call_recorder(lambda rows: None)
+    monkeypatch.setattr(rehash, "update", update)
+    monkeypatch.setattr(rehash, "db",
+        pretend.stub(session=pretend.stub(commit=lambda: None)),
+    )
+
+    rebuild = fake_projects(monkeypatch)
+
+    storage = pretend.stub(path=lambda name: str(tmpdir.join(name)))
+
+    app = flask.Flask(__name__)
+    app.config["FILE_URI_HASH"] = "md5"
+
+    with app.app_context():
+        counts = rehash.backfill(processes=0, storage=storage)
+
+    assert counts == {"regenerated": 1}
+    assert update.calls == [
+        pretend.call([
+            {
+                "id": 1,
+                "hashes": {},
+                "uri": "https://files.warehouse.local/gone",
+                "hashed_uri": "https://files.warehouse.local/gone#md5=abc",
+            },
+        ]),
+    ]
+    assert [x.args[0].id for x in rebuild.calls] == ["p1"]
+
+
+class FakeQuery(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def all(self):
+        return list(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+def test_backfill_rebuilds_links(monkeypatch, request, tmpdir):
+    tmpdir.join("good").write(DATA, mode="wb")
+
+    # The file as it is in the database, updated by the rehash
+    stored = pretend.stub(version_id=1, filename="good", file="good",
+                hashes={}, hashed_uri="", yanked=False, tags=[],
+            )
+
+    def update(rows):
+        stored.hashes = rows[0]["hashes"]
+        stored.hashed_uri = rows[0]["hashed_uri"]
+
+    monkeypatch.setattr(rehash, "missing", lambda algorithms, uri_hash: iter([
+        [row(1, "good", {})],
+    ]))
+    monkeypatch.setattr(rehash, "update", update)
+    monkeypatch.setattr(rehash, "db",
+        pretend.stub(session=pretend.stub(commit=lambda: None)),
+    )
+    monkeypatch.setattr(rehash, "Project", pretend.stub(
+        id=pretend.stub(in_=lambda projects: projects),
+        query=pretend.stub(filter=lambda projects: [pretend.stub(id=1)]),
+    ))
+
+    # Rebuild the links for real, from the file as the rehash left it
+    versions = FakeQuery([
+        pretend.stub(id=1, version="1.0", yanked=False, uris={},
+            download_uri="",
+        ),
+    ])
+    monkeypatch.setattr(models, "Version", pretend.stub(
+        query=pretend.stub(populate_existing=lambda: pretend.stub(
+            filter_by=lambda project: versions,
+        )),
+    ))
+
+    def query(*columns):
+        if columns[0] is models.File.version_id:
+            return FakeQuery([stored])
+        return FakeQuery([])
+
+    execute = pretend.call_recorder(lambda statement, rows: None)
+    monkeypatch.setattr(models, "db", pretend.stub(session=pretend.stub(
+        flush=lambda: None,
+        query=query,
+        execute=execute,
+    )))
+
+    SimpleLink.query = pretend.stub(filter_by=lambda project_id: pretend.stub(
+        delete=lambda synchronize_session: None,
+    ))
+    request.addfinalizer(lambda: delattr(SimpleLink, "query"))
+
+    storage = pretend.stub(path=lambda name: str(tmpdir.join(name)))
+
+    app = flask.Flask(__name__)
+    app.config["FILE_URI_HASH"] = "sha256"
+
+    with app.app_context():
+        rehash.backfill(processes=0, storage=storage)
+
+    digest = hashlib.sha256(DATA).hexdigest()
+    links = execute.calls[0].args[1]
+
+    assert [(x["type"], x["link"]) for x in links] == [
+        (SimpleLinkType.file,
+            "https://files.warehouse.local/good#sha256=" + digest),
+    ]
+
+
+def test_backfill_unknown_algorithm():
+    with pytest.raises(ValueError):
+        rehash.backfill(["nope"], processes=0, storage=pretend.stub(path=""))
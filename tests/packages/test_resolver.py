@@ -0,0 +1,150 @@
+import pretend
+import pytest
+
+from warehouse.packages import resolver
+from warehouse.packages.resolver import Node
+
+
+class FakeRedis(object):
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.queued = []
+
+    def hget(self, key, field):
+        return self.data.get(key, {}).get(field)
+
+    def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = value
+
+    def ttl(self, key):
+        return self.ttls.get(key)
+
+    def expire(self, key, seconds):
+        self.ttls[key] = seconds
+
+    def delete(self, key):
+        self.data.pop(key, None)
+        self.ttls.pop(key, None)
+
+    def pipeline(self):
+        queued = []
+
+        def queue(method):
+            return lambda *args: queued.append((method, args))
+
+        return pretend.stub(
+            hset=queue(self.hset),
+            ttl=queue(self.ttl),
+            execute=lambda: [method(*args) for method, args in queued],
+        )
+
+
+@pytest.fixture
+def committed(monkeypatch):
+    # Pretend that every transaction is committed straight away
+    monkeypatch.setattr(resolver, "after_commit", lambda callback: callback())
+
+
+@pytest.mark.parametrize(("versions", "specifiers", "expected"), [
+    (["1.0", "2.0", "1.5"], [], "2.0"),
+    (["1.0", "2.0", "1.5"], ["<2.0"], "1.5"),
+    (["1.0", "2.0", "1.5"], [">=1.0", "!=1.5", "<2.0"], "1.0"),
+    (["1.0", "1.1", "1.1.5", "2.0"], ["1.1"], "1.1.5"),
+    (["1.0", "2.0"], [">3.0"], None),
+    (["1.0", "2.0b1", "1.9"], [], "2.0b1"),
+    (["1", "0.9"], [], "1"),
+    (["not a version", "0.9"], [], "0.9"),
+    (["1.0", "2.0"], ["~=1.0"], "2.0"),
+    ([], [], None),
+])
+def test_choose(versions, specifiers, expected):
+    assert resolver.choose(versions, specifiers) == expected
+
+
+def test_node_memoized(monkeypatch, committed):
+    fake = FakeRedis()
+    monkeypatch.setattr(resolver, "redis", fake)
+
+    lookup = pretend.call_recorder(
+        lambda name, specifiers: Node("Foo", "1.0", [["bar", [">=1"]]]),
+    )
+    monkeypatch.setattr(resolver, "_lookup", lookup)
+
+    first = resolver.node("Foo", ["<2", ">=1"])
+    second = resolver.node("foo", [">=1", "<2"])
+
+    assert first == second == Node("Foo", "1.0", [["bar", [">=1"]]])
+    assert lookup.calls == [pretend.call("foo", ["<2", ">=1"])]
+
+    resolver.invalidate("FOO")
+    resolver.node("foo", [">=1", "<2"])
+
+    assert len(lookup.calls) == 2
+
+
+def test_node_expires(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr(resolver, "redis", fake)
+    monkeypatch.setattr(resolver, "_lookup", lambda name, specifiers: None)
+
+    key = resolver.REDIS_RESOLVE_KEY.format(project="foo")
+
+    resolver.node("Foo")
+    assert fake.ttls == {key: resolver.RESOLVE_CACHE_TIMEOUT}
+
+    # Resolving something else for the project does not keep it around
+    fake.ttls[key] = 10
+    resolver.node("Foo", [">=1"])
+    assert fake.ttls == {key: 10}
+
+
+def test_invalidate_after_commit(monkeypatch):
+    fake = FakeRedis()
+    fake.hset("warehouse:resolve:foo", "", "null")
+    monkeypatch.setattr(resolver, "redis", fake)
+
+    callbacks = []
+    monkeypatch.setattr(resolver, "after_commit", callbacks.append)
+
+    resolver.invalidate("Foo")
+
+    assert fake.data == {"warehouse:resolve:foo": {"": "null"}}
+
+    callbacks[0]()
+
+    assert fake.data == {}
+
+
+def test_node_memoizes_missing(monkeypatch):
+    monkeypatch.setattr(resolver, "redis", FakeRedis())
+
+    lookup = pretend.call_recorder(lambda name, specifiers: None)
+    monkeypatch.setattr(resolver, "_lookup", lookup)
+
+    assert resolver.node("missing") is None
+    assert resolver.node("missing") is None
+    assert len(lookup.calls) == 1
+
+
+def test_resolve(monkeypatch):
+    nodes = {
+        "a": Node("A", "1.0", [["b", [">=1"]], ["c", []]]),
+        "b": Node("B", "2.0", [["c", ["<1"]], ["a", []]]),
+        "c": Node("C", "3.0", []),
+    }
+    node = pretend.call_recorder(lambda name, specifiers: nodes.get(name))
+    monkeypatch.setattr(resolver, "node", node)
+
+    closure, missing = resolver.resolve([("a", []), "d"])
+
+    assert list(closure) == ["a", "b", "c"]
+    assert closure["c"].version == "3.0"
+    assert missing == [("d", [])]
+    assert node.calls == [
+        pretend.call("a", []),
+        pretend.call("d", []),
+        pretend.call("b", [">=1"]),
+        pretend.call("c", []),
+    ]
@@ -0,0 +1,242 @@
+import io
+
+import pretend
+import pytest
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import NoResultFound
+
+from warehouse.packages import store
+from warehouse.packages.models import Blob
+from warehouse.simple.models import RenderedDescription
+from warehouse.utils.metrics import Metrics
+
+
+class FakeBlob(object):
+
+    path = staticmethod(Blob.path)
+
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+def _missing():
+    raise NoResultFound
+
+
+def _nested():
+    return pretend.stub(
+        __enter__=lambda: None,
+        __exit__=lambda *args: None,
+    )
+
+
+def _rendering(monkeypatch, stored=None, deferred=False):
+    app = pretend.stub(config={"RENDER_DEFERRED": deferred})
+    monkeypatch.setattr(store, "flask", pretend.stub(current_app=app))
+    monkeypatch.setattr(store, "metrics", pretend.stub(sync=Metrics("test")))
+
+    filter_by = pretend.call_recorder(lambda digest: pretend.stub(
+        one=_missing if stored is None else lambda: stored,
+    ))
+    monkeypatch.setattr(store, "RenderedDescription", pretend.stub(
+        hash=RenderedDescription.hash,
+        query=pretend.stub(filter_by=filter_by),
+    ))
+
+    rendering = pretend.stub(
+        render=pretend.call_recorder(lambda text: ("<p>Hi</p>", ["/a"])),
+        save=pretend.call_recorder(
+            lambda digest, html, hrefs: pretend.stub(digest=digest),
+        ),
+        apply=pretend.call_recorder(lambda vers, rendered, links: None),
+        enqueue=pretend.call_recorder(lambda vers, digest: None),
+    )
+    monkeypatch.setattr(store, "rendering", rendering)
+
+    return rendering
+
+
+def test_description_already_extracted(monkeypatch):
+    rendering = _rendering(monkeypatch)
+    vers = pretend.stub(
+        description="Hi",
+        description_digest=RenderedDescription.hash("Hi"),
+    )
+
+    store.description(vers)
+
+    assert store.RenderedDescription.query.filter_by.calls == []
+    assert rendering.render.calls == []
+    assert rendering.apply.calls == []
+
+
+def test_description_cached(monkeypatch):
+    digest = RenderedDescription.hash("Hi")
+    stored = pretend.stub(digest=digest)
+    rendering = _rendering(monkeypatch, stored=stored)
+    vers = pretend.stub(description="Hi", description_digest=None)
+    links = set()
+
+    store.description(vers, links=links)
+
+    # Someone already rendered this exact text, so it is not done again
+    assert rendering.render.calls == []
+    assert rendering.save.calls == []
+    assert rendering.apply.calls == [pretend.call(vers, stored, links=links)]
+    assert store.metrics.sync.counters == {"descriptions_cached": 1}
+
+
+def test_description_changed(monkeypatch):
+    rendering = _rendering(monkeypatch)
+    vers = pretend.stub(
+        description="Hello",
+        description_digest=RenderedDescription.hash("Hi"),
+    )
+
+    store.description(vers)
+
+    digest = RenderedDescription.hash("Hello")
+
+    assert store.RenderedDescription.query.filter_by.calls == [
+        pretend.call(digest=digest),
+    ]
+    assert rendering.render.calls == [pretend.call("Hello")]
+    assert rendering.save.calls == [
+        pretend.call(digest, "<p>Hi</p>", ["/a"]),
+    ]
+    assert rendering.apply.calls[0].args[0] is vers
+    assert rendering.apply.calls[0].args[1].digest == digest
+    assert store.metrics.sync.counters == {"descriptions_rendered": 1}
+
+
+def test_description_collects_links(monkeypatch):
+    rendering = _rendering(monkeypatch)
+    vers = pretend.stub(description="Hi", description_digest=None)
+    links = set(["/from/another/version"])
+
+    store.description(vers, links=links)
+
+    # The links of the rendering must not replace the ones being collected
+    assert rendering.apply.calls[0].kwargs["links"] is links
+    assert links == set(["/from/another/version"])
+
+
+def test_description_deferred(monkeypatch):
+    rendering = _rendering(monkeypatch, deferred=True)
+    vers = pretend.stub(description="Hi", description_digest=None)
+
+    store.description(vers)
+
+    assert rendering.render.calls == []
+    assert rendering.enqueue.calls == [
+        pretend.call(vers, RenderedDescription.hash("Hi")),
+    ]
+    assert rendering.apply.calls == []
+
+
+def test_blob_path():
+    digest = "abcdef" + "0" * 58
+    assert Blob.path(digest) == "sha256/ab/cd/" + digest
+
+
+def test_blob_existing(monkeypatch):
+    existing = pretend.stub()
+    filter_by = pretend.call_recorder(
+        lambda sha256: pretend.stub(one=lambda: existing),
+    )
+    monkeypatch.setattr(store, "Blob",
+        pretend.stub(query=pretend.stub(filter_by=filter_by)),
+    )
+    storage = pretend.stub(save=pretend.call_recorder(lambda *args: None))
+
+    assert store.blob("abcd", 4, io.BytesIO(b"data"), storage) is existing
+    assert filter_by.calls == [pretend.call(sha256="abcd")]
+    assert storage.save.calls == []
+
+
+def test_blob_saves_new(monkeypatch):
+    FakeBlob.query = pretend.stub(
+        filter_by=lambda sha256: pretend.stub(one=_missing),
+    )
+    monkeypatch.setattr(store, "Blob", FakeBlob)
+
+    added = []
+    monkeypatch.setattr(store, "db", pretend.stub(
+        session=pretend.stub(begin_nested=_nested, add=added.append),
+    ))
+
+    fileobj = io.BytesIO(b"data")
+    storage = pretend.stub(
+        save=pretend.call_recorder(lambda name, fp: "stored/" + name),
+    )
+
+    stored = store.blob("abcdef", 4, fileobj, storage)
+
+    assert storage.save.calls == [pretend.call("sha256/ab/cd/abcdef", fileobj)]
+    assert added == [stored]
+    assert stored.sha256 == "abcdef"
+    assert stored.file == "stored/sha256/ab/cd/abcdef"
+    assert stored.size == 4
+
+
+@pytest.mark.parametrize(("theirs", "deleted"), [
+    ("sha256/ab/cd/abcdef", []),
+    ("sha256/ab/cd/abcdef_1", [pretend.call("sha256/ab/cd/abcdef")]),
+])
+def test_blob_saved_concurrently(monkeypatch, theirs, deleted):
+    theirs = pretend.stub(file=theirs)
+    results = [_missing, lambda: theirs]
+    FakeBlob.query = pretend.stub(
+        filter_by=lambda sha256: pretend.stub(one=results.pop(0)),
+    )
+    monkeypatch.setattr(store, "Blob", FakeBlob)
+
+    def add(obj):
+        raise IntegrityError("INSERT", {}, None)
+
+    monkeypatch.setattr(store, "db", pretend.stub(
+        session=pretend.stub(begin_nested=_nested, add=add),
+    ))
+
+    storage = pretend.stub(
+        save=lambda name, fp: name,
+        delete=pretend.call_recorder(lambda name: None),
+    )
+
+    assert store.blob("abcdef", 4, io.BytesIO(b"data"), storage) is theirs
+    assert storage.delete.calls == deleted
+
+
+@pytest.mark.parametrize("addressed", [True, False])
+def test_distribution_file(monkeypatch, addressed):
+    app = pretend.stub(config={"STORAGE_CONTENT_ADDRESSED": addressed})
+    monkeypatch.setattr(store, "flask", pretend.stub(current_app=app))
+
+    storage = pretend.stub(save=lambda name, fp: "saved/" + name)
+    monkeypatch.setattr(store, "get_storage", lambda app: storage)
+
+    blob = pretend.call_recorder(
+        lambda digest, size, fp, storage: pretend.stub(file="blob/" + digest),
+    )
+    monkeypatch.setattr(store, "blob", blob)
+
+    dist = pretend.stub(
+        filename="foo-1.0.tar.gz",
+        generate_uris=pretend.call_recorder(lambda storage: None),
+    )
+    fileobj = io.BytesIO(b"data")
+
+    store.distribution_file(dist, fileobj)
+
+    sha256 = dist.hashes["sha256"]
+
+    if addressed:
+        assert blob.calls == [pretend.call(sha256, 4, fileobj, storage)]
+        assert dist.file == "blob/" + sha256
+    else:
+        assert blob.calls == []
+        assert dist.blob is None
+        assert dist.file == "saved/foo-1.0.tar.gz"
+
+    assert dist.generate_uris.calls == [pretend.call(storage=storage)]
@@ -0,0 +1,102 @@
+import hashlib
+
+import pretend
+import pytest
+
+from warehouse.packages import verify
+
+
+DATA = b"Hello World!"
+HASHES = {
+    "md5": hashlib.md5(DATA).hexdigest(),
+    "sha256": hashlib.sha256(DATA).hexdigest(),
+}
+
+
+@pytest.mark.parametrize(("data", "size", "hashes", "status"), [
+    (DATA, len(DATA), HASHES, verify.OK),
+    (None, len(DATA), HASHES, verify.MISSING),
+    (DATA[:5], len(DATA), HASHES, verify.CORRUPT),
+    (DATA, len(DATA), dict(HASHES, sha256="0" * 64), verify.MISMATCHED),
+    (DATA, len(DATA), {}, verify.OK),
+])
+def test_check(tmpdir, data, size, hashes, status):
+    path = tmpdir.join("foo-1.0.tar.gz")
+
+    if data is not None:
+        path.write(data, mode="wb")
+
+    result = verify.check(("1", "foo-1.0.tar.gz", str(path), size, hashes))
+
+    assert result == verify.Result("1", "foo-1.0.tar.gz", status)
+
+
+def test_throttled():
+    now = [0.0]
+    slept = []
+
+    def sleep(seconds):
+        slept.append(seconds)
+        now[0] += seconds
+
+    megabyte = 1024 * 1024
+    tasks = [(str(x), "", "", 2 * megabyte, {}) for x in range(3)]
+
+    throttled = verify.Throttle(1, clock=lambda: now[0], sleep=sleep)
+
+    assert list(throttled(tasks)) == tasks
+    assert slept == [2.0, 2.0]
+
+    # The rate holds across batches, rather than starting over with each
+    assert list(throttled(tasks[:1])) == tasks[:1]
+    assert slept == [2.0, 2.0, 2.0]
+
+
+def test_throttled_unlimited():
+    sleep = pretend.call_recorder(lambda seconds: None)
+    tasks = [("1", "", "", 1024 * 1024, {})] * 3
+
+    assert list(verify.Throttle(None, sleep=sleep)(tasks)) == tasks
+    assert sleep.calls == []
+
+
+def test_verify_checkpoints(monkeypatch, tmpdir):
+    tmpdir.join("good").write(DATA, mode="wb")
+
+    def row(id_, name, yanked=False):
+        return pretend.stub(id=id_, filename=name, file=name,
+                    filesize=len(DATA),
+                    hashes=HASHES,
+                    yanked=yanked,
+                )
+
+    chunks = pretend.call_recorder(lambda after: iter([
+        [row(1, "good"), row(2, "gone")],
+        [row(3, "good"), row(4, "collected", yanked=True)],
+    ]))
+    monkeypatch.setattr(verify, "chunks", chunks)
+
+    redis = pretend.stub(
+        get=lambda key: "0",
+        set=pretend.call_recorder(lambda key, value: None),
+        delete=pretend.call_recorder(lambda key: None),
+    )
+    monkeypatch.setattr(verify, "redis", redis)
+
+    storage = pretend.stub(path=lambda name: str(tmpdir.join(name)))
+
+    failed, counts = verify.verify(processes=0, resume=True, storage=storage)
+
+    assert failed == [verify.Result("2", "gone", verify.MISSING)]
+    assert counts == {verify.OK: 2, verify.MISSING: 1, verify.COLLECTED: 1}
+    assert chunks.calls == [pretend.call(after="0")]
+    assert redis.set.calls == [
+        pretend.call(verify.REDIS_VERIFY_KEY, "2"),
+        pretend.call(verify.REDIS_VERIFY_KEY, "4"),
+    ]
+    assert redis.delete.calls == [pretend.call(verify.REDIS_VERIFY_KEY)]
+
+
+def test_verify_needs_filesystem():
+    with pytest.raises(ValueError):
+        verify.verify(processes=0, storage=pretend.stub())
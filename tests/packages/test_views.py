@@ -0,0 +1,121 @@
+import json
+
+import flask
+import pretend
+
+from warehouse.packages import views
+from warehouse.packages.models import File
+
+
+class FakeQuery(object):
+
+    def __init__(self, result):
+        self.result = result
+
+    def join(self, *args):
+        return self
+
+    def filter(self, *args):
+        return self
+
+    def first(self):
+        return self.result
+
+
+def make_app(monkeypatch, result):
+    monkeypatch.setattr(views, "db", pretend.stub(
+        session=pretend.stub(query=lambda *args: FakeQuery(result)),
+    ))
+    monkeypatch.setattr(views, "get_storage", lambda: pretend.stub(
+        url=lambda name: "https://files.warehouse.local/" + name,
+    ))
+
+    app = flask.Flask(__name__)
+    app.config["SERVER_NAME"] = "warehouse.local"
+    app.add_url_rule("/simple/<project>/", "simple.detail", subdomain="api")
+    app.register_blueprint(views.files)
+    return app
+
+
+def test_blob_redirects(monkeypatch):
+    app = make_app(monkeypatch, pretend.stub(file="sha256/ab/cd/abcd"))
+
+    resp = app.test_client().get("/files/abcd/foo-1.0.tar.gz",
+                base_url="http://api.warehouse.local",
+            )
+
+    assert resp.status_code == 302
+    assert resp.headers["Location"] == (
+        "https://files.warehouse.local/sha256/ab/cd/abcd"
+    )
+
+
+def test_blob_unknown_name(monkeypatch):
+    app = make_app(monkeypatch, None)
+
+    resp = app.test_client().get("/files/abcd/bar-1.0.tar.gz",
+                base_url="http://api.warehouse.local",
+            )
+
+    assert resp.status_code == 404
+
+
+def test_by_hash(monkeypatch):
+    by_hash = pretend.call_recorder(lambda algorithm, digest: [
+        ("Foo", "1.0", "Foo-1.0.tar.gz", False),
+    ])
+    monkeypatch.setattr(views, "File", pretend.stub(by_hash=by_hash))
+
+    app = make_app(monkeypatch, None)
+
+    resp = app.test_client().get("/files/by-hash/sha256/ABCD",
+                base_url="http://api.warehouse.local",
+            )
+
+    assert resp.status_code == 200
+    assert json.loads(resp.data) == {
+        "algorithm": "sha256",
+        "digest": "abcd",
+        "files": [
+            {
+                "project": "Foo",
+                "version": "1.0",
+                "filename": "Foo-1.0.tar.gz",
+                "yanked": False,
+                "url": "http://api.warehouse.local/simple/Foo/",
+            },
+        ],
+    }
+    assert by_hash.calls == [pretend.call("sha256", "ABCD")]
+
+
+def test_by_hash_unindexed(monkeypatch):
+    app = make_app(monkeypatch, None)
+
+    resp = app.test_client().get("/files/by-hash/sha1/abcd",
+                base_url="http://api.warehouse.local",
+            )
+
+    assert resp.status_code == 404
+
+
+def test_blob_uri_outside_request(monkeypatch):
+    app = make_app(monkeypatch, None)
+    app.config["PREFERRED_URL_SCHEME"] = "https"
+    app.config["FILE_URI_HASH"] = "sha256"
+
+    vfile = pretend.stub(
+        blob=pretend.stub(sha256="abcd"),
+        filename="Foo-1.0.tar.gz",
+        hashes={"sha256": "abcd"},
+        with_hash=File.with_hash,
+    )
+
+    # Files are stored during synchronization, where there is no request
+    with app.app_context():
+        File.generate_uris.__func__(vfile, storage=pretend.stub())
+
+    assert vfile.uri == (
+        "https://api.warehouse.local/files/abcd/Foo-1.0.tar.gz"
+    )
+    assert vfile.hashed_uri == vfile.uri + "#sha256=abcd"
@@ -0,0 +1,38 @@
+import pytest
+
+from warehouse.packages import wheels
+
+
+@pytest.mark.parametrize(("filename", "expected"), [
+    ("foo-1.0.tar.gz", None),
+    ("foo-1.0.whl", None),
+    (
+        "foo-1.0-py2.py3-none-any.whl",
+        {"build": "", "tags": ["py2-none-any", "py3-none-any"]},
+    ),
+    (
+        "foo-1.0-1a-cp27-cp27mu-linux_x86_64.whl",
+        {"build": "1a", "tags": ["cp27-cp27mu-linux_x86_64"]},
+    ),
+    (
+        "Foo_Bar-2.0-cp33-cp33m-macosx_10_6_intel.macosx_10_9_x86_64.whl",
+        {
+            "build": "",
+            "tags": [
+                "cp33-cp33m-macosx_10_6_intel",
+                "cp33-cp33m-macosx_10_9_x86_64",
+            ],
+        },
+    ),
+])
+def test_parse_filename(filename, expected):
+    assert wheels.parse_filename(filename) == expected
+
+
+@pytest.mark.parametrize(("tag", "expected"), [
+    ("py2-none-any", "py2-none-any"),
+    (" CP27-cp27m-Win_AMD64 ", "cp27-cp27m-win_amd64"),
+    ("cp27-cp27m-linux-x86.64", "cp27-cp27m-linux_x86_64"),
+])
+def test_normalize_tag(tag, expected):
+    assert wheels.normalize_tag(tag) == expected
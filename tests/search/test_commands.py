@@ -0,0 +1,37 @@
+import pretend
+
+from warehouse.packages.models import Version
+from warehouse.search import commands
+
+
+def test_search_vector_deferred():
+    assert Version.__mapper__.get_property("search_vector").deferred
+
+
+def test_rebuild_index(monkeypatch):
+    update = pretend.call_recorder(lambda values, synchronize_session: None)
+    refresh_latest = pretend.call_recorder(lambda project: None)
+    monkeypatch.setattr(commands, "Version", pretend.stub(
+        summary=Version.summary,
+        query=pretend.stub(update=update),
+        refresh_latest=refresh_latest,
+    ))
+
+    projects = [pretend.stub(), pretend.stub()]
+    monkeypatch.setattr(commands, "Project",
+        pretend.stub(query=pretend.stub(all=lambda: projects)),
+    )
+
+    commit = pretend.call_recorder(lambda: None)
+    monkeypatch.setattr(commands, "db",
+        pretend.stub(session=pretend.stub(commit=commit)),
+    )
+
+    commands.rebuild_index(progress=False)
+
+    # Only the columns the search trigger watches are touched
+    assert update.calls == [
+        pretend.call({"summary": Version.summary}, synchronize_session=False),
+    ]
+    assert refresh_latest.calls == [pretend.call(x) for x in projects]
+    assert len(commit.calls) == 3
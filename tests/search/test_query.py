@@ -0,0 +1,102 @@
+import re
+
+import pretend
+import pytest
+
+from sqlalchemy import orm
+from sqlalchemy.dialects import postgresql
+
+from warehouse import db
+from warehouse.packages.models import Version
+from warehouse.search import query
+
+
+class CompiledQuery(orm.Query):
+
+    def all(self):
+        # Return the SQL and its parameters instead of running it
+        compiled = self.statement.compile(dialect=postgresql.dialect())
+        return " ".join(unicode(compiled).split()), compiled.params
+
+
+def _ddl(table):
+    """
+    Returns all of the DDL that is ran after creating ``table``, with the
+    name of the table filled in.
+    """
+    return "\n".join(
+        x.statement % {"table": table.name}
+        for x in table.dispatch.after_create
+    )
+
+
+@pytest.mark.parametrize("terms", [None, "", "   "])
+def test_search_empty(terms):
+    assert query.search(terms) == []
+
+
+def test_search(monkeypatch):
+    monkeypatch.setattr(query, "db", pretend.stub(
+        session=pretend.stub(query=lambda *entities: CompiledQuery(entities)),
+        not_=db.not_,
+    ))
+
+    sql, params = query.search("foo bar", limit=500, offset=-1)
+    tsquery = "plainto_tsquery(%(plainto_tsquery_1)s, %(plainto_tsquery_2)s)"
+    rank = "ts_rank_cd(versions.search_vector, {0})".format(tsquery)
+
+    # Only the latest versions are searched, which is what lets the partial
+    #   index on their search documents be used
+    assert (
+        "WHERE versions.latest AND (versions.search_vector @@ {0}) "
+        "AND NOT versions.yanked".format(tsquery)
+    ) in sql
+    assert "ORDER BY {0} DESC, projects.normalized".format(rank) in sql
+    assert sql.endswith("LIMIT %(param_1)s OFFSET %(param_2)s")
+    assert params == {
+        "plainto_tsquery_1": query.SEARCH_CONFIG,
+        "plainto_tsquery_2": "foo bar",
+        "param_1": query.MAX_RESULTS,
+        "param_2": 0,
+    }
+
+
+def test_search_vector_weights_name():
+    ddl = " ".join(_ddl(Version.__table__).split())
+
+    # The name of the project counts for more than anything else
+    assert (
+        "setweight(to_tsvector('english', coalesce( (SELECT name FROM "
+        "projects WHERE id = NEW.project_id), '' )), 'A')"
+    ) in ddl
+
+
+def test_search_vector_refreshed_on_rename():
+    ddl = " ".join(_ddl(Version.__table__).split())
+
+    # Renaming a project touches the summaries of its versions, which has the
+    #   search vector trigger compute their vectors again
+    assert (
+        "CREATE TRIGGER projects_rename_search_vector AFTER UPDATE OF name "
+        "ON projects"
+    ) in ddl
+    assert "UPDATE versions SET summary = summary" in ddl
+    assert (
+        "BEFORE INSERT OR UPDATE OF project_id, summary, keywords, "
+        "description ON versions"
+    ) in ddl
+
+
+def test_modtime_trigger_runs_first():
+    ddl = _ddl(Version.__table__)
+    triggers = re.findall(
+        r"CREATE TRIGGER (\w+)\s+BEFORE [^;]*?\bON versions\b",
+        ddl,
+    )
+
+    # PostgreSQL runs the triggers for the same event in the order of their
+    #   names. The modified column is only left alone when a version is only
+    #   touched if it is compared before the search vector is computed.
+    assert "update_versions_modtime" in triggers
+    assert "versions_search_vector" in triggers
+    assert sorted(triggers)[0] == "update_versions_modtime"
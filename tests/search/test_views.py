@@ -0,0 +1,40 @@
+import json
+
+import flask
+import pretend
+
+from warehouse.search import views
+
+
+def test_results(monkeypatch):
+    search_query = pretend.call_recorder(lambda terms, limit, offset: [
+        ("Foo", "1.0", "A foo", 0.5),
+    ])
+    monkeypatch.setattr(views, "search_query", search_query)
+
+    app = flask.Flask(__name__)
+    app.config["SERVER_NAME"] = "warehouse.local"
+    app.add_url_rule("/simple/<project>/", "simple.detail", subdomain="api")
+    app.register_blueprint(views.search)
+
+    resp = app.test_client().get(
+                "/search/?q=foo+bar&limit=5",
+                base_url="http://api.warehouse.local",
+            )
+
+    assert resp.status_code == 200
+    assert json.loads(resp.data) == {
+        "query": "foo bar",
+        "results": [
+            {
+                "name": "Foo",
+                "version": "1.0",
+                "summary": "A foo",
+                "rank": 0.5,
+                "url": "http://api.warehouse.local/simple/Foo/",
+            },
+        ],
+    }
+    assert search_query.calls == [
+        pretend.call("foo bar", limit=5, offset=0),
+    ]
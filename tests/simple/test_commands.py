@@ -0,0 +1,80 @@
+import contextlib
+
+import pretend
+
+from warehouse.simple import commands
+
+
+def test_rebuild_links(monkeypatch):
+    projects = [pretend.stub(name="Foo"), pretend.stub(name="bar")]
+    query = pretend.stub(all=lambda: projects)
+    monkeypatch.setattr(commands, "Project", pretend.stub(
+        name=pretend.stub(in_=lambda names: names),
+        query=pretend.stub(order_by=lambda column: pretend.stub(
+            filter=lambda names: query,
+        )),
+    ))
+
+    @contextlib.contextmanager
+    def lock(key, timeout):
+        yield
+
+    lock = pretend.call_recorder(lock)
+    monkeypatch.setattr(commands, "redis", pretend.stub(lock=lock))
+
+    rebuild = pretend.call_recorder(lambda project: project.name == "Foo")
+    monkeypatch.setattr(commands, "SimpleLink", pretend.stub(rebuild=rebuild))
+
+    commit = pretend.call_recorder(lambda: None)
+    monkeypatch.setattr(commands, "db",
+        pretend.stub(session=pretend.stub(commit=commit)),
+    )
+
+    changed = commands.rebuild_links(projects=["Foo", "bar"], progress=False)
+
+    assert changed == 1
+    assert rebuild.calls == [pretend.call(x) for x in projects]
+    assert [x.args[0] for x in lock.calls] == [
+        commands.REDIS_SYNC_LOCK_KEY.format(project="Foo"),
+        commands.REDIS_SYNC_LOCK_KEY.format(project="bar"),
+    ]
+    assert len(commit.calls) == 2
+
+
+def test_rebuild_command(monkeypatch):
+    rebuild = pretend.call_recorder(lambda projects, progress: 2)
+    monkeypatch.setattr(commands, "rebuild_links", rebuild)
+
+    commands.RebuildLinks().run(projects=[b"Foo"], progress=False)
+
+    assert rebuild.calls == [pretend.call(projects=["Foo"], progress=False)]
+
+
+def test_process_finishes_jobs(monkeypatch):
+    @contextlib.contextmanager
+    def lock(key, timeout):
+        yield
+
+    monkeypatch.setattr(commands, "redis", pretend.stub(lock=lock))
+
+    complete = pretend.call_recorder(lambda job, html, links: True)
+    finish = pretend.call_recorder(lambda payload: None)
+    monkeypatch.setattr(commands, "rendering", pretend.stub(
+        render=lambda text: ("<p>%s</p>" % text, []),
+        complete=complete,
+        finish=finish,
+    ))
+
+    commit = pretend.call_recorder(lambda: None)
+    monkeypatch.setattr(commands, "db",
+        pretend.stub(session=pretend.stub(commit=commit)),
+    )
+
+    job = {"project": "Foo", "version": "1.0", "description": "Hi"}
+    pool = pretend.stub(map=lambda func, items: [func(x) for x in items])
+
+    commands.process([("payload", job)], pool)
+
+    assert complete.calls == [pretend.call(job, "<p>Hi</p>", [])]
+    assert commit.calls == [pretend.call()]
+    assert finish.calls == [pretend.call("payload")]
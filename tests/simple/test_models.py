@@ -0,0 +1,243 @@
+import flask
+import pretend
+import pytest
+
+from warehouse.simple import models
+from warehouse.simple.models import SimpleLink, SimpleLinkType
+
+
+class FakeQuery(object):
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def filter(self, *args):
+        return self
+
+    def all(self):
+        return list(self.rows)
+
+    def __iter__(self):
+        return iter(self.rows)
+
+
+def fake_db(files=(), plinks=(), current=()):
+    def query(*columns):
+        if columns[0] is models.File.version_id:
+            return FakeQuery(files)
+        elif columns[0] is models.ProjectLink.link:
+            return FakeQuery(plinks)
+        return FakeQuery(current)
+
+    return pretend.stub(session=pretend.stub(
+        flush=lambda: None,
+        query=query,
+        execute=pretend.call_recorder(lambda statement, rows: None),
+    ))
+
+
+def fake_versions(monkeypatch, versions):
+    query = pretend.stub(filter_by=lambda project: FakeQuery(versions))
+    monkeypatch.setattr(models, "Version", pretend.stub(
+        query=pretend.stub(populate_existing=lambda: query),
+    ))
+
+
+def test_generate(monkeypatch):
+    fake_versions(monkeypatch, [
+        pretend.stub(id=1, version="1.0", yanked=False,
+            uris={"Home Page": "https://example.com/"},
+            download_uri="https://example.com/Foo-1.0.tar.gz",
+        ),
+        pretend.stub(id=2, version="0.9", yanked=True,
+            uris={"Bug Tracker": "https://example.com/bugs/"},
+            download_uri="",
+        ),
+    ])
+
+    monkeypatch.setattr(models, "db", fake_db(
+        files=[
+            pretend.stub(version_id=1, filename="Foo-1.0.tar.gz",
+                file="Foo-1.0.tar.gz", hashes={"sha256": "abc"},
+                hashed_uri="/Foo-1.0.tar.gz#sha256=abc", yanked=False,
+                tags=[],
+            ),
+            pretend.stub(version_id=1, filename="Foo-1.0-py2-none-any.whl",
+                file="Foo-1.0-py2-none-any.whl", hashes={"sha256": "def"},
+                hashed_uri="/Foo-1.0-py2-none-any.whl#sha256=def",
+                yanked=True, tags=["py2-none-any"],
+            ),
+            pretend.stub(version_id=2, filename="Foo-0.9.tar.gz",
+                file="Foo-0.9.tar.gz", hashes={"sha256": "123"},
+                hashed_uri="/Foo-0.9.tar.gz#sha256=123", yanked=False,
+                tags=None,
+            ),
+        ],
+        plinks=[("https://example.com/docs/",)],
+    ))
+
+    links = SimpleLink._generate(pretend.stub(id=1))
+
+    assert links == set([
+        (SimpleLinkType.file, "1.0", "/Foo-1.0.tar.gz#sha256=abc",
+            "Foo-1.0.tar.gz", False, ()),
+        (SimpleLinkType.file, "1.0", "/Foo-1.0-py2-none-any.whl#sha256=def",
+            "Foo-1.0-py2-none-any.whl", True, ("py2-none-any",)),
+        # Yanking the version yanks its files along with it
+        (SimpleLinkType.file, "0.9", "/Foo-0.9.tar.gz#sha256=123",
+            "Foo-0.9.tar.gz", True, ()),
+        (SimpleLinkType.homepage, "1.0", "https://example.com/",
+            "1.0 home_page", False, ()),
+        (SimpleLinkType.download, "1.0", "https://example.com/Foo-1.0.tar.gz",
+            "1.0 download_url", False, ()),
+        (SimpleLinkType.extracted, "", "https://example.com/docs/",
+            "https://example.com/docs/", False, ()),
+    ])
+
+
+def test_generate_without_uri(monkeypatch):
+    fake_versions(monkeypatch, [
+        pretend.stub(id=1, version="1.0", yanked=False, uris={},
+            download_uri="",
+        ),
+    ])
+
+    # Stored before the URIs were, so only the name of the file is known
+    monkeypatch.setattr(models, "db", fake_db(files=[
+        pretend.stub(version_id=1, filename="Foo-1.0.tar.gz",
+            file="F/Foo/Foo-1.0.tar.gz", hashes={"sha256": "abc"},
+            hashed_uri="", yanked=False, tags=[],
+        ),
+    ]))
+
+    url = pretend.call_recorder(
+        lambda name: "https://files.warehouse.local/" + name,
+    )
+    monkeypatch.setattr(models, "get_storage",
+        lambda: pretend.stub(url=url),
+    )
+
+    app = flask.Flask(__name__)
+    app.config["FILE_URI_HASH"] = "sha256"
+
+    with app.app_context():
+        links = SimpleLink._generate(pretend.stub(id=1))
+
+    assert links == set([
+        (SimpleLinkType.file, "1.0",
+            "https://files.warehouse.local/F/Foo/Foo-1.0.tar.gz#sha256=abc",
+            "Foo-1.0.tar.gz", False, ()),
+    ])
+    assert url.calls == [pretend.call("F/Foo/Foo-1.0.tar.gz")]
+
+
+def test_generate_collected(monkeypatch):
+    fake_versions(monkeypatch, [
+        pretend.stub(id=1, version="1.0", yanked=False, uris={},
+            download_uri="",
+        ),
+    ])
+
+    # The contents of the yanked file have been collected as garbage
+    monkeypatch.setattr(models, "db", fake_db(files=[
+        pretend.stub(version_id=1, filename="Foo-1.0.tar.gz",
+            file="Foo-1.0.tar.gz", hashes={"sha256": "abc"},
+            hashed_uri="/Foo-1.0.tar.gz#sha256=abc", yanked=False, tags=[],
+        ),
+        pretend.stub(version_id=1, filename="Foo-1.0.zip", file="",
+            hashes={"sha256": "def"}, hashed_uri="", yanked=True, tags=[],
+        ),
+    ]))
+
+    assert SimpleLink._generate(pretend.stub(id=1)) == set([
+        (SimpleLinkType.file, "1.0", "/Foo-1.0.tar.gz#sha256=abc",
+            "Foo-1.0.tar.gz", False, ()),
+    ])
+
+
+def test_generate_no_versions(monkeypatch):
+    fake_versions(monkeypatch, [])
+    monkeypatch.setattr(models, "db", fake_db())
+
+    assert SimpleLink._generate(pretend.stub(id=1)) == set()
+
+
+@pytest.fixture
+def delete(request):
+    """
+    Replaces the query of :class:`SimpleLink` with one that records deletes,
+    without going through the query property which needs an application.
+    """
+    delete = pretend.call_recorder(lambda synchronize_session: None)
+
+    SimpleLink.query = pretend.stub(
+        filter_by=lambda project_id: pretend.stub(delete=delete),
+    )
+    request.addfinalizer(lambda: delattr(SimpleLink, "query"))
+
+    return delete
+
+
+GENERATED = set([
+    (SimpleLinkType.file, "1.0", "/Foo-1.0.whl", "Foo-1.0.whl", False,
+        ("py2-none-any", "py3-none-any")),
+    (SimpleLinkType.file, "1.0", "/Foo-1.0.tar.gz", "Foo-1.0.tar.gz", True,
+        ()),
+])
+
+
+def test_rebuild_unchanged(monkeypatch, delete):
+    monkeypatch.setattr(SimpleLink, "_generate",
+        staticmethod(lambda project: GENERATED),
+    )
+
+    # The stored rows come back in whatever order, with lists for tags
+    db = fake_db(current=[
+        (SimpleLinkType.file, "1.0", "/Foo-1.0.tar.gz", "Foo-1.0.tar.gz",
+            True, []),
+        (SimpleLinkType.file, "1.0", "/Foo-1.0.whl", "Foo-1.0.whl", False,
+            ["py2-none-any", "py3-none-any"]),
+    ])
+    monkeypatch.setattr(models, "db", db)
+
+    assert not SimpleLink.rebuild(pretend.stub(id=1))
+    assert delete.calls == []
+    assert db.session.execute.calls == []
+
+
+def test_rebuild_changed(monkeypatch, delete):
+    monkeypatch.setattr(SimpleLink, "_generate",
+        staticmethod(lambda project: GENERATED),
+    )
+
+    db = fake_db(current=[
+        (SimpleLinkType.file, "1.0", "/Foo-1.0.tar.gz", "Foo-1.0.tar.gz",
+            False, []),
+    ])
+    monkeypatch.setattr(models, "db", db)
+
+    assert SimpleLink.rebuild(pretend.stub(id=1))
+    assert delete.calls == [pretend.call(synchronize_session=False)]
+
+    rows = db.session.execute.calls[0].args[1]
+
+    assert sorted(rows, key=lambda x: x["label"]) == [
+        {
+            "project_id": 1,
+            "type": SimpleLinkType.file,
+            "version": "1.0",
+            "link": "/Foo-1.0.tar.gz",
+            "label": "Foo-1.0.tar.gz",
+            "yanked": True,
+            "tags": [],
+        },
+        {
+            "project_id": 1,
+            "type": SimpleLinkType.file,
+            "version": "1.0",
+            "link": "/Foo-1.0.whl",
+            "label": "Foo-1.0.whl",
+            "yanked": False,
+            "tags": ["py2-none-any", "py3-none-any"],
+        },
+    ]
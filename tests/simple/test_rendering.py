@@ -0,0 +1,149 @@
+import json
+
+import pretend
+import pytest
+
+from sqlalchemy.orm.exc import NoResultFound
+
+from warehouse.simple import rendering
+
+
+class FakeRedis(object):
+
+    def __init__(self, **lists):
+        self.lists = lists
+
+    def lpush(self, key, value):
+        self.lists.setdefault(key, []).insert(0, value)
+
+    def rpoplpush(self, src, dst):
+        if not self.lists.get(src):
+            return None
+
+        value = self.lists[src].pop()
+        self.lpush(dst, value)
+        return value
+
+    def brpoplpush(self, src, dst, timeout=0):
+        return self.rpoplpush(src, dst)
+
+    def lrem(self, key, value, num=0):
+        self.lists[key].remove(value)
+
+
+JOB = {"project": "Foo", "version": "1.0", "digest": "abc"}
+
+
+def _raise(exc):
+    def raiser(*args):
+        raise exc
+    return raiser
+
+
+@pytest.mark.parametrize(("render", "hrefs"), [
+    (_raise(ValueError("Invalid")), lambda html: []),
+    (_raise(TypeError("Broken")), lambda html: []),
+    (lambda text: "<p>Hi</p>", _raise(TypeError("Broken"))),
+])
+def test_render_failure(monkeypatch, render, hrefs):
+    monkeypatch.setattr(rendering, "recliner", pretend.stub(render=render))
+    monkeypatch.setattr(rendering, "hrefs", hrefs)
+
+    # Stored like any other failed render instead of taking the worker down
+    assert rendering.render("Hi") == ("", [])
+
+
+def test_enqueue_after_commit(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rendering, "redis", redis)
+
+    callbacks = []
+    monkeypatch.setattr(rendering, "after_commit", callbacks.append)
+
+    vers = pretend.stub(
+        project=pretend.stub(name="Foo"),
+        version="1.0",
+        description="Hi",
+    )
+
+    rendering.enqueue(vers, "abc")
+
+    # Nothing is queued until the version is committed
+    assert redis.lists == {}
+
+    callbacks[0]()
+
+    queued = redis.lists[rendering.REDIS_RENDER_QUEUE_KEY]
+    assert [json.loads(x) for x in queued] == [dict(JOB, description="Hi")]
+
+
+def test_dequeue_in_order(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rendering, "redis", redis)
+
+    for version in ["1.0", "2.0", "3.0"]:
+        rendering._push(json.dumps(dict(JOB, version=version)))
+
+    jobs = rendering.dequeue(count=2)
+
+    assert [x["version"] for _, x in jobs] == ["1.0", "2.0"]
+    assert len(redis.lists[rendering.REDIS_RENDER_PROCESSING_KEY]) == 2
+
+    rendering.finish(jobs[0][0])
+
+    assert redis.lists[rendering.REDIS_RENDER_PROCESSING_KEY] == [jobs[1][0]]
+
+
+def test_dequeue_empty(monkeypatch):
+    monkeypatch.setattr(rendering, "redis", FakeRedis())
+    assert rendering.dequeue(count=5) == []
+
+
+def test_recover(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rendering, "redis", redis)
+
+    rendering._push(json.dumps(JOB))
+    rendering.dequeue()
+
+    # The worker died before finishing the job
+    assert rendering.recover() == 1
+    assert [x for _, x in rendering.dequeue()] == [JOB]
+
+
+def test_requeue(monkeypatch):
+    redis = FakeRedis()
+    monkeypatch.setattr(rendering, "redis", redis)
+
+    job = JOB
+
+    for attempt in range(rendering.RENDER_RETRIES):
+        assert rendering.requeue(job)
+        [(_, job)] = rendering.dequeue()
+        assert job["attempts"] == attempt + 1
+
+    assert not rendering.requeue(job)
+    assert rendering.dequeue() == []
+
+
+def test_complete_missing_version(monkeypatch):
+    rendered = pretend.stub(digest="abc")
+    monkeypatch.setattr(rendering, "save",
+        lambda digest, html, links: rendered,
+    )
+
+    def one():
+        raise NoResultFound
+
+    query = pretend.stub(filter=lambda *args: pretend.stub(one=one))
+    monkeypatch.setattr(rendering, "Version", pretend.stub(
+        version=None,
+        query=pretend.stub(join=lambda model: query),
+    ))
+    monkeypatch.setattr(rendering, "Project", pretend.stub(name=None))
+
+    requeue = pretend.call_recorder(lambda job: True)
+    monkeypatch.setattr(rendering, "requeue", requeue)
+
+    assert not rendering.complete(JOB, "<p>Hi</p>", [])
+    assert requeue.calls == [pretend.call(JOB)]
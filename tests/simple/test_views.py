@@ -0,0 +1,62 @@
+import datetime
+
+import flask
+import pretend
+
+from warehouse.simple import views
+from warehouse.utils import http
+
+
+MODIFIED = datetime.datetime(2013, 1, 1, 12, 30, 15)
+
+
+def fake_redis():
+    stored = {}
+
+    def hmset(key, mapping):
+        stored[key] = mapping
+
+    pipeline = pretend.stub(
+                    hmset=hmset,
+                    expire=lambda key, timeout: None,
+                    execute=lambda: None,
+                )
+
+    return pretend.stub(
+        hget=lambda key, field: stored.get(key, {}).get(field),
+        pipeline=lambda: pipeline,
+    )
+
+
+def test_index_per_blueprint(monkeypatch):
+    monkeypatch.setattr(http, "redis", fake_redis())
+    monkeypatch.setattr(http, "brotli", None)
+    monkeypatch.setattr(views, "db", pretend.stub(session=pretend.stub(
+        query=lambda *args: pretend.stub(one=lambda: (MODIFIED, 1)),
+    )))
+    monkeypatch.setattr(views, "Project", pretend.stub(
+        id=None,
+        modified=None,
+        query=pretend.stub(all=lambda: [pretend.stub(name="Foo")]),
+    ))
+
+    app = flask.Flask(__name__)
+    app.config["SERVER_NAME"] = "warehouse.local"
+    app.config["PAGE_CACHE_TIMEOUT"] = 60
+    for blueprint in views.BLUEPRINTS:
+        app.register_blueprint(blueprint)
+
+    client = app.test_client()
+    etags = set()
+
+    for _ in range(2):
+        for prefix in ["/simple", "/restricted"]:
+            resp = client.get(prefix + "/",
+                        base_url="http://api.warehouse.local",
+                    )
+
+            assert resp.status_code == 200
+            assert 'href="%s/Foo/"' % prefix in resp.data
+            etags.add(resp.headers["ETag"])
+
+    assert len(etags) == 2
@@ -0,0 +1,153 @@
+import pretend
+import pytest
+import requests
+
+from warehouse.synchronize import commands
+from warehouse.utils.metrics import Metrics
+
+
+DIST = {"url": "https://example.com/Foo-1.0.zip", "md5_digest": "abc"}
+
+
+def _raise(exc):
+    def raiser(*args):
+        raise exc
+    return raiser
+
+
+@pytest.fixture
+def redis(monkeypatch):
+    redis = pretend.stub(sadd=pretend.call_recorder(lambda key, value: None))
+    monkeypatch.setattr(commands, "redis", redis)
+    monkeypatch.setattr(commands, "metrics", pretend.stub(sync=Metrics("t")))
+    return redis
+
+
+def test_fetch_metadata(monkeypatch, redis):
+    remote = pretend.stub(fetched=100)
+    fetcher = pretend.stub(ranged=pretend.call_recorder(lambda url: remote))
+
+    read = pretend.call_recorder(lambda filename, fp: {"requires": []})
+    monkeypatch.setattr(commands.metadata, "read", read)
+
+    distribution = pretend.stub(filename="Foo-1.0.zip")
+
+    assert commands.fetch_metadata(fetcher, distribution, DIST) == {
+        "requires": [],
+    }
+    assert fetcher.ranged.calls == [pretend.call(DIST["url"])]
+    assert read.calls == [pretend.call("Foo-1.0.zip", remote)]
+    assert redis.sadd.calls == [pretend.call(commands.REDIS_RANGED_KEY, "abc")]
+
+
+def test_fetch_metadata_once(monkeypatch):
+    ranged = set()
+    monkeypatch.setattr(commands, "redis", pretend.stub(
+        sismember=lambda key, value: value in ranged,
+        sadd=lambda key, value: ranged.add(value),
+    ))
+    monkeypatch.setattr(commands, "metrics", pretend.stub(sync=Metrics("t")))
+
+    # An old zip sdist without a requires.txt has no metadata to find
+    read = pretend.call_recorder(lambda filename, fp: {"requires": None})
+    monkeypatch.setattr(commands.metadata, "read", read)
+
+    fetcher = pretend.stub(ranged=lambda url: pretend.stub(fetched=100))
+    distribution = pretend.stub(filename="Foo-1.0.zip",
+                        type=commands.FileType.source,
+                    )
+
+    for _ in range(2):
+        if commands.ranged_metadata(distribution, DIST):
+            commands.fetch_metadata(fetcher, distribution, DIST)
+
+    assert len(read.calls) == 1
+    assert commands.metrics.sync.counters == {"ranged_cached": 1}
+
+
+@pytest.mark.parametrize("exc", [
+    requests.HTTPError("416 Requested Range Not Satisfiable"),
+    requests.ConnectionError("Connection reset"),
+    IOError("Short range read of 'Foo-1.0.zip'"),
+])
+def test_fetch_metadata_remote_failure(redis, exc):
+    fetcher = pretend.stub(ranged=_raise(exc))
+    distribution = pretend.stub(filename="Foo-1.0.zip")
+
+    assert commands.fetch_metadata(fetcher, distribution, DIST) is None
+    assert commands.metrics.sync.counters == {"ranged_failed": 1}
+    assert redis.sadd.calls == []
+
+
+def test_fetch_metadata_invalid(monkeypatch, redis):
+    fetcher = pretend.stub(ranged=lambda url: pretend.stub(fetched=100))
+    monkeypatch.setattr(commands.metadata, "read",
+        _raise(ValueError("Invalid Requires-Dist 'Foo ('")),
+    )
+    distribution = pretend.stub(filename="Foo-1.0-py2-none-any.whl")
+
+    assert commands.fetch_metadata(fetcher, distribution, DIST) is None
+    assert redis.sadd.calls == []
+
+
+def test_synchronize_by_projects_invalidates_yanked(monkeypatch):
+    fetcher = pretend.stub(
+        current=lambda: 1000,
+        classifiers=lambda: [],
+        projects=lambda: ["Foo"],
+    )
+    monkeypatch.setattr(commands, "store", pretend.stub())
+    monkeypatch.setattr(commands, "synchronize_project",
+        lambda project, fetcher, download, extractor: None,
+    )
+    monkeypatch.setattr(commands, "metrics", pretend.stub(sync=Metrics("t")))
+    monkeypatch.setattr(commands, "db",
+        pretend.stub(session=pretend.stub(commit=lambda: None)),
+    )
+
+    projects = pretend.call_recorder(lambda current: ["bar", "Baz"])
+    monkeypatch.setattr(commands.diff, "projects", projects)
+
+    invalidate = pretend.call_recorder(lambda name: None)
+    monkeypatch.setattr(commands.resolver, "invalidate", invalidate)
+
+    assert commands.synchronize_by_projects(
+                fetcher=fetcher,
+                progress=False,
+            ) == 1000
+
+    assert projects.calls == [pretend.call(["Foo"])]
+    assert invalidate.calls == [pretend.call("bar"), pretend.call("Baz")]
+
+
+def test_track_flushes_once(monkeypatch):
+    listen = pretend.call_recorder(lambda target, name, func: None)
+    monkeypatch.setattr(commands, "listen", listen)
+    monkeypatch.setattr(commands, "_tracking", False)
+
+    commands.track_flushes()
+    commands.track_flushes()
+
+    assert [x.args[1] for x in listen.calls] == [
+        "before_flush",
+        "after_flush_postexec",
+        "after_cursor_execute",
+    ]
+
+
+def test_rows_written(monkeypatch):
+    monkeypatch.setattr(commands, "metrics", pretend.stub(sync=Metrics("t")))
+
+    for statement, rowcount in [
+                ("INSERT INTO simple_links ...", 3),
+                ("\n    UPDATE files SET ...", 2),
+                ("delete from project_links ...", 1),
+                ("SELECT * FROM files", 10),
+                ("UPDATE files SET ...", 0),
+                ("INSERT INTO dependents ...", -1),
+            ]:
+        commands._statement_executed(None, pretend.stub(rowcount=rowcount),
+            statement, None, None, False,
+        )
+
+    assert commands.metrics.sync.counters == {"rows_written": 6}
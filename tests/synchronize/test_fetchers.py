@@ -8,7 +8,11 @@ import pytest
 import requests
 import xmlrpc2.client
 
+from warehouse.packages import metadata
 from warehouse.synchronize import fetchers
+from warehouse.utils import metrics
+
+from ..packages.test_archives import METADATA, make_zip
 
 
 NOW = datetime.datetime.utcnow()
@@ -302,3 +306,150 @@ def test_fetcher_files(url, https_url, content):
     assert fetcher.file(url) == content
 
     session_get.assert_called_once_with(https_url)
+
+
+def test_fetcher_download(monkeypatch):
+    session_get = mock.Mock(return_value=pretend.stub(
+        iter_content=lambda size: iter([b"File ", b"Content!"]),
+    ))
+    session = pretend.stub(headers={}, get=session_get)
+    client = pretend.stub()
+
+    fetcher = fetchers.PyPIFetcher(session=session, client=client)
+
+    monkeypatch.setattr(fetchers.metrics, "sync", metrics.Metrics("test"))
+
+    spooled = fetcher.download(
+                "http://files.test.local/T/Test/Test-1.0.tar.gz",
+                suffix="Test-1.0.tar.gz",
+            )
+
+    try:
+        assert spooled.name.endswith("Test-1.0.tar.gz")
+        assert spooled.read() == b"File Content!"
+    finally:
+        spooled.close()
+
+    assert not os.path.exists(spooled.name)
+    assert fetchers.metrics.sync.counters == {
+        "requests": 1,
+        "downloaded_bytes": 13,
+    }
+
+    session_get.assert_called_once_with(
+        "https://files.test.local/T/Test/Test-1.0.tar.gz",
+        stream=True,
+    )
+
+
+RANGED_URL = "https://files.test.local/f"
+
+
+class RangeServer(object):
+    """
+    Stands in for a requests session talking to a server that supports range
+    requests for a single file.
+    """
+
+    def __init__(self, content, ranges=True):
+        self.headers = {}
+        self.content = content
+        self.ranges = ranges
+        self.requested = []
+
+    def get(self, url, headers=None):
+        spec = (headers or {}).get("Range")
+        self.requested.append(spec)
+
+        if not self.ranges or spec is None:
+            return pretend.stub(
+                status_code=200,
+                headers={},
+                content=self.content,
+                raise_for_status=lambda: None,
+            )
+
+        start, end = spec[len("bytes="):].split("-")
+
+        if not start:
+            start, end = max(len(self.content) - int(end), 0), None
+        else:
+            start = int(start)
+
+        end = len(self.content) - 1 if not end else int(end)
+        content = self.content[start:end + 1]
+
+        return pretend.stub(
+            status_code=206,
+            headers={
+                "Content-Range": "bytes {0}-{1}/{2}".format(
+                    start,
+                    start + len(content) - 1,
+                    len(self.content),
+                ),
+            },
+            content=content,
+            raise_for_status=lambda: None,
+        )
+
+
+def test_ranged_file_reads():
+    content = os.urandom(10000)
+    server = RangeServer(content)
+
+    ranged = fetchers.RangedFile(server, RANGED_URL, block_size=100)
+
+    assert ranged.size == 10000
+    assert server.requested == ["bytes=-100"]
+
+    ranged.seek(-50, os.SEEK_END)
+    assert ranged.read() == content[-50:]
+    assert ranged.tell() == 10000
+    assert ranged.read() == b""
+
+    ranged.seek(10)
+    assert ranged.read(20) == content[10:30]
+    ranged.seek(5, os.SEEK_CUR)
+    assert ranged.read(10) == content[35:45]
+    assert server.requested == ["bytes=-100", "bytes=10-109"]
+
+    ranged.seek(5000)
+    assert ranged.read(500) == content[5000:5500]
+    assert server.requested[-1] == "bytes=5000-5499"
+
+    assert ranged.fetched == 100 + 100 + 500
+
+
+def test_ranged_file_without_range_support():
+    content = os.urandom(1000)
+    server = RangeServer(content, ranges=False)
+
+    ranged = fetchers.RangedFile(server, RANGED_URL, block_size=100)
+
+    assert ranged.size == 1000
+    assert ranged.read() == content
+    assert len(server.requested) == 1
+
+
+def test_ranged_file_invalid_seek():
+    ranged = fetchers.RangedFile(RangeServer(b"abc"), RANGED_URL)
+
+    with pytest.raises(IOError):
+        ranged.seek(-10, os.SEEK_END)
+
+
+def test_fetcher_ranged_wheel_metadata():
+    content = make_zip([
+        ("foo/_speedups.so", os.urandom(1024 * 1024)),
+        ("foo-1.0.dist-info/METADATA", METADATA),
+    ]).read()
+    server = RangeServer(content)
+
+    fetcher = fetchers.PyPIFetcher(session=server, client=pretend.stub())
+
+    remote = fetcher.ranged("http://test.local/foo-1.0-py2-none-any.whl")
+    data = metadata.read("foo-1.0-py2-none-any.whl", remote)
+
+    assert data["requires_dist"][1] == {"name": "six"}
+    assert remote.url == "https://test.local/foo-1.0-py2-none-any.whl"
+    assert remote.fetched < 128 * 1024
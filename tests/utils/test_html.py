@@ -0,0 +1,69 @@
+from xml.etree import ElementTree
+
+import html5lib
+import html5lib.treebuilders
+import pytest
+
+from warehouse.utils import html
+
+
+def tree_hrefs(document):
+    # The full tree building extraction that html.hrefs replaces
+    parser = html5lib.HTMLParser(
+        tree=html5lib.treebuilders.getTreeBuilder("etree", ElementTree),
+        namespaceHTMLElements=False,
+    )
+    parsed = parser.parse(document)
+    return [anchor.attrib["href"]
+                for anchor in parsed.iter("a") if "href" in anchor.attrib]
+
+
+CORPUS = [
+    "",
+    "Just some text",
+    '<a href="https://example.com/">Example</a>',
+    '<A HREF="https://example.com/UPPER">Upper</A>',
+    "<a href=unquoted>Unquoted</a>",
+    "<a name=anchor>No href</a><a href=''>Empty</a>",
+    '<a href="first" href="second">Duplicate</a>',
+    '<a href="/?a=1&amp;b=2&lt;3">Entities</a>',
+    '<a href="self-closing"/>',
+    '<p><a href="a">Unclosed<p><a href="b">Paragraphs',
+    '<script>var a = "<a href=\'script\'>";</script><a href="after">x</a>',
+    '<style>a[href="<a href=style>"] {}</style><a href="after">x</a>',
+    "<textarea><a href=textarea></textarea><a href=after>x</a>",
+    "<title><a href=title></title><a href=after>x</a>",
+    "<noscript><a href=noscript></noscript><a href=after>x</a>",
+    "<xmp><a href=xmp></xmp><iframe><a href=iframe></iframe>",
+    "<svg><a href=svg></a></svg><a href=after>x</a>",
+    "<math><a href=math></a></math><a href=after>x</a>",
+    "<svg><foreignObject><a href=fo>x</a></foreignObject><a href=svg></a>"
+        "</svg><a href=after>x</a>",
+    "<svg><desc><a href=desc>x</a></desc><title><a href=t>y</a></title></svg>",
+    "<math><mi><a href=mi>x</a></mi><mtext><a href=mtext>x</a></mtext></math>",
+    "<svg><foreignObject><svg><a href=svg></a></svg><a href=fo>x</a>"
+        "</foreignObject></svg>",
+    "<svg><foreignObject/><a href=svg></a></svg>",
+    "<svg><p><a href=breakout>x</a></svg>",
+    "<!-- <a href=comment> --><a href=after>x</a>",
+    "<![CDATA[<a href=cdata>]]><a href=after>x</a>",
+    u'<a href="\xe9\u2603">Unicode</a>',
+    """
+    <div class="document">
+    <h1 class="title">Project</h1>
+    <p>See <a class="reference external" href="https://docs.example.com/">the
+    documentation</a> and the <a class="reference external"
+    href="https://github.com/example/project">repository</a>.</p>
+    <pre class="literal-block">&lt;a href="literal"&gt;</pre>
+    <ul class="simple">
+    <li><a class="reference internal" href="#installation">Install</a></li>
+    </ul>
+    <table><tr><td><a href="table">cell</a></td></tr></table>
+    </div>
+    """,
+]
+
+
+@pytest.mark.parametrize("document", CORPUS)
+def test_hrefs_matches_tree(document):
+    assert html.hrefs(document) == tree_hrefs(document)
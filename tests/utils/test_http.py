@@ -0,0 +1,118 @@
+import datetime
+import gzip
+import io
+
+import flask
+import pretend
+import pytest
+
+from warehouse.utils import http
+
+
+MODIFIED = datetime.datetime(2013, 1, 1, 12, 30, 15, 500)
+
+
+def test_etag_is_stable():
+    assert http.etag("a", 1, MODIFIED) == http.etag("a", 1, MODIFIED)
+    assert http.etag("a", 1, MODIFIED) != http.etag("a", 2, MODIFIED)
+
+
+@pytest.mark.parametrize(("headers", "status", "rendered"), [
+    ({}, 200, True),
+    ({"If-None-Match": '"abc"'}, 304, False),
+    ({"If-None-Match": '"other"'}, 200, True),
+    ({"If-Modified-Since": "Tue, 01 Jan 2013 12:30:15 GMT"}, 304, False),
+    ({"If-Modified-Since": "Tue, 01 Jan 2013 12:30:14 GMT"}, 200, True),
+])
+def test_conditional(headers, status, rendered):
+    app = flask.Flask(__name__)
+    render = pretend.call_recorder(lambda: "Rendered!")
+
+    with app.test_request_context("/", headers=headers):
+        response = http.conditional("abc", MODIFIED, render)
+
+    assert response.status_code == status
+    assert response.get_etag() == ("abc", False)
+    assert response.last_modified == MODIFIED.replace(microsecond=0)
+    assert bool(render.calls) == rendered
+
+
+def test_compress_gzip():
+    bodies = http.compress(b"Simple Index")
+
+    assert bodies["identity"] == b"Simple Index"
+    assert gzip.GzipFile(fileobj=io.BytesIO(bodies["gzip"])).read() == \
+            b"Simple Index"
+    assert http.compress(b"Simple Index") == bodies
+
+
+@pytest.mark.parametrize(("accept", "encoding"), [
+    (None, "identity"),
+    ("gzip", "gzip"),
+    ("gzip;q=0, identity", "identity"),
+    ("deflate", "identity"),
+])
+def test_precompressed(monkeypatch, accept, encoding):
+    stored = {}
+
+    def hget(key, field):
+        return stored.get(key, {}).get(field)
+
+    def hmset(key, mapping):
+        stored[key] = mapping
+
+    pipeline = pretend.stub(
+                    hmset=hmset,
+                    expire=lambda key, timeout: None,
+                    execute=lambda: None,
+                )
+    redis = pretend.stub(hget=hget, pipeline=lambda: pipeline)
+    monkeypatch.setattr(http, "redis", redis)
+    monkeypatch.setattr(http, "brotli", None)
+
+    app = flask.Flask(__name__)
+    app.config["PAGE_CACHE_TIMEOUT"] = 60
+    render = pretend.call_recorder(lambda: "Rendered!")
+    headers = {"Accept-Encoding": accept} if accept else {}
+
+    for _ in range(2):
+        with app.test_request_context("/", headers=headers):
+            response = http.precompressed("abc", render)
+
+        assert response.content_encoding == (
+                    None if encoding == "identity" else encoding)
+        assert "Accept-Encoding" in response.vary
+
+    assert len(render.calls) == 1
+    assert response.get_data() == http.compress(b"Rendered!")[encoding]
+
+
+def test_conditional_per_encoding(monkeypatch):
+    monkeypatch.setattr(http, "brotli", None)
+
+    app = flask.Flask(__name__)
+    tags = {}
+
+    for encoding in ["gzip", "identity"]:
+        headers = {"Accept-Encoding": encoding}
+
+        with app.test_request_context("/", headers=headers):
+            response = http.conditional("abc", MODIFIED,
+                            lambda: "Rendered!",
+                            encoded=True,
+                        )
+
+        tags[encoding] = response.get_etag()[0]
+        assert "Accept-Encoding" in response.vary
+
+    assert tags["gzip"] != tags["identity"]
+
+    # A tag is only current for the encoding it was given out with
+    headers = {"Accept-Encoding": "gzip", "If-None-Match": tags["identity"]}
+
+    with app.test_request_context("/", headers=headers):
+        response = http.conditional("abc", None, lambda: "Rendered!",
+                        encoded=True,
+                    )
+
+    assert response.status_code == 200
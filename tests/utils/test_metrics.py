@@ -0,0 +1,109 @@
+import pretend
+import pytest
+
+from warehouse.utils import metrics
+
+
+def test_counters_and_timings():
+    collected = metrics.Metrics("test")
+    clock = iter([10.0, 12.5]).next
+
+    collected.increment("requests")
+    collected.increment("requests", 2)
+
+    with collected.timer("download", clock=clock):
+        pass
+
+    assert collected.counters == {"requests": 3}
+    assert collected.timings == {"download": [1, 2.5]}
+
+
+def test_timer_on_error():
+    collected = metrics.Metrics("test")
+
+    with pytest.raises(ValueError):
+        with collected.timer("xmlrpc", clock=iter([1.0, 2.0]).next):
+            raise ValueError
+
+    assert collected.timings == {"xmlrpc": [1, 1.0]}
+
+
+def test_prometheus():
+    collected = metrics.Metrics("test")
+    collected.increment("requests", 3)
+    collected.timing("xmlrpc", 1.5)
+    collected.timing("xmlrpc", 0.5)
+
+    for value in [0.05, 0.5, 3, 500]:
+        collected.observe("project_seconds", value, buckets=(0.1, 1, 10))
+
+    assert collected.prometheus() == "\n".join([
+        "# TYPE test_requests_total counter",
+        "test_requests_total 3",
+        "# TYPE test_stage_seconds summary",
+        'test_stage_seconds_sum{stage="xmlrpc"} 2.0',
+        'test_stage_seconds_count{stage="xmlrpc"} 2',
+        "# TYPE test_project_seconds histogram",
+        'test_project_seconds_bucket{le="0.1"} 1',
+        'test_project_seconds_bucket{le="1.0"} 2',
+        'test_project_seconds_bucket{le="10.0"} 3',
+        'test_project_seconds_bucket{le="+Inf"} 4',
+        "test_project_seconds_sum 503.55",
+        "test_project_seconds_count 4",
+    ]) + "\n"
+
+
+def test_write(tmpdir):
+    collected = metrics.Metrics("test")
+    collected.increment("requests")
+
+    path = tmpdir.join("sync.prom")
+    collected.write(str(path))
+
+    assert path.read() == collected.prometheus()
+    assert tmpdir.listdir() == [path]
+
+
+def test_summary():
+    collected = metrics.Metrics("test")
+    collected.timing("hashing", 1)
+    collected.timing("xmlrpc", 4)
+    collected.increment("requests", 7)
+    collected.observe("project_seconds", 2)
+    collected.observe("project_seconds", 4)
+
+    lines = collected.summary().splitlines()
+
+    assert lines[0] == "Time spent per stage:"
+    assert lines[1].split() == ["xmlrpc", "4.00s", "1", "times"]
+    assert lines[2].split() == ["hashing", "1.00s", "1", "times"]
+    assert lines[3] == "Counters:"
+    assert lines[4].split() == ["requests", "7"]
+    assert lines[5] == "project_seconds: 2 observed, 3.00s mean, 4.00s max"
+
+
+def test_statsd():
+    statsd = pretend.stub(send=pretend.call_recorder(lambda *args: None))
+    collected = metrics.Metrics("test", statsd=statsd)
+
+    collected.increment("requests")
+    collected.timing("xmlrpc", 0.25)
+    collected.observe("project_seconds", 1.5)
+
+    assert statsd.send.calls == [
+        pretend.call("requests", 1, "c"),
+        pretend.call("xmlrpc", 250, "ms"),
+        pretend.call("project_seconds", 1500, "ms"),
+    ]
+
+
+def test_statsd_client():
+    sock = pretend.stub(sendto=pretend.call_recorder(lambda data, addr: None))
+
+    client = metrics.StatsdClient("localhost", prefix="warehouse.sync")
+    client.socket = sock
+    client.send("requests", 2, "c")
+
+    assert sock.sendto.calls == [
+        pretend.call(b"warehouse.sync.requests:2|c", ("localhost", 8125)),
+    ]
@@ -0,0 +1,25 @@
+import pretend
+import stockpile
+
+from warehouse import utils
+
+
+def test_get_storage_cached(monkeypatch):
+    storage_class = pretend.call_recorder(lambda **kw: pretend.stub(**kw))
+    get_storage = pretend.call_recorder(lambda name: storage_class)
+    monkeypatch.setattr(stockpile, "get_storage", get_storage)
+
+    app = pretend.stub(
+            config={
+                "STORAGE": "test:Storage",
+                "STORAGE_OPTIONS": {"location": "data"},
+            },
+            extensions={},
+        )
+
+    storage = utils.get_storage(app=app)
+
+    assert storage.location == "data"
+    assert utils.get_storage(app=app) is storage
+    assert get_storage.calls == [pretend.call("test:Storage")]
+    assert storage_class.calls == [pretend.call(location="data")]
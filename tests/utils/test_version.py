@@ -0,0 +1,67 @@
+import itertools
+
+import pytest
+
+from warehouse.utils.version import SortedVersions, Version, VersionPredicate
+
+
+VERSIONS = [
+    "0.9", "1.0", "1.0.0", "1.0.1", "1.0a1", "1.0b2", "1.0c1", "1.0rc1",
+    "1.0.dev4", "1.0.post1", "1.0.post1.dev2", "1.1", "1.1.0.1", "1.2",
+    "1.10", "2.0", "2.0.0.0", "2.0b1", "2.1", "10.0",
+]
+
+PREDICATES = [
+    "foo",
+    "foo (>1.0)",
+    "foo (>=1.0)",
+    "foo (<1.0)",
+    "foo (<=1.0)",
+    "foo (==1.0)",
+    "foo (!=1.0)",
+    "foo (>=1.0, <2.0)",
+    "foo (>=1.0, !=1.1, !=1.0.1, <2.0)",
+    "foo (>1.0, <1.0)",
+    "foo (1.0)",
+    "foo (1.1)",
+    "foo (>=1.0,1.1)",
+    "foo (==2.0.0)",
+    "foo (>=1.0b1, <1.0.post1)",
+]
+
+
+@pytest.mark.parametrize(("left", "right"),
+    list(itertools.product(VERSIONS, VERSIONS)),
+)
+def test_key_compares_like_version(left, right):
+    left, right = Version(left), Version(right)
+
+    assert (left.key < right.key) == (left < right)
+    assert (left.key == right.key) == (left == right)
+
+
+@pytest.mark.parametrize("predicate", PREDICATES)
+def test_filter_matches_like_match(predicate):
+    predicate = VersionPredicate(predicate)
+    versions = [Version(x) for x in VERSIONS]
+
+    expected = [x for x in versions if predicate.match(x)]
+
+    assert predicate.filter(versions) == expected
+    assert predicate.filter(SortedVersions(VERSIONS)) == expected
+
+
+def test_filter_keeps_order():
+    predicate = VersionPredicate("foo (>=1.0)")
+    assert [str(x) for x in predicate.filter(["2.0", "0.1", "1.0"])] == [
+        "2.0",
+        "1.0",
+    ]
+
+
+def test_sorted_versions():
+    versions = SortedVersions(["2.0", "1.0", "1.5"])
+
+    assert len(versions) == 3
+    assert versions.order == [1, 2, 0]
+    assert versions.keys == [Version(x).key for x in ["1.0", "1.5", "2.0"]]
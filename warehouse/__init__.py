@@ -28,9 +28,11 @@ for attr in __about__.__all__:
 
 MODULES = [
     {"name": "history", "models": True},
-    {"name": "packages", "models": True},
+    {"name": "packages", "models": True, "views": True, "commands": True},
     {"name": "synchronize", "commands": True},
-    {"name": "simple", "models": True, "views": True},
+    {"name": "simple", "models": True, "views": True, "commands": True},
+    {"name": "search", "views": True, "commands": True},
+    {"name": "browse", "views": True, "commands": True},
 ]
 
 logger = logging.getLogger("warehouse")
@@ -0,0 +1,67 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import logging
+
+from flask.ext.script import Command, Option  # pylint: disable=E0611,F0401
+from progress.bar import ShadyBar
+
+from warehouse import db, script
+from warehouse.browse import query
+from warehouse.packages.models import Project, ProjectClassifier
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def rebuild_classifiers(progress=True):
+    projects = Project.query.filter_by(yanked=False).all()
+
+    if progress:
+        projects = ShadyBar("Rebuilding Classifiers",
+                        max=len(projects),
+                    ).iter(projects)
+
+    changed = 0
+
+    for project in projects:
+        if ProjectClassifier.refresh(project):
+            changed += 1
+
+        db.session.commit()
+
+    return changed
+
+
+class Classifiers(Command):
+    """
+    Lists the classifiers used by the latest versions of projects.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("--rebuild",
+            action="store_true",
+            dest="rebuild",
+            default=False,
+            help="rebuild the classifiers of every project before listing",
+        ),
+        Option("--no-progress",
+            action="store_false",
+            dest="progress",
+            help="do not display a progress bar",
+        ),
+    ]
+
+    def run(self, rebuild=False, progress=True):
+        if rebuild:
+            changed = rebuild_classifiers(progress=progress)
+            logger.info("Rebuilt the classifiers of %s projects", changed)
+
+        for trove, count in query.classifiers():
+            print("{0:>8} {1}".format(count, trove))
+
+script.add_command("classifiers", Classifiers())
@@ -0,0 +1,80 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from sqlalchemy.orm import aliased
+from sqlalchemy.sql import exists, func
+
+from warehouse import db
+from warehouse.packages.models import Classifier, Project, ProjectClassifier
+
+
+MAX_RESULTS = 500
+
+
+def classifiers():
+    """
+    Returns (trove, project count) for every classifier used by the latest
+    version of at least one project.
+    """
+    return db.session.query(Classifier.trove, Classifier.project_count).filter(
+                Classifier.project_count > 0,
+            ).order_by(Classifier.trove).all()
+
+
+def projects(trove, facets=None, after=None, limit=50):
+    """
+    Returns a page of the projects classified under ``trove`` and every one
+    of ``facets``, ordered by their normalized names and starting after the
+    normalized name ``after``.
+
+    The result is a dictionary with the total ``count``, the ``projects``
+    as (name, normalized) and the cursor for the ``next`` page, which is
+    None on the last page.
+    """
+    facets = sorted(set(facets or []) - set([trove]))
+    limit = max(min(limit, MAX_RESULTS), 1)
+
+    found = dict(db.session.query(
+                    Classifier.trove,
+                    Classifier,
+                ).filter(Classifier.trove.in_([trove] + facets)))
+
+    if len(found) != len(facets) + 1:
+        # Nothing can be classified under a classifier we do not have
+        return {"count": 0, "projects": [], "next": None}
+
+    base = aliased(ProjectClassifier)
+    criteria = [base.classifier_id == found[trove].id]
+
+    for facet in facets:
+        other = aliased(ProjectClassifier)
+        criteria.append(exists().where(db.and_(
+            other.project_id == base.project_id,
+            other.classifier_id == found[facet].id,
+        )))
+
+    if facets:
+        count = db.session.query(func.count(base.project_id)).filter(
+                    *criteria
+                ).scalar()
+    else:
+        # The count for a single classifier is kept up to date for us
+        count = found[trove].project_count
+
+    page = db.session.query(Project.name, base.normalized).select_from(
+                base,
+            ).join(
+                Project, Project.id == base.project_id,
+            ).filter(*criteria)
+
+    if after is not None:
+        page = page.filter(base.normalized > after)
+
+    page = page.order_by(base.normalized).limit(limit + 1).all()
+
+    return {
+        "count": count,
+        "projects": page[:limit],
+        "next": page[limit - 1][1] if len(page) > limit else None,
+    }
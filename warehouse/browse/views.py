@@ -0,0 +1,65 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import flask
+
+from warehouse.browse import query
+
+
+browse = flask.Blueprint("browse",  # pylint: disable=C0103
+            __name__,
+            subdomain="api",
+            url_prefix="/browse",
+        )
+
+
+@browse.route("/")
+def classifiers():
+    return flask.jsonify(classifiers=[
+        {"trove": trove, "count": count}
+        for trove, count in query.classifiers()
+    ])
+
+
+@browse.route("/<path:trove>")
+def projects(trove):
+    # Additional classifiers that every listed project must also have
+    facets = flask.request.args.getlist("with")
+
+    found = query.projects(trove,
+                facets=facets,
+                after=flask.request.args.get("after"),
+                limit=flask.request.args.get("limit", 50, type=int),
+            )
+
+    if found["next"] is not None:
+        following = flask.url_for("browse.projects",
+                        trove=trove,
+                        after=found["next"],
+                        limit=flask.request.args.get("limit", type=int),
+                        _external=True,
+                        **{"with": facets}
+                    )
+    else:
+        following = None
+
+    return flask.jsonify(
+        trove=trove,
+        facets=sorted(set(facets) - set([trove])),
+        count=found["count"],
+        projects=[
+            {
+                "name": name,
+                "url": flask.url_for("simple.detail",
+                            project=name,
+                            _external=True,
+                        ),
+            }
+            for name, _ in found["projects"]
+        ],
+        next=following,
+    )
+
+
+BLUEPRINTS = [browse]
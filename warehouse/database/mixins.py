@@ -26,7 +26,11 @@ class TimeStampedMixin(object):
             CREATE OR REPLACE FUNCTION update_modified_column()
             RETURNS TRIGGER AS $$
             BEGIN
-                NEW.modified = now();
+                -- Rows that are only touched, to have other triggers compute
+                --   their columns again, have not been modified
+                IF NEW IS DISTINCT FROM OLD THEN
+                    NEW.modified = now();
+                END IF;
                 RETURN NEW;
             END;
             $$ LANGUAGE 'plpgsql';
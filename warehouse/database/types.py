@@ -4,7 +4,7 @@ from __future__ import unicode_literals
 
 import re
 
-from sqlalchemy.types import SchemaType, TypeDecorator
+from sqlalchemy.types import SchemaType, TypeDecorator, UserDefinedType
 from sqlalchemy.types import Enum as SQLAEnum
 
 
@@ -109,3 +109,14 @@ class Enum(object):
     @classmethod
     def db_type(cls):
         return EnumType(cls)
+
+
+class TSVector(UserDefinedType):
+    """
+    A PostgreSQL full text search document.
+    """
+
+    # pylint: disable=W0223
+
+    def get_col_spec(self):
+        return "TSVECTOR"
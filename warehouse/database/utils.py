@@ -2,6 +2,15 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import unicode_literals
 
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session
+
+from warehouse import db
+
+
+# The callbacks waiting for the transaction of each session to be committed
+_pending = {}
+
 
 def table_args(args):
     def wrapper(cls):
@@ -14,3 +23,37 @@ def table_args(args):
 
         return targs
     return wrapper
+
+
+def after_commit(callback, session=None):
+    """
+    Calls ``callback`` once the current transaction of ``session``, by
+    default the database session, has been committed. If the transaction is
+    rolled back instead ``callback`` is never called.
+
+    This is used to tell things outside of the database about changes only
+    once they can actually see them.
+    """
+    if session is None:
+        session = db.session()
+
+    _pending.setdefault(id(session), []).append(callback)
+
+
+def _committed(session):
+    if session.transaction is not None and session.transaction.nested:
+        # Releasing a savepoint commits nothing yet
+        return
+
+    for callback in _pending.pop(id(session), []):
+        callback()
+
+
+def _rolled_back(session, previous_transaction):
+    # pylint: disable=W0212
+    if previous_transaction._parent is None:
+        _pending.pop(id(session), None)
+
+
+listen(Session, "after_commit", _committed)
+listen(Session, "after_soft_rollback", _rolled_back)
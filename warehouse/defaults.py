@@ -22,5 +22,35 @@ STORAGE_OPTIONS = {
     "base_url": "https://files.warehouse.local:5000/",
 }
 
+# Store the contents of files once under their sha256 digest, instead of once
+#      per filename, and serve them through a redirect that keeps the filename.
+#      The URLs of the redirects are generated during synchronization from
+#      SERVER_NAME and PREFERRED_URL_SCHEME.
+STORAGE_CONTENT_ADDRESSED = False
+
 # What type of hash to use when displaying a hashed uri for files
 FILE_URI_HASH = "sha256"
+
+# How long, in seconds, rendered and precompressed pages are kept in Redis
+PAGE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Render descriptions in the render worker instead of during synchronization,
+#      which requires a render worker to be running.
+RENDER_DEFERRED = False
+
+# The number of processes used to extract metadata from downloaded files, 0
+#      extracts it inline and None uses one process per CPU.
+METADATA_PROCESSES = None
+
+# How long, in seconds, to wait for the metadata of a single file
+METADATA_TIMEOUT = 60
+
+# Where to write the metrics of synchronizing with PyPI in the Prometheus text
+#      format after every synchronization, None disables writing them.
+SYNC_METRICS_FILE = None
+
+# Send the metrics of synchronizing with PyPI to statsd on this host, None
+#      disables sending them.
+STATSD_HOST = None
+STATSD_PORT = 8125
+STATSD_PREFIX = "warehouse.sync"
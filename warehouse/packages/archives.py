@@ -0,0 +1,250 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import email.parser
+import fnmatch
+import os
+import re
+import tarfile
+import zipfile
+import zlib
+
+import pkg_resources
+
+
+REQUIRES_PATTERN = "*.egg-info/requires.txt"
+METADATA_PATTERN = "*.dist-info/METADATA"
+
+# Matches both the PEP 345 "name (>=1.0)" and the PEP 508 "name>=1.0" forms
+#   of a Requires-Dist once the environment marker has been split off.
+_requires_dist_regex = re.compile(
+    r"^\s*(?P<name>[A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?"
+    r"\s*\(?(?P<versions>[^()]*)\)?\s*$"
+)
+
+
+def compression(filename):
+    """
+    Returns the compression used by the archive ``filename``, or None if it
+    is a type of file that we do not look inside of.
+    """
+    # Determine the type of compression to use
+    kind = os.path.splitext(filename)[1][1:]
+
+    # Normalize tgz to just gz
+    if kind == "tgz":
+        kind = "gz"
+
+    # Wheels are zip files
+    if kind == "whl":
+        kind = "zip"
+
+    # short circuit on some invalid sdist types that PyPI somehow has
+    if kind in set(["rpm", "egg", "deb"]):
+        return
+
+    if kind not in set(["gz", "bz2", "zip"]):
+        raise ValueError(
+                "Invalid compression type %s for %s" % (kind, filename)
+            )
+
+    return kind
+
+
+def _depth(name):
+    return len(name.split("/"))
+
+
+def _normalize(name):
+    # Some archives prefix every member with ./
+    while name.startswith("./"):
+        name = name[2:]
+    return name
+
+
+def _tar_member(filename, fileobj, mode, pattern):
+    """
+    Streams through the members of a tar archive and returns the contents of
+    the member matching ``pattern`` that is closest to the root.
+
+    Members are read in order and never seeked back to, so the archive is
+    only decompressed up to the point where we know no better match can
+    follow. A match directly at the root can never be beaten, and for the
+    typical sdist layout where everything lives in a single top level
+    directory, a match one directory down is taken as soon as it is seen.
+    """
+    try:
+        tar = tarfile.open(filename, mode=mode, fileobj=fileobj)
+    except (tarfile.TarError, IOError, EOFError, zlib.error):
+        # Invalid archive
+        return
+
+    best, best_depth = None, None
+    root = None
+
+    try:
+        for member in tar:
+            name = _normalize(member.name)
+            top = name.split("/", 1)[0]
+
+            if root is None:
+                root = top
+            elif root != top:
+                # Not everything is in one top level directory
+                root = False
+
+            if not member.isfile() or not fnmatch.fnmatch(name, pattern):
+                continue
+
+            depth = _depth(name)
+
+            if best_depth is None or depth < best_depth:
+                best, best_depth = tar.extractfile(member).read(), depth
+
+            # Short circuit if nothing later in the archive can be closer to
+            #   the root than what we already have
+            if best_depth <= 2 or (best_depth <= 3 and root):
+                break
+    except (tarfile.TarError, IOError, EOFError, zlib.error):
+        return
+
+    return best
+
+
+def _zip_member(fileobj, pattern):
+    """
+    Returns the contents of the member matching ``pattern`` that is closest
+    to the root of a zip archive. Only the central directory and the matching
+    member are ever read.
+    """
+    try:
+        zipf = zipfile.ZipFile(fileobj)
+    except (zipfile.BadZipfile, IOError):
+        # invalid archive
+        return
+
+    files = fnmatch.filter(zipf.namelist(), pattern)
+
+    if not files:
+        return
+
+    # Figure out which file is closest to the root
+    files.sort(key=_depth)
+
+    try:
+        return zipf.read(files[0])
+    except (zipfile.BadZipfile, IOError, zlib.error):
+        return
+
+
+def member(filename, fileobj, pattern):
+    """
+    Returns the contents of the file matching ``pattern`` that is closest to
+    the root of the archive ``filename``, read from ``fileobj``.
+    """
+    kind = compression(filename)
+
+    if kind is None:
+        return
+    elif kind == "zip":
+        return _zip_member(fileobj, pattern)
+    else:
+        return _tar_member(filename, fileobj, "r|%s" % kind, pattern)
+
+
+def parse_requires(requires):
+    """
+    Parses the contents of a setuptools requires.txt into a list of
+    dictionaries describing each requirement.
+    """
+    parsed = []
+
+    for section, reqs in pkg_resources.split_sections(requires.splitlines()):
+        for req in pkg_resources.parse_requirements(reqs):
+            requirement = {"name": req.project_name}
+
+            # If we have any version modifiers, add them
+            if req.specs:
+                requirement["versions"] = ["".join(x) for x in req.specs]
+
+            # If we have any section add is as an extras
+            if section is not None:
+                requirement["environment"] = "extra = '%s'" % section
+
+            parsed.append(requirement)
+
+    return parsed
+
+
+def setuptools_requires(filename, fileobj):
+    """
+    Returns the requirements listed in the setuptools requires.txt of the
+    sdist ``filename``, or None if it does not have one.
+    """
+    requires = member(filename, fileobj, REQUIRES_PATTERN)
+
+    if requires is None:
+        return
+
+    return parse_requires(requires.decode("utf-8", "replace"))
+
+
+def parse_requires_dist(requires):
+    """
+    Parses a single Requires-Dist value into a dictionary describing the
+    requirement, in the same form as :func:`parse_requires` returns.
+    """
+    if ";" in requires:
+        predicate, environment = [x.strip() for x in requires.split(";", 1)]
+    else:
+        predicate, environment = requires, None
+
+    if "@" in predicate:
+        # A direct reference to a URL, there are no versions to speak of
+        predicate = predicate.split("@", 1)[0]
+
+    match = _requires_dist_regex.match(predicate)
+
+    if match is None:
+        raise ValueError("Invalid Requires-Dist '%s'" % requires)
+
+    requirement = {"name": match.group("name")}
+
+    versions = [
+        "".join(x.split()) for x in match.group("versions").split(",")
+        if x.strip()
+    ]
+
+    if versions:
+        requirement["versions"] = versions
+
+    if environment:
+        requirement["environment"] = environment
+
+    return requirement
+
+
+def parse_metadata(metadata):
+    """
+    Parses the Requires-Dist headers out of the contents of a wheel's
+    METADATA file.
+    """
+    headers = email.parser.Parser().parsestr(metadata, headersonly=True)
+    return [
+        parse_requires_dist(x) for x in headers.get_all("Requires-Dist", [])
+    ]
+
+
+def wheel_requires(filename, fileobj):
+    """
+    Returns the requirements listed in the METADATA of the wheel
+    ``filename``, or None if it does not have one. Only the central
+    directory of the wheel and the METADATA member itself are read.
+    """
+    metadata = member(filename, fileobj, METADATA_PATTERN)
+
+    if metadata is None:
+        return
+
+    return parse_metadata(metadata.decode("utf-8", "replace"))
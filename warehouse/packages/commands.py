@@ -0,0 +1,277 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import datetime
+import logging
+
+from flask.ext.script import Command, Option  # pylint: disable=E0611,F0401
+from progress.bar import ShadyBar
+
+from warehouse import db, script
+from warehouse.packages import garbage, rehash, resolver, verify
+from warehouse.packages.archives import parse_requires_dist
+from warehouse.packages.models import INDEXED_HASHES, Dependent, File, Project
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def rebuild_dependents(progress=True):
+    projects = Project.query.filter_by(yanked=False).all()
+
+    if progress:
+        projects = ShadyBar("Rebuilding Dependents",
+                        max=len(projects),
+                    ).iter(projects)
+
+    changed = 0
+
+    for project in projects:
+        if Dependent.refresh(project):
+            changed += 1
+
+        db.session.commit()
+
+    return changed
+
+
+class Dependents(Command):
+    """
+    Lists the projects whose latest version depends on a project.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("projects", nargs="*", help="projects to list dependents of"),
+        Option("--rebuild",
+            action="store_true",
+            dest="rebuild",
+            default=False,
+            help="rebuild the dependents of every project before listing",
+        ),
+        Option("--no-progress",
+            action="store_false",
+            dest="progress",
+            help="do not display a progress bar",
+        ),
+    ]
+
+    def run(self, projects=None, rebuild=False, progress=True):
+        # This is a hack to normalize the incoming projects to unicode
+        projects = [x.decode("utf-8") for x in projects or []]
+
+        if rebuild:
+            changed = rebuild_dependents(progress=progress)
+            logger.info("Rebuilt the dependents of %s projects", changed)
+
+        for project in projects:
+            for name, version in Dependent.of(project):
+                print("{0} {1} {2}".format(project, name, version))
+
+
+class Resolve(Command):
+    """
+    Lists the transitive dependencies of projects.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("requirements",
+            nargs="+",
+            help="projects to resolve, optionally with versions such as "
+                "'requests>=2.0'",
+        ),
+    ]
+
+    def run(self, requirements):
+        roots = []
+
+        for requirement in requirements:
+            parsed = parse_requires_dist(requirement.decode("utf-8"))
+            roots.append((parsed["name"], parsed.get("versions", [])))
+
+        closure, missing = resolver.resolve(roots)
+
+        for found in closure.values():
+            print("{0} {1}".format(found.name, found.version))
+
+        for name, specifiers in missing:
+            logger.warning("Could not satisfy %s %s",
+                name,
+                ",".join(specifiers),
+            )
+
+
+class Verify(Command):
+    """
+    Verifies the stored files against their recorded sizes and hashes.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("--processes",
+            type=int,
+            dest="processes",
+            default=None,
+            help="number of processes to hash files in, defaults to one per "
+                "CPU and 0 hashes them inline",
+        ),
+        Option("--rate",
+            type=float,
+            dest="rate",
+            default=None,
+            help="read no more than RATE MB of files per second",
+        ),
+        Option("--resume",
+            action="store_true",
+            dest="resume",
+            default=False,
+            help="continue from where the last verification stopped",
+        ),
+    ]
+
+    def run(self, processes=None, rate=None, resume=False):
+        failed, counts = verify.verify(
+                            processes=processes,
+                            rate=rate,
+                            resume=resume,
+                        )
+
+        for result in failed:
+            print("{0} {1}".format(result.status, result.filename))
+
+        logger.info(
+            "Verified %s files; %s missing, %s corrupt and %s mismatched, "
+            "%s yanked files already collected",
+            sum(counts.values()),
+            counts[verify.MISSING],
+            counts[verify.CORRUPT],
+            counts[verify.MISMATCHED],
+            counts[verify.COLLECTED],
+        )
+
+
+class CollectGarbage(Command):
+    """
+    Deletes stored files that are no longer needed by any file.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("--dry-run",
+            action="store_true",
+            dest="dry_run",
+            default=False,
+            help="only report what would be deleted",
+        ),
+        Option("--grace",
+            type=float,
+            dest="grace",
+            default=garbage.GC_GRACE_PERIOD.total_seconds() / 3600,
+            help="leave alone anything changed in the last GRACE hours",
+        ),
+        Option("--threads",
+            type=int,
+            dest="threads",
+            default=4,
+            help="number of threads deleting files",
+        ),
+    ]
+
+    def run(self, dry_run=False, grace=24, threads=4):
+        def report(status, name):
+            print("{0} {1}".format(status, name))
+
+        counts = garbage.collect(
+                    grace=datetime.timedelta(hours=grace),
+                    dry_run=dry_run,
+                    threads=threads,
+                    report=report,
+                )
+
+        logger.info(
+            "Found %s orphaned files using %s bytes, deleted %s of them "
+                "freeing %s bytes; %s files are missing",
+            counts["orphaned"],
+            counts["orphaned bytes"],
+            counts["deleted"],
+            counts["deleted bytes"],
+            counts["missing"],
+        )
+
+
+class Rehash(Command):
+    """
+    Computes the hashes that files are missing from their stored contents,
+    and regenerates the hashed URIs that are not for FILE_URI_HASH.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("--algorithm",
+            action="append",
+            dest="algorithms",
+            default=[],
+            help="a hash that every file should have, may be given more than "
+                "once and defaults to FILE_URI_HASH",
+        ),
+        Option("--processes",
+            type=int,
+            dest="processes",
+            default=None,
+            help="number of processes to hash files in, defaults to one per "
+                "CPU and 0 hashes them inline",
+        ),
+    ]
+
+    def run(self, algorithms=None, processes=None):
+        counts = rehash.backfill(
+                    algorithms=[x.decode("utf-8") for x in algorithms or []],
+                    processes=processes,
+                )
+
+        logger.info(
+            "Rehashed %s files and regenerated the URIs of %s, %s could not "
+                "be read",
+            counts["rehashed"],
+            counts["regenerated"],
+            counts["unreadable"],
+        )
+
+
+class ByHash(Command):
+    """
+    Lists the files with a given hash.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("algorithm", choices=INDEXED_HASHES, help="the type of hash"),
+        Option("digest", help="the hex digest to look for"),
+    ]
+
+    def run(self, algorithm, digest):
+        found = File.by_hash(algorithm.decode("utf-8"), digest.decode("utf-8"))
+
+        for project, version, filename, yanked in found:
+            print("{0} {1} {2}{3}".format(
+                project,
+                version,
+                filename,
+                " (yanked)" if yanked else "",
+            ))
+
+script.add_command("dependents", Dependents())
+script.add_command("resolve", Resolve())
+script.add_command("verify", Verify())
+script.add_command("gc", CollectGarbage())
+script.add_command("rehash", Rehash())
+script.add_command("by-hash", ByHash())
@@ -0,0 +1,139 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import re
+
+
+# The minor versions of Python that compatibility is computed for, versions
+#   added here only show up on a version once it has been synchronized again.
+PYTHON_VERSIONS = (
+    ["2.%s" % x for x in range(0, 8)] + ["3.%s" % x for x in range(0, 14)]
+)
+
+_classifier_regex = re.compile(
+    r"^Programming Language :: Python :: (?P<major>\d+)(?:\.(?P<minor>\d+))?$"
+)
+_specifier_regex = re.compile(
+    r"^\s*(?P<op>~=|===|==|!=|<=|>=|<|>)?\s*"
+    r"(?P<version>\d+(?:\.\d+)*)(?P<wildcard>\.\*)?\s*$"
+)
+
+
+def _pad(version, length=3):
+    return tuple(version) + (0,) * (length - len(version))
+
+
+def _matches(minor, op, version, wildcard):
+    # A minor version is compatible with a specifier when any of its patch
+    #   releases are, so compare against the first and the last of them
+    first, last = minor + (0,), minor + (float("inf"),)
+
+    if wildcard or op is None:
+        prefix = version[:2]
+        matched = minor[:len(prefix)] == prefix
+        return not matched if op == "!=" else matched
+    elif op == ">=" or op == ">":
+        return last > _pad(version)
+    elif op == "<=":
+        return first <= _pad(version)
+    elif op == "<":
+        return first < _pad(version)
+    elif op in ["==", "==="]:
+        return minor == _pad(version, 2)[:2]
+    elif op == "~=":
+        prefix = version[:-1]
+        return (last > _pad(version) and
+                    _pad(minor, len(prefix))[:len(prefix)] == prefix)
+    else:
+        # A != without a wildcard only excludes a single patch release
+        return True
+
+
+def from_requires_python(requires_python, candidates=PYTHON_VERSIONS):
+    """
+    Returns the versions out of ``candidates`` that satisfy the free text
+    ``requires_python``, or None if it is empty or cannot be understood.
+    """
+    specifiers = []
+
+    for specifier in (requires_python or "").split(","):
+        if not specifier.strip():
+            continue
+
+        match = _specifier_regex.match(specifier)
+
+        if match is None:
+            return
+
+        specifiers.append((
+            match.group("op"),
+            tuple(int(x) for x in match.group("version").split(".")),
+            bool(match.group("wildcard")),
+        ))
+
+    if not specifiers:
+        return
+
+    compatible = []
+
+    for candidate in candidates:
+        minor = tuple(int(x) for x in candidate.split("."))
+
+        if all(_matches(minor, *spec) for spec in specifiers):
+            compatible.append(candidate)
+
+    return compatible
+
+
+def from_classifiers(classifiers, candidates=PYTHON_VERSIONS):
+    """
+    Returns the versions out of ``candidates`` declared by the Python
+    version ``classifiers``, or None if there are not any.
+
+    A classifier for just a major version covers all of its minor versions
+    unless a minor version of it is listed as well.
+    """
+    majors, minors = set(), set()
+
+    for classifier in classifiers:
+        match = _classifier_regex.match(classifier)
+
+        if match is None:
+            continue
+
+        if match.group("minor") is None:
+            majors.add(match.group("major"))
+        else:
+            minors.add("%s.%s" % (match.group("major"), match.group("minor")))
+
+    # Major versions that have minor versions listed are covered by those
+    majors -= set(x.split(".")[0] for x in minors)
+
+    if not majors and not minors:
+        return
+
+    return [
+        x for x in candidates if x in minors or x.split(".")[0] in majors
+    ]
+
+
+def python_versions(requires_python, classifiers):
+    """
+    Returns the sorted minor versions of Python that a release is compatible
+    with, going by the classifiers it declares and narrowed down by its
+    ``requires_python``. An empty list means we do not know.
+    """
+    candidates = from_classifiers(classifiers)
+
+    if candidates is None:
+        candidates = PYTHON_VERSIONS
+
+    compatible = from_requires_python(requires_python, candidates=candidates)
+
+    if compatible is None:
+        # Without a usable requires_python only the classifiers tell us
+        #   anything
+        compatible = candidates if candidates is not PYTHON_VERSIONS else []
+
+    return list(compatible)
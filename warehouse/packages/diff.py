@@ -2,13 +2,26 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import unicode_literals
 
+from warehouse import db
 from warehouse.packages.models import Project, Version, File
 
 
 def projects(current):
-    to_yank = Project.query.filter(~Project.name.in_(current))
+    """
+    Yanks every project that is not in ``current`` and returns their names.
+    """
+    to_yank = Project.query.filter(
+                                ~Project.name.in_(current),
+                                db.not_(Project.yanked),
+                            )
+
+    yanked = [name for name, in to_yank.with_entities(Project.name)]
+
+    # Actually preform the yank
     to_yank.update({"yanked": True}, synchronize_session=False)
 
+    return yanked
+
 
 def versions(project, current):
     # Use different logic if there are any current versions to provide
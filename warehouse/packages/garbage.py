@@ -0,0 +1,269 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import collections
+import datetime
+import logging
+import os
+import Queue
+import threading
+import time
+
+from multiprocessing.pool import ThreadPool
+
+from warehouse import db
+from warehouse.packages.models import Blob, File
+from warehouse.simple.models import SimpleLink, SimpleLinkType
+from warehouse.utils import get_storage
+
+
+# How many stored names are read from the database at a time
+GC_CHUNK_SIZE = 5000
+
+# How many orphans are released in the database before deleting them
+GC_BATCH_SIZE = 500
+
+# How many stored files can be walked ahead of the database
+GC_PREFETCH = 10000
+
+# Anything changed more recently than this is left alone, so that files
+#   being stored or yanked right now are not mistaken for orphans
+GC_GRACE_PERIOD = datetime.timedelta(days=1)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+Stored = collections.namedtuple("Stored", ["name", "modified", "size"])
+
+
+def stored(location, prefix=""):
+    """
+    Yields every file under ``location`` as a :class:`Stored`, in the byte
+    order of their names. A directory is ordered as if its name ended with
+    a slash, which is what makes visiting it depth first match that order.
+    """
+    directory = os.path.join(location, prefix)
+    entries = []
+
+    for entry in os.listdir(directory):
+        isdir = os.path.isdir(os.path.join(directory, entry))
+        entries.append((entry + "/" if isdir else entry, isdir))
+
+    for entry, isdir in sorted(entries):
+        if isdir:
+            for found in stored(location, prefix + entry):
+                yield found
+        else:
+            stat = os.stat(os.path.join(directory, entry))
+            yield Stored(prefix + entry, stat.st_mtime, stat.st_size)
+
+
+def referenced(grace=GC_GRACE_PERIOD, size=GC_CHUNK_SIZE):
+    """
+    Yields every name that files are stored under, in the byte order of the
+    names, along with whether it must be kept. A name can go once every file
+    stored under it has been yanked for longer than ``grace``.
+    """
+    name = File.file.collate('"C"')
+    keep = db.func.bool_or(db.or_(
+                db.not_(File.yanked),
+                File.modified > db.func.now() - grace,
+            ))
+
+    after = None
+
+    while True:
+        query = db.session.query(File.file, keep).filter(
+                    File.file != "",
+                ).group_by(File.file)
+
+        if after is not None:
+            query = query.filter(name > after)
+
+        chunk = query.order_by(name).limit(size).all()
+
+        if not chunk:
+            return
+
+        for row in chunk:
+            yield tuple(row)
+
+        after = chunk[-1][0]
+
+
+def prefetch(iterable, size=GC_PREFETCH):
+    """
+    Consumes ``iterable`` in a background thread, keeping at most ``size``
+    items ahead of whatever is reading from it.
+    """
+    queue = Queue.Queue(maxsize=size)
+    done = object()
+
+    def produce():
+        try:
+            for item in iterable:
+                queue.put((item, None))
+        except Exception as exc:  # pylint: disable=W0703
+            queue.put((done, exc))
+        else:
+            queue.put((done, None))
+
+    thread = threading.Thread(target=produce)
+    thread.daemon = True
+    thread.start()
+
+    while True:
+        item, exc = queue.get()
+
+        if exc is not None:
+            raise exc
+
+        if item is done:
+            return
+
+        yield item
+
+
+def merge(files, names):
+    """
+    Merge joins the :class:`Stored` ``files`` with the (name, keep) pairs of
+    ``names``, both sorted by name, yielding (name, stored, keep) where
+    either side is None when the name is missing from it.
+    """
+    files, names = iter(files), iter(names)
+    found, row = next(files, None), next(names, None)
+
+    while found is not None or row is not None:
+        if row is None or (found is not None and found.name < row[0]):
+            yield found.name, found, None
+            found = next(files, None)
+        elif found is None or row[0] < found.name:
+            yield row[0], None, row[1]
+            row = next(names, None)
+        else:
+            yield found.name, found, row[1]
+            found, row = next(files, None), next(names, None)
+
+
+def release(name):
+    """
+    Removes what the database knows about the stored ``name`` so that it can
+    be deleted, returning False if something needs it after all. The yanked
+    files stored under it are left without contents, and their links are
+    taken off of the simple pages.
+    """
+    live = db.session.query(db.exists().where(db.and_(
+                File.file == name,
+                db.not_(File.yanked),
+            ))).scalar()
+
+    if live:
+        return False
+
+    collected = db.session.query(File.filename).filter(
+                    File.file == name,
+                    File.yanked,
+                ).subquery()
+
+    # The simple pages still link to yanked files, which would point at
+    #   nothing once the name is deleted
+    SimpleLink.query.filter(
+        SimpleLink.type == SimpleLinkType.file,
+        SimpleLink.label.in_(collected),
+    ).delete(synchronize_session=False)
+
+    # Only yanked files can still point to the name, and they do not need
+    #   their contents any longer
+    File.query.filter(
+        File.file == name,
+        File.yanked,
+    ).update(
+        {"blob_id": None, "file": "", "uri": "", "hashed_uri": ""},
+        synchronize_session=False,
+    )
+
+    Blob.query.filter(
+        Blob.file == name,
+        Blob.refcount == 0,
+    ).delete(synchronize_session=False)
+
+    return not db.session.query(
+                db.exists().where(Blob.file == name),
+            ).scalar()
+
+
+def collect(grace=GC_GRACE_PERIOD, dry_run=False, threads=4, report=None,
+        storage=None):
+    """
+    Walks the storage and the files table together and deletes every stored
+    file that nothing needs, once it is older than ``grace``. Every orphaned
+    and missing name is passed to ``report`` along with its status, and a
+    count of what was found is returned.
+
+    With ``dry_run`` nothing is deleted, the orphans are only reported.
+    """
+    if storage is None:
+        storage = get_storage()
+
+    if not hasattr(storage, "location"):
+        raise ValueError("Only files on a filesystem can be collected")
+
+    cutoff = time.time() - grace.total_seconds()
+
+    if report is None:
+        report = lambda status, name: None
+
+    counts = collections.Counter()
+    batch = []
+
+    pool = ThreadPool(threads) if not dry_run else None
+
+    def flush():
+        deletable = [x for x in batch if release(x.name)]
+        db.session.commit()
+
+        # The database no longer points at these, so they can go in any order
+        pool.map(storage.delete, [x.name for x in deletable])
+
+        counts["deleted"] += len(deletable)
+        counts["deleted bytes"] += sum(x.size for x in deletable)
+
+        del batch[:]
+
+    try:
+        joined = merge(
+                    prefetch(stored(storage.location)),
+                    referenced(grace=grace),
+                )
+
+        for name, found, keep in joined:
+            if found is None:
+                # Only worth reporting if something still wants it
+                if keep:
+                    counts["missing"] += 1
+                    report("missing", name)
+            elif keep:
+                counts["live"] += 1
+            elif found.modified > cutoff:
+                counts["recent"] += 1
+            else:
+                counts["orphaned"] += 1
+                counts["orphaned bytes"] += found.size
+                report("orphaned", name)
+
+                if not dry_run:
+                    batch.append(found)
+
+                    if len(batch) >= GC_BATCH_SIZE:
+                        flush()
+
+        if batch:
+            flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    return counts
@@ -0,0 +1,128 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import logging
+import multiprocessing
+
+from warehouse.packages import archives
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def extract(filename, path):
+    """
+    Extracts the metadata we know how to find from the distribution file
+    ``filename`` stored at ``path``. This only returns plain data so that it
+    can be ran in another process.
+    """
+    with open(path, "rb") as fp:
+        return read(filename, fp)
+
+
+def read(filename, fileobj):
+    """
+    Extracts the metadata we know how to find from the distribution file
+    ``filename`` read from ``fileobj``.
+    """
+    metadata = {}
+
+    if archives.compression(filename) is None:
+        # Not something we know how to look inside of
+        return metadata
+
+    if filename.endswith(".whl"):
+        metadata["requires_dist"] = archives.wheel_requires(filename, fileobj)
+    else:
+        metadata["requires"] = archives.setuptools_requires(filename, fileobj)
+
+    return metadata
+
+
+class _Done(object):
+
+    def __init__(self, value):
+        self.value = value
+
+    def get(self, timeout=None):  # pylint: disable=W0613
+        return self.value
+
+
+class MetadataExtractor(object):
+    """
+    Extracts metadata from distribution files using a pool of processes so
+    that parsing archives does not hold up synchronization. With no
+    processes the metadata is extracted inline instead.
+
+    A file that crashes or hangs a worker only loses its own metadata, the
+    pool is thrown away and a fresh one is started for the files after it.
+    """
+
+    def __init__(self, processes=None, timeout=60):
+        self.processes = processes
+        self.timeout = timeout
+        self._pool = None
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.processes)
+        return self._pool
+
+    def submit(self, filename, path):
+        """
+        Starts extracting the metadata from ``filename`` stored at ``path``
+        and returns a handle to pass to :meth:`result`. The file must remain
+        at ``path`` until then.
+        """
+        if self.processes == 0:
+            try:
+                return _Done(extract(filename, path))
+            except Exception:  # pylint: disable=W0703
+                logger.exception("Could not extract metadata from '%s'",
+                    filename,
+                )
+                return _Done(None)
+
+        pool = self.pool
+        return filename, pool, pool.apply_async(extract, (filename, path))
+
+    def result(self, handle):
+        """
+        Returns the metadata for ``handle``, or None if it could not be
+        extracted.
+        """
+        if isinstance(handle, _Done):
+            return handle.value
+
+        filename, pool, result = handle
+
+        if pool is not self._pool and not result.ready():
+            # The pool this was running in has been terminated
+            logger.error("Lost the metadata of '%s'", filename)
+            return
+
+        try:
+            return result.get(self.timeout)
+        except multiprocessing.TimeoutError:
+            logger.error(
+                "Timed out extracting metadata from '%s', restarting the "
+                    "metadata workers",
+                filename,
+            )
+            self.terminate()
+        except Exception:  # pylint: disable=W0703
+            logger.exception("Could not extract metadata from '%s'", filename)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def terminate(self):
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool = None
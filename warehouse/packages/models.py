@@ -20,13 +20,17 @@ from sqlalchemy.sql.expression import text
 from warehouse import db
 from warehouse.database.mixins import UUIDPrimaryKeyMixin, TimeStampedMixin
 from warehouse.database.schema import TableDDL
-from warehouse.database.types import Enum
+from warehouse.database.types import Enum, TSVector
 from warehouse.database.utils import table_args
+from warehouse.packages.wheels import normalize_tag
 from warehouse.utils import get_storage
 
 
 _normalize_regex = re.compile(r"[^A-Za-z0-9.]+")
 
+# The hashes that files have an index on, and so can be looked up by
+INDEXED_HASHES = ["md5", "sha256"]
+
 
 classifiers = db.Table("version_classifiers",  # pylint: disable=C0103
     db.Column("classifier_id",
@@ -54,6 +58,13 @@ class Classifier(UUIDPrimaryKeyMixin, db.Model):
 
     trove = db.Column(db.UnicodeText, unique=True, nullable=False)
 
+    # How many projects have this classifier on their latest version, kept
+    #   up to date by the database as project_classifiers changes
+    project_count = db.Column(db.Integer,
+                        nullable=False,
+                        server_default=text("0")
+                    )
+
     def __init__(self, trove):
         self.trove = trove
 
@@ -150,6 +161,55 @@ class Version(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
     __tablename__ = "versions"
     __table_args__ = declared_attr(table_args((
         db.Index("idx_project_version", "project_id", "version", unique=True),
+        db.Index("version_python_versions_idx", "python_versions",
+            postgresql_using="gin",
+        ),
+        db.Index("version_search_idx", "search_vector",
+            postgresql_using="gin",
+            postgresql_where=text("latest"),
+        ),
+        TableDDL("""
+            CREATE OR REPLACE FUNCTION update_versions_search_vector()
+            RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector =
+                    setweight(to_tsvector('english', coalesce(
+                        (SELECT name FROM projects WHERE id = NEW.project_id),
+                        ''
+                    )), 'A') ||
+                    setweight(to_tsvector('english', NEW.summary), 'B') ||
+                    setweight(to_tsvector('english',
+                        array_to_string(NEW.keywords, ' ')), 'B') ||
+                    setweight(to_tsvector('english',
+                        left(NEW.description, 100000)), 'C');
+                RETURN NEW;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER %(table)s_search_vector
+            BEFORE INSERT
+                OR UPDATE OF project_id, summary, keywords, description
+            ON %(table)s
+            FOR EACH ROW
+            EXECUTE PROCEDURE update_versions_search_vector();
+
+            CREATE OR REPLACE FUNCTION update_versions_search_vector_name()
+            RETURNS trigger AS $$
+            BEGIN
+                UPDATE versions SET summary = summary
+                WHERE project_id = NEW.id;
+
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER projects_rename_search_vector
+            AFTER UPDATE OF name
+            ON projects
+            FOR EACH ROW
+            WHEN (NEW.name <> OLD.name)
+            EXECUTE PROCEDURE update_versions_search_vector_name();
+        """),
         TableDDL("""
             CREATE OR REPLACE RULE yank_versions_from_projects
                 AS ON UPDATE TO projects
@@ -206,11 +266,32 @@ class Version(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
     summary = db.Column(db.UnicodeText, nullable=False, server_default="")
     description = db.Column(db.UnicodeText, nullable=False, server_default="")
 
+    # The hash of the description that links were last extracted from
+    description_digest = db.Column(db.UnicodeText,
+                                nullable=False,
+                                server_default=""
+                            )
+
     keywords = db.Column(pg.ARRAY(db.UnicodeText, dimensions=1),
                     nullable=False,
                     server_default="{}"
                 )
 
+    # The name, summary, keywords and description as a full text search
+    #   document, kept up to date by the database. Only searches need it, so
+    #   it is not loaded along with the rest of a version.
+    search_vector = db.deferred(db.Column(TSVector,
+                        server_default=FetchedValue(),
+                        server_onupdate=FetchedValue(),
+                    ))
+
+    # Whether this is the version of its project that searches find, set by
+    #   refresh_latest
+    latest = db.Column(db.Boolean,
+                nullable=False,
+                server_default=text("FALSE")
+            )
+
     author = db.Column(db.UnicodeText, nullable=False, server_default="")
     author_email = db.Column(db.UnicodeText, nullable=False, server_default="")
 
@@ -238,6 +319,13 @@ class Version(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
                             nullable=False,
                             server_default="{}"
                         )
+
+    # The minor versions of Python this version is compatible with, computed
+    #   from requires_python and the classifiers when it is synchronized
+    python_versions = db.Column(pg.ARRAY(db.UnicodeText, dimensions=1),
+                            nullable=False,
+                            server_default="{}"
+                        )
     requirements = relationship("Requirement",
                 cascade="all,delete,delete-orphan",
                 backref="version",
@@ -283,10 +371,173 @@ class Version(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
         ctx = {"name": self.project.name, "version": self.version}
         return "<Version: {name} {version}>".format(**ctx)
 
+    @classmethod
+    def newest(cls, project):
+        """
+        Returns the most recently released version of ``project`` that has
+        not been yanked, or None.
+        """
+        return cls.query.filter_by(project=project, yanked=False).order_by(
+                    cls.created.desc(),
+                ).first()
+
+    @classmethod
+    def refresh_latest(cls, project):
+        """
+        Marks the newest version of ``project`` as its latest one, only the
+        rows that change are updated.
+        """
+        newest = cls.newest(project)
+        newest_id = newest.id if newest is not None else None
+
+        cls.query.filter(
+            cls.project_id == project.id,
+            cls.latest,
+            cls.id != newest_id,
+        ).update({"latest": False}, synchronize_session=False)
+
+        if newest is not None and not newest.latest:
+            cls.query.filter(cls.id == newest_id).update(
+                                                    {"latest": True},
+                                                    synchronize_session=False,
+                                                )
+
+        return newest
+
+    @classmethod
+    def supporting(cls, *python_versions):
+        """
+        Returns a query for the versions known to be compatible with all of
+        the given minor versions of Python, such as ``"3.3"``.
+        """
+        return cls.query.filter(cls.python_versions.contains(
+                                                    list(python_versions)))
+
+
+class ProjectClassifier(db.Model):
+    """
+    The classifiers of the latest version of every project, kept up to date
+    by :meth:`refresh` whenever a project is synchronized.
+    """
+
+    __tablename__ = "project_classifiers"
+    __table_args__ = declared_attr(table_args((
+        db.Index("project_classifiers_normalized_idx",
+            "classifier_id", "normalized",
+        ),
+        TableDDL("""
+            CREATE OR REPLACE FUNCTION update_classifiers_project_count()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP = 'INSERT' THEN
+                    UPDATE classifiers
+                    SET project_count = project_count + 1
+                    WHERE id = NEW.classifier_id;
+                ELSIF TG_OP = 'DELETE' THEN
+                    UPDATE classifiers
+                    SET project_count = project_count - 1
+                    WHERE id = OLD.classifier_id;
+                END IF;
+
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER %(table)s_project_count
+            AFTER INSERT OR DELETE
+            ON %(table)s
+            FOR EACH ROW
+            EXECUTE PROCEDURE update_classifiers_project_count();
+        """),
+        TableDDL("""
+            CREATE OR REPLACE RULE forget_classifiers_of_projects
+                AS ON UPDATE TO projects
+                WHERE NEW.yanked = TRUE
+                DO ALSO
+                    DELETE FROM project_classifiers WHERE project_id = NEW.id;
+        """),
+    )))
+
+    classifier_id = db.Column(pg.UUID(as_uuid=True),
+                        db.ForeignKey("classifiers.id", ondelete="CASCADE"),
+                        primary_key=True,
+                    )
+    project_id = db.Column(pg.UUID(as_uuid=True),
+                    db.ForeignKey("projects.id", ondelete="CASCADE"),
+                    primary_key=True,
+                )
+
+    # The normalized name of the project, so pages of a classifier can be
+    #   read in order straight from the index
+    normalized = db.Column(db.UnicodeText, nullable=False)
+
+    @classmethod
+    def refresh(cls, project):
+        """
+        Makes the rows for ``project`` match the classifiers of its latest
+        version, only inserting and deleting the rows that changed so the
+        counts on the classifiers are adjusted rather than recomputed.
+        """
+        db.session.flush()
+
+        newest = Version.newest(project)
+
+        if newest is not None:
+            wanted = set(x for x, in db.session.query(
+                            classifiers.c.classifier_id,
+                        ).filter(classifiers.c.version_id == newest.id))
+        else:
+            wanted = set()
+
+        current = dict(db.session.query(cls.classifier_id, cls.normalized)
+                                    .filter(cls.project_id == project.id))
+
+        removed = set(current) - wanted
+        added = wanted - set(current)
+        renamed = [x for x, y in current.items()
+                        if x in wanted and y != project.normalized]
+
+        if removed:
+            cls.query.filter(
+                cls.project_id == project.id,
+                cls.classifier_id.in_(removed),
+            ).delete(synchronize_session=False)
+
+        if renamed:
+            cls.query.filter(
+                cls.project_id == project.id,
+                cls.classifier_id.in_(renamed),
+            ).update(
+                {"normalized": project.normalized},
+                synchronize_session=False,
+            )
+
+        if added:
+            db.session.execute(cls.__table__.insert(), [
+                {
+                    "classifier_id": classifier_id,
+                    "project_id": project.id,
+                    "normalized": project.normalized,
+                }
+                for classifier_id in added
+            ])
+
+        return bool(removed or renamed or added)
+
 
 class Requirement(UUIDPrimaryKeyMixin, db.Model):
 
     __tablename__ = "requires"
+    __table_args__ = declared_attr(table_args((
+        TableDDL("""
+            CREATE TRIGGER %(table)s_normalize_name
+            BEFORE INSERT OR UPDATE
+            ON %(table)s
+            FOR EACH ROW
+            EXECUTE PROCEDURE normalize_name();
+        """),
+        db.Index("requires_normalized_idx", "normalized"),
+    )))
 
     version_id = db.Column(pg.UUID(as_uuid=True),
                         db.ForeignKey("versions.id", ondelete="CASCADE"),
@@ -294,6 +545,11 @@ class Requirement(UUIDPrimaryKeyMixin, db.Model):
                     )
 
     name = db.Column(db.UnicodeText, nullable=False)
+    normalized = db.Column(db.UnicodeText,
+                    nullable=False,
+                    server_default=FetchedValue(),
+                    server_onupdate=FetchedValue()
+                )
     versions = db.Column(pg.ARRAY(db.UnicodeText, dimensions=1),
                     nullable=False,
                     server_default="{}"
@@ -305,6 +561,92 @@ class Requirement(UUIDPrimaryKeyMixin, db.Model):
                 )
 
 
+class Dependent(UUIDPrimaryKeyMixin, db.Model):
+    """
+    The projects whose latest version depends on the project ``name``, kept
+    up to date by :meth:`refresh` whenever a project is synchronized.
+    """
+
+    __tablename__ = "dependents"
+    __table_args__ = declared_attr(table_args((
+        db.Index("dependents_name_idx", "name"),
+        db.Index("dependents_project_name_idx", "project_id", "name",
+            unique=True,
+        ),
+    )))
+
+    # The normalized name of the project that is depended on
+    name = db.Column(db.UnicodeText, nullable=False)
+
+    project_id = db.Column(pg.UUID(as_uuid=True),
+                    db.ForeignKey("projects.id", ondelete="CASCADE"),
+                    nullable=False
+                )
+    version_id = db.Column(pg.UUID(as_uuid=True),
+                    db.ForeignKey("versions.id", ondelete="CASCADE"),
+                    nullable=False
+                )
+
+    @classmethod
+    def refresh(cls, project):
+        """
+        Replaces the dependents rows for ``project`` with the requirements of
+        its latest version. The stored rows are only touched when something
+        actually changed.
+        """
+        # Make sure the requirements have been normalized by the database
+        db.session.flush()
+
+        latest = Version.newest(project)
+
+        if latest is not None:
+            names = set(name for name, in db.session.query(
+                            Requirement.normalized,
+                        ).filter(Requirement.version_id == latest.id))
+        else:
+            names = set()
+
+        current = db.session.query(cls.name, cls.version_id).filter(
+                                                cls.project_id == project.id)
+        current = dict(current)
+
+        if (set(current) == names and
+                all(x == latest.id for x in current.values())):
+            return False
+
+        cls.query.filter_by(project_id=project.id).delete(
+                                                    synchronize_session=False)
+
+        if names:
+            db.session.execute(cls.__table__.insert(), [
+                {
+                    "name": name,
+                    "project_id": project.id,
+                    "version_id": latest.id,
+                }
+                for name in names
+            ])
+
+        return True
+
+    @classmethod
+    def of(cls, name):
+        """
+        Returns a query for the (project name, version) of the latest
+        versions that depend on the project ``name``.
+        """
+        normalized = _normalize_regex.sub("-", name).lower()
+
+        return db.session.query(Project.name, Version.version).join(
+                    cls, cls.project_id == Project.id,
+                ).join(
+                    Version, Version.id == cls.version_id,
+                ).filter(
+                    cls.name == normalized,
+                    db.not_(Version.yanked),
+                ).order_by(Project.normalized)
+
+
 class Provide(UUIDPrimaryKeyMixin, db.Model):
 
     __tablename__ = "provides"
@@ -350,6 +692,37 @@ class FileType(Enum):
     wheel = "bdist_wheel", "Wheel"
 
 
+class Blob(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
+    """
+    The contents of a file stored once under its sha256 digest, shared by
+    every :class:`File` with the same bytes when ``STORAGE_CONTENT_ADDRESSED``
+    is enabled. The database keeps ``refcount`` up to date as files point to
+    and away from it.
+    """
+
+    __tablename__ = "blobs"
+
+    sha256 = db.Column(db.UnicodeText, unique=True, nullable=False)
+
+    # The name the contents were saved under in the storage backend
+    file = db.Column(db.UnicodeText, unique=True, nullable=False)
+    size = db.Column(db.BigInteger, nullable=False)
+
+    # How many files are stored in this blob
+    refcount = db.Column(db.Integer,
+                    nullable=False,
+                    server_default=text("0"),
+                )
+
+    @staticmethod
+    def path(digest):
+        """
+        Returns the name to save the contents with the sha256 ``digest``
+        under, spread over directories so none of them grow too large.
+        """
+        return "/".join(["sha256", digest[:2], digest[2:4], digest])
+
+
 class File(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
 
     __tablename__ = "files"
@@ -393,6 +766,52 @@ class File(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
             WHEN (NEW.created < OLD.created)
             EXECUTE PROCEDURE update_versions_created_from_files();
         """),
+        TableDDL("""
+            CREATE OR REPLACE FUNCTION update_blobs_refcount()
+            RETURNS trigger AS $$
+            BEGIN
+                IF TG_OP <> 'INSERT' THEN
+                    IF OLD.blob_id IS NOT NULL THEN
+                        UPDATE blobs
+                        SET refcount = refcount - 1
+                        WHERE id = OLD.blob_id;
+                    END IF;
+                END IF;
+
+                IF TG_OP <> 'DELETE' THEN
+                    IF NEW.blob_id IS NOT NULL THEN
+                        UPDATE blobs
+                        SET refcount = refcount + 1
+                        WHERE id = NEW.blob_id;
+                    END IF;
+                END IF;
+
+                RETURN NULL;
+            END;
+            $$ LANGUAGE plpgsql;
+
+            CREATE TRIGGER %(table)s_blob_refcount
+            AFTER INSERT OR DELETE
+            ON %(table)s
+            FOR EACH ROW
+            EXECUTE PROCEDURE update_blobs_refcount();
+
+            CREATE TRIGGER %(table)s_update_blob_refcount
+            AFTER UPDATE OF blob_id
+            ON %(table)s
+            FOR EACH ROW
+            WHEN (OLD.blob_id IS DISTINCT FROM NEW.blob_id)
+            EXECUTE PROCEDURE update_blobs_refcount();
+        """),
+        TableDDL("""
+            CREATE INDEX %(table)s_md5_idx
+                ON %(table)s ((hashes -> 'md5'));
+        """),
+        TableDDL("""
+            CREATE INDEX %(table)s_sha256_idx
+                ON %(table)s ((hashes -> 'sha256'));
+        """),
+        db.Index("file_tags_idx", "tags", postgresql_using="gin"),
     )))
 
     yanked = db.Column(db.Boolean,
@@ -405,7 +824,17 @@ class File(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
                         nullable=False
                     )
 
-    file = db.Column(db.UnicodeText, nullable=False, unique=True)
+    # With content addressed storage many files can share the same stored
+    #   contents, and so the same name in the storage backend. Empty once the
+    #   contents of a yanked file have been collected as garbage.
+    file = db.Column(db.UnicodeText, nullable=False, index=True)
+
+    blob_id = db.Column(pg.UUID(as_uuid=True),
+                    db.ForeignKey("blobs.id", ondelete="RESTRICT"),
+                    nullable=True,
+                    index=True,
+                )
+    blob = relationship("Blob")
 
     filename = db.Column(db.UnicodeText, nullable=False, unique=True)
     filesize = db.Column(db.Integer, nullable=False)
@@ -419,27 +848,97 @@ class File(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
 
     comment = db.Column(db.UnicodeText, nullable=False, server_default="")
 
+    # The build tag and the expanded python-abi-platform tags parsed out of
+    #   the filename of a wheel, both are empty for any other type of file
+    build = db.Column(db.UnicodeText, nullable=False, server_default="")
+    tags = db.Column(pg.ARRAY(db.UnicodeText, dimensions=1),
+                nullable=False,
+                server_default="{}",
+            )
+
     hashes = db.Column(MutableDict.as_mutable(pg.HSTORE),
                     nullable=False,
                     server_default=text("''::hstore")
                 )
 
-    @property
-    def uri(self):
-        storage = get_storage()
-        return storage.url(self.file)
+    # The public URIs for this file, computed once when the file is stored.
+    #   Both are empty for files stored before they were, until they are
+    #   synchronized or rehashed again.
+    uri = db.Column(db.UnicodeText, nullable=False, server_default="")
+    hashed_uri = db.Column(db.UnicodeText, nullable=False, server_default="")
 
-    @property
-    def hashed_uri(self):
-        algorithm = flask.current_app.config.get("FILE_URI_HASH")
-        digest = self.hashes.get(algorithm)
+    @classmethod
+    def compatible(cls, tags):
+        """
+        Returns a query for the wheels that are compatible with any of the
+        python-abi-platform ``tags``.
+        """
+        tags = [normalize_tag(x) for x in tags]
+        return cls.query.filter(cls.tags.overlap(tags))
 
-        if algorithm is not None and digest is not None:
-            parsed = urlparse.urlparse(self.uri)
-            fragment = "=".join([algorithm, digest])
-            return urlparse.urlunparse(parsed[:5] + (fragment,))
+    @classmethod
+    def by_hash(cls, algorithm, digest):
+        """
+        Returns a query for the (project name, version, filename, yanked) of
+        the files whose ``algorithm`` hash is ``digest``. Only the hashes in
+        :data:`INDEXED_HASHES` can be looked up.
+        """
+        if algorithm not in INDEXED_HASHES:
+            raise ValueError("Files cannot be looked up by %s" % algorithm)
+
+        return db.session.query(
+                    Project.name,
+                    Version.version,
+                    cls.filename,
+                    cls.yanked,
+                ).select_from(cls).join(
+                    Version, Version.id == cls.version_id,
+                ).join(
+                    Project, Project.id == Version.project_id,
+                ).filter(
+                    cls.hashes[algorithm] == digest.lower(),
+                ).order_by(Project.normalized, cls.filename)
+
+    def generate_uris(self, storage=None):
+        """
+        Computes the public URI of this file, and the same URI with the hash
+        configured by ``FILE_URI_HASH`` as its fragment.
+
+        The URI of a file stored as a :class:`Blob` is built by Flask, which
+        outside of a request needs ``SERVER_NAME`` and uses the scheme from
+        ``PREFERRED_URL_SCHEME``.
+        """
+        if storage is None:
+            storage = get_storage()
+
+        if self.blob is not None:
+            # The stored contents are named after their digest, so link to
+            #   them through a URL that still ends with our filename
+            self.uri = flask.url_for("files.blob",
+                            digest=self.blob.sha256,
+                            filename=self.filename,
+                            _external=True,
+                        )
         else:
-            return self.uri
+            self.uri = storage.url(self.file)
+
+        self.hashed_uri = self.with_hash(self.uri, self.hashes)
+
+    @staticmethod
+    def with_hash(uri, hashes):
+        """
+        Returns ``uri`` with the hash configured by ``FILE_URI_HASH`` out of
+        ``hashes`` as its fragment, or just ``uri`` if it is not there.
+        """
+        algorithm = flask.current_app.config.get("FILE_URI_HASH")
+        digest = (hashes or {}).get(algorithm)
+
+        if algorithm is None or digest is None:
+            return uri
+
+        parsed = urlparse.urlparse(uri)
+        fragment = "=".join([algorithm, digest])
+        return urlparse.urlunparse(parsed[:5] + (fragment,))
 
 
 listen(db.metadata, "before_create",
@@ -0,0 +1,216 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import collections
+import hashlib
+import itertools
+import logging
+import multiprocessing
+
+import flask
+
+from sqlalchemy.dialects import postgresql as pg
+
+from warehouse import db
+from warehouse.packages.models import File, Project, Version
+from warehouse.simple.models import SimpleLink
+from warehouse.utils import get_storage
+
+
+# How many files are hashed between updates to the database
+REHASH_CHUNK_SIZE = 1000
+
+# Files are read in large sequential blocks to keep the disks streaming
+REHASH_BLOCK_SIZE = 8 * 1024 * 1024
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def compute(task):
+    """
+    Hashes a single stored file, ``task`` is a tuple of its id, path on disk
+    and the algorithms to use. Returns the id along with the hex digests, or
+    None if the file could not be read. This only deals with plain data so
+    that it can be ran in another process.
+    """
+    id_, path, algorithms = task
+    hashers = dict((x, hashlib.new(x)) for x in algorithms)
+
+    try:
+        with open(path, "rb") as fp:
+            for block in iter(lambda: fp.read(REHASH_BLOCK_SIZE), b""):
+                for hasher in hashers.values():
+                    hasher.update(block)
+    except IOError:
+        return id_, None
+
+    return id_, dict((x, y.hexdigest()) for x, y in hashers.items())
+
+
+def missing(algorithms, uri_hash=None, size=REHASH_CHUNK_SIZE):
+    """
+    Yields the files that are lacking any of the digests for ``algorithms``,
+    or whose hashed URI does not end with their ``uri_hash`` digest, along
+    with the project they belong to in chunks of ``size``, ordered by id.
+    """
+    # A missing key is NULL, so for sha256 this is answered straight from the
+    #   expression index on it
+    lacking = [File.hashes[x].is_(None) for x in algorithms]
+
+    if uri_hash is not None:
+        # The hashed URIs of files that already had the digest before the
+        #   configured hash was changed still carry the old one
+        fragment = db.literal("#{0}=".format(uri_hash)) + File.hashes[uri_hash]
+        lacking.append(db.not_(File.hashed_uri.endswith(fragment)))
+
+    after = None
+
+    while True:
+        query = db.session.query(
+                    File.id,
+                    File.file,
+                    File.uri,
+                    File.hashes,
+                    Version.project_id,
+                ).join(
+                    Version, Version.id == File.version_id,
+                ).filter(
+                    db.not_(File.yanked),
+                    db.or_(*lacking),
+                ).order_by(File.id)
+
+        if after is not None:
+            query = query.filter(File.id > after)
+
+        chunk = query.limit(size).all()
+
+        if not chunk:
+            return
+
+        yield chunk
+
+        after = chunk[-1].id
+
+
+def update(rows):
+    """
+    Merges the new digests in ``rows``, a list of dictionaries with the
+    ``id`` of a file, its ``hashes``, its ``uri`` and its ``hashed_uri``, into
+    the files with a single statement.
+    """
+    table = File.__table__
+
+    statement = table.update().where(
+                    table.c.id == db.bindparam("_id"),
+                ).values(
+                    hashes=table.c.hashes + db.bindparam("_hashes",
+                                                type_=pg.HSTORE,
+                                            ),
+                    uri=db.bindparam("_uri"),
+                    hashed_uri=db.bindparam("_hashed_uri"),
+                )
+
+    db.session.execute(statement, [
+        {
+            "_id": x["id"],
+            "_hashes": x["hashes"],
+            "_uri": x["uri"],
+            "_hashed_uri": x["hashed_uri"],
+        }
+        for x in rows
+    ])
+
+
+def backfill(algorithms=None, processes=None, storage=None):
+    """
+    Computes the digests for ``algorithms``, by default just the one
+    configured by ``FILE_URI_HASH``, for every file that lacks any of them
+    and regenerates their hashed URIs, along with those of every file whose
+    hashed URI is not for ``FILE_URI_HASH``. The simple links of their
+    projects are rebuilt to match. Returns a count of the files that were
+    rehashed, the ones that only had their hashed URI regenerated and the
+    ones that could not be read.
+    """
+    if storage is None:
+        storage = get_storage()
+
+    if not hasattr(storage, "path"):
+        # The files are read by the workers straight from the disk
+        raise ValueError("Only files on a filesystem can be rehashed")
+
+    if not algorithms:
+        algorithms = [flask.current_app.config["FILE_URI_HASH"]]
+
+    unknown = set(algorithms) - set(hashlib.algorithms)
+
+    if unknown:
+        raise ValueError("Unknown hash algorithms: %s" % ", ".join(unknown))
+
+    uri_hash = flask.current_app.config["FILE_URI_HASH"]
+
+    pool = multiprocessing.Pool(processes) if processes != 0 else None
+    mapper = pool.imap if pool is not None else itertools.imap
+
+    counts = collections.Counter()
+
+    try:
+        for chunk in missing(algorithms, uri_hash=uri_hash):
+            files = dict((str(x.id), x) for x in chunk)
+
+            # Files that only have a stale hashed URI do not need to be read
+            unread = set(
+                str(x.id) for x in chunk
+                if any((x.hashes or {}).get(y) is None for y in algorithms)
+            )
+            tasks = (
+                (str(x.id), storage.path(x.file), algorithms)
+                for x in chunk if str(x.id) in unread
+            )
+            results = itertools.chain(
+                mapper(compute, tasks),
+                ((x, {}) for x in files if x not in unread),
+            )
+
+            rows = []
+            projects = set()
+
+            for id_, digests in results:
+                if digests is None:
+                    logger.warning("Could not read '%s' to rehash it",
+                        files[id_].file,
+                    )
+                    counts["unreadable"] += 1
+                    continue
+
+                hashes = dict(files[id_].hashes or {})
+                hashes.update(digests)
+
+                # Files stored before their URIs were do not have one yet
+                uri = files[id_].uri or storage.url(files[id_].file)
+
+                rows.append({
+                    "id": files[id_].id,
+                    "hashes": digests,
+                    "uri": uri,
+                    "hashed_uri": File.with_hash(uri, hashes),
+                })
+                projects.add(files[id_].project_id)
+
+                counts["rehashed" if digests else "regenerated"] += 1
+
+            if rows:
+                update(rows)
+
+                # The simple pages are rendered from the simple links, which
+                #   still have the old URIs
+                for project in Project.query.filter(Project.id.in_(projects)):
+                    SimpleLink.rebuild(project)
+
+            db.session.commit()
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    return counts
@@ -0,0 +1,205 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import collections
+import functools
+import json
+import logging
+import re
+
+from warehouse import db, redis
+from warehouse.database.utils import after_commit
+from warehouse.packages.models import Project, Requirement, Version
+from warehouse.utils.version import Version as SortableVersion
+from warehouse.utils.version import VersionPredicate, suggest
+
+
+REDIS_RESOLVE_KEY = "warehouse:resolve:{project}"
+
+# How long, in seconds, anything resolved for a project is kept, in case the
+#   project is never synchronized again to invalidate it
+RESOLVE_CACHE_TIMEOUT = 60 * 60 * 24 * 7
+
+_normalize_regex = re.compile(r"[^A-Za-z0-9.]+")
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+Node = collections.namedtuple("Node", ["name", "version", "requires"])
+
+
+def normalize(name):
+    return _normalize_regex.sub("-", name).lower()
+
+
+def _forget(normalized):
+    redis.delete(REDIS_RESOLVE_KEY.format(project=normalized))
+
+
+def invalidate(name):
+    """
+    Forgets everything resolved for the project ``name``, this needs to
+    happen whenever its versions or their requirements change.
+
+    This happens once the current transaction has been committed, anything
+    resolved before then could still have been resolved from the old state.
+    """
+    after_commit(functools.partial(_forget, normalize(name)))
+
+
+def _sortable(version):
+    try:
+        return SortableVersion(version)
+    except ValueError:
+        # A lone major version is common enough, but is not something that
+        #   even suggest() will turn into a valid version
+        if version.isdigit():
+            version = "%s.0" % version
+
+        suggested = suggest(version)
+
+        if suggested is not None:
+            return SortableVersion(suggested)
+
+
+def _predicate(versions):
+    # The name is only there to satisfy the parser, we match against the
+    #   versions of a project we have already looked up
+    try:
+        return VersionPredicate("dependency (%s)" % ",".join(versions))
+    except ValueError:
+        return
+
+
+def choose(versions, specifiers):
+    """
+    Returns the highest of ``versions`` that matches all of ``specifiers``,
+    such as ``[">=1.0", "<2.0"]``, or None. Versions we cannot make sense of
+    are never chosen, and specifiers we cannot make sense of match anything.
+    """
+    predicate = _predicate(specifiers) if specifiers else None
+    originals = {}
+
+    for version in versions:
+        parsed = _sortable(version)
+
+        if parsed is not None:
+            originals[parsed] = version
+
+    candidates = list(originals)
+
+    if predicate is not None:
+        candidates = predicate.filter(candidates)
+
+    if candidates:
+        return originals[max(candidates, key=lambda x: x.key)]
+
+
+def _lookup(normalized, specifiers):
+    project = db.session.query(Project.id, Project.name).filter(
+                    Project.normalized == normalized,
+                    db.not_(Project.yanked),
+                ).first()
+
+    if project is None:
+        return
+
+    versions = dict(db.session.query(Version.version, Version.id).filter(
+                        Version.project_id == project.id,
+                        db.not_(Version.yanked),
+                    ))
+
+    chosen = choose(versions, specifiers)
+
+    if chosen is None:
+        return
+
+    requires = db.session.query(
+                    Requirement.normalized,
+                    Requirement.versions,
+                ).filter(
+                    Requirement.version_id == versions[chosen],
+                    # Requirements that only apply to some environments or
+                    #   extras are not part of the closure
+                    Requirement.environment == "",
+                ).order_by(Requirement.normalized)
+
+    return Node(project.name, chosen, [[x, list(y)] for x, y in requires])
+
+
+def node(name, specifiers=None):
+    """
+    Returns the :class:`Node` chosen for the project ``name`` restricted by
+    ``specifiers``, or None if there is no such project or matching version.
+    Results are memoized in Redis until the project is synchronized again.
+    """
+    normalized = normalize(name)
+    specifiers = sorted(specifiers or [])
+
+    key = REDIS_RESOLVE_KEY.format(project=normalized)
+    field = ",".join(specifiers)
+
+    cached = redis.hget(key, field)
+
+    if cached is not None:
+        cached = json.loads(cached)
+        return Node(**cached) if cached else None
+
+    found = _lookup(normalized, specifiers)
+
+    pipe = redis.pipeline()
+    pipe.hset(key, field, json.dumps(found._asdict() if found else None))
+    pipe.ttl(key)
+    _, ttl = pipe.execute()
+
+    # Only start the clock when the key is created, so that a project that is
+    #   resolved often still gets looked up again every so often
+    if ttl is None or ttl < 0:
+        redis.expire(key, RESOLVE_CACHE_TIMEOUT)
+
+    return found
+
+
+def resolve(roots):
+    """
+    Walks the requirements of the projects in ``roots``, a list of names or
+    of (name, specifiers) pairs, and returns the closure as a dictionary of
+    normalized names to :class:`Node`, along with the requirements that
+    could not be satisfied.
+
+    The first requirement seen for a project decides which version of it is
+    used, later requirements for the same project are not reconciled with it.
+    """
+    queue = collections.deque(
+        (x, []) if isinstance(x, basestring) else tuple(x) for x in roots
+    )
+
+    closure = collections.OrderedDict()
+    missing = []
+
+    while queue:
+        name, specifiers = queue.popleft()
+        normalized = normalize(name)
+
+        if normalized in closure:
+            continue
+
+        found = node(name, specifiers)
+
+        if found is None:
+            logger.debug("Could not satisfy '%s' %s", name, specifiers)
+            missing.append((name, specifiers))
+
+            # Don't look for the same thing again
+            closure[normalized] = None
+            continue
+
+        closure[normalized] = found
+        queue.extend(tuple(x) for x in found.requires)
+
+    return (
+        collections.OrderedDict((x, y) for x, y in closure.items() if y),
+        missing,
+    )
@@ -2,22 +2,18 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import unicode_literals
 
-import fnmatch
 import hashlib
-import io
-import os
 import re
-import tarfile
-import zipfile
 
 import flask
-import pkg_resources
-import recliner
 
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm.exc import NoResultFound
 
 from warehouse import db
+from warehouse.packages import compatibility, wheels
 from warehouse.packages.models import (
+                                    Blob,
                                     Classifier,
                                     Project,
                                     Version,
@@ -27,11 +23,14 @@ from warehouse.packages.models import (
                                     File,
                                     FileType,
                                 )
-from warehouse.simple.models import ProjectLink
-from warehouse.utils import get_storage
+from warehouse.simple import rendering
+from warehouse.simple.models import RenderedDescription
+from warehouse.utils import get_storage, metrics
 from warehouse.utils.version import VersionPredicate
 
 
+HASH_CHUNK_SIZE = 1024 * 1024
+
 _normalize_regex = re.compile(r"[^A-Za-z0-9.]+")
 
 
@@ -110,7 +109,7 @@ def project(name):
     return proj
 
 
-def version(proj, release):
+def version(proj, release, links=None):
     try:
         vers = Version.query.filter_by(project=proj,
                                           version=release["version"]).one()
@@ -196,20 +195,57 @@ def version(proj, release):
     vers._classifiers = [Classifier.query.filter_by(trove=t).one()
                                 for t in release.get("classifiers", [])]
 
+    # Precompute which versions of Python this is compatible with so that it
+    #   can be queried for without evaluating requires_python for every row
+    vers.python_versions = compatibility.python_versions(
+                                vers.requires_python,
+                                release.get("classifiers", []),
+                            )
+
     db.session.add(vers)
 
-    # Parse the version.description and extract links from the description
-    try:
-        rendered = recliner.render(vers.description)
-    except ValueError:
-        pass
-    else:
-        if rendered:
-            ProjectLink.extract(vers.project, rendered)
+    # Extract the links from the description
+    description(vers, links=links)
 
     return vers
 
 
+def description(vers, links=None):
+    """
+    Extracts the links from the description of ``vers``. A description is
+    only rendered the first time its exact text is seen, and if
+    ``RENDER_DEFERRED`` is enabled that rendering happens in the render
+    worker, once ``vers`` has been committed, instead of here.
+
+    If ``links`` is given the extracted links are collected into it, to be
+    stored for the whole project at once with ``ProjectLink.add``.
+    """
+    if not vers.description:
+        return
+
+    digest = RenderedDescription.hash(vers.description)
+
+    if digest == vers.description_digest:
+        # We've already extracted the links from this description
+        return
+
+    try:
+        rendered = RenderedDescription.query.filter_by(digest=digest).one()
+        metrics.sync.increment("descriptions_cached")
+    except NoResultFound:
+        if flask.current_app.config.get("RENDER_DEFERRED"):
+            rendering.enqueue(vers, digest)
+            return
+
+        with metrics.sync.timer("render"):
+            html, hrefs = rendering.render(vers.description)
+
+        rendered = rendering.save(digest, html, hrefs)
+        metrics.sync.increment("descriptions_rendered")
+
+    rendering.apply(vers, rendered, links=links)
+
+
 def distribution(vers, dist):
     try:
         vfile = File.query.filter_by(filename=dist["filename"]).one()
@@ -239,6 +275,16 @@ def distribution(vers, dist):
 
     vfile.type = FileType.from_string(dist["type"])
 
+    # Store the tags of wheels so compatible files can be queried for
+    wheel = wheels.parse_filename(dist["filename"])
+
+    if wheel is not None:
+        vfile.build = wheel["build"]
+        vfile.tags = wheel["tags"]
+    else:
+        vfile.build = ""
+        vfile.tags = []
+
     vfile.comment = dist.get("comment", "")
 
     db.session.add(vfile)
@@ -246,116 +292,100 @@ def distribution(vers, dist):
     return vfile
 
 
-def distribution_file(dist, dist_file):
+def blob(digest, size, fileobj, storage):
+    """
+    Returns the :class:`Blob` for the contents of ``fileobj`` with the sha256
+    ``digest``, saving them to ``storage`` only if they are not stored yet.
+    """
+    try:
+        return Blob.query.filter_by(sha256=digest).one()
+    except NoResultFound:
+        pass
+
+    name = storage.save(Blob.path(digest), fileobj)
+    stored = Blob(sha256=digest, file=name, size=size)
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(stored)
+    except IntegrityError:
+        # Someone else stored the same contents at the same time, so use
+        #   theirs instead
+        stored = Blob.query.filter_by(sha256=digest).one()
+
+        # Both copies are usually saved under the same name, in which case
+        #   ours is theirs and must be kept. Only a copy the storage gave a
+        #   name of its own can be thrown away.
+        if name != stored.file:
+            storage.delete(name)
+
+    return stored
+
+
+def distribution_file(dist, fileobj):
     app = flask.current_app
 
-    # Generate all the hashes for this file
-    hashes = {}
-    for algorithm in hashlib.algorithms:
-        hashes[algorithm] = getattr(hashlib, algorithm)(dist_file).hexdigest()
+    # Generate all the hashes for this file, reading it in chunks so it never
+    #   has to be in memory all at once
+    hashers = dict((x, hashlib.new(x)) for x in hashlib.algorithms)
+    size = 0
+
+    with metrics.sync.timer("hashing"):
+        fileobj.seek(0)
+        for chunk in iter(lambda: fileobj.read(HASH_CHUNK_SIZE), b""):
+            size += len(chunk)
+            for hasher in hashers.values():
+                hasher.update(chunk)
+        fileobj.seek(0)
+
+    hashes = dict((x, y.hexdigest()) for x, y in hashers.items())
 
     # Save our file
     storage = get_storage(app=app)
-    filename = storage.save(dist.filename, io.BytesIO(dist_file))
+
+    with metrics.sync.timer("storage"):
+        if app.config.get("STORAGE_CONTENT_ADDRESSED"):
+            # Identical contents are only ever stored once, no matter how
+            #   many files or times they are synchronized under
+            dist.blob = blob(hashes["sha256"], size, fileobj, storage)
+            filename = dist.blob.file
+        else:
+            dist.blob = None
+            filename = storage.save(dist.filename, fileobj)
 
     # Store our information on the model
     dist.hashes = hashes
     dist.file = filename
 
+    # Compute the public URIs now so that nothing serving them has to
+    dist.generate_uris(storage=storage)
+
+
+def metadata(vers, data):
+    """
+    Applies the metadata extracted from one of the files of ``vers`` by
+    :func:`warehouse.packages.metadata.extract`.
+    """
+    if "requires" in data:
+        approximate_requires(vers, data["requires"] or [])
 
-def setuptools_requires(vers, filename, file_data):
+    # A wheel's METADATA is as close as we get to the requirements of a
+    #   release, so these take over from anything found in an sdist
+    if data.get("requires_dist") is not None:
+        approximate_requires(vers, data["requires_dist"])
+
+
+def approximate_requires(vers, requires):
     hard_requirements = [x for x in vers.requirements if not x.approximate]
     if hard_requirements:
         # We have hard requirements, we assume they take precedence over
         #   approximate requirements
         return
 
-    # Determine the type of compression to use
-    compression = os.path.splitext(filename)[1][1:]
-
-    # Normalize tgz to just gz
-    if compression == "tgz":
-        compression = "gz"
-
-    # short circuit on some invalid sdist types that PyPI somehow has
-    if compression in set(["rpm", "egg", "deb"]):
-        return
-
-    if compression not in set(["gz", "bz2", "zip"]):
-        raise ValueError(
-                "Invalid compression type %s for %s" % (compression, filename)
-            )
-
-    # Shove our file_data into a BytesIO so we can treat it like a file
-    archive = io.BytesIO(file_data)
-
     # Normalize requirements, provides, and obsoletes back to empty
     vers.requirements = []
     vers.provides = []
     vers.obsoletes = []
 
-    # Extract the requires.txt from the file_data
-    if compression == "zip":
-        try:
-            zipf = zipfile.ZipFile(archive)
-        except zipfile.BadZipfile:
-            # invalid archive
-            return
-
-        try:
-            files = fnmatch.filter(zipf.namelist(), "*.egg-info/requires.txt")
-        except IOError:
-            return
-
-        if not files:
-            # requires.txt doesn't exist
-            return
-
-        # Figure out which requires.txt is closest to the root
-        files.sort(key=lambda x: len(x.split("/")))
-
-        # Grab the first requires.txt
-        rfilename = files.pop(0)
-
-        # Extract the requires.txt from the zip archive
-        requires = zipf.open(rfilename)
-    elif compression in set(["gz", "bz2"]):
-        try:
-            mode = "r:%s" % compression
-            tar = tarfile.open(filename, mode=mode, fileobj=archive)
-        except tarfile.ReadError:
-            # Invalid archive
-            return
-
-        try:
-            files = fnmatch.filter(tar.getnames(), "*.egg-info/requires.txt")
-        except IOError:
-            return
-
-        if not files:
-            # requires.txt doesn't exist
-            return
-
-        # Figure out which requires.txt is closest to the root
-        files.sort(key=lambda x: len(x.split("/")))
-
-        # Grab the first requires.txt
-        rfilename = files.pop(0)
-
-        # Extract the requires.txt from the tar archive
-        requires = tar.extractfile(rfilename)
-
-    for section, reqs in pkg_resources.split_sections(requires):
-        for req in pkg_resources.parse_requirements(reqs):
-            requirement = Requirement(name=req.project_name, approximate=True)
-
-            # If we have any version modifiers, add them
-            if req.specs:
-                requirement.versions = ["".join(x) for x in req.specs]
-
-            # If we have any section add is as an extras
-            if section is not None:
-                requirement.environment = "extra = '%s'" % section
-
-            # Add this Requirement to the version
-            vers.requirements.append(requirement)
+    for requirement in requires:
+        vers.requirements.append(Requirement(approximate=True, **requirement))
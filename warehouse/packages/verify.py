@@ -0,0 +1,201 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import collections
+import errno
+import hashlib
+import itertools
+import logging
+import multiprocessing
+import time
+
+from warehouse import db, redis
+from warehouse.packages.models import File
+from warehouse.utils import get_storage
+
+
+REDIS_VERIFY_KEY = "warehouse:verify:checkpoint"
+
+# How many files are read from the database at a time, the checkpoint is
+#   saved after each of these has been verified
+VERIFY_CHUNK_SIZE = 1000
+
+# Files are read in large sequential blocks to keep the disks streaming
+VERIFY_BLOCK_SIZE = 8 * 1024 * 1024
+
+OK = "ok"
+MISSING = "missing"
+CORRUPT = "corrupt"
+MISMATCHED = "mismatched"
+
+# A yanked file that is missing, which is expected once its stored file has
+#   been deleted by the garbage collector
+COLLECTED = "collected"
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+Result = collections.namedtuple("Result", ["id", "filename", "status"])
+
+
+def check(task):
+    """
+    Verifies a single stored file, ``task`` is a tuple of its id, filename,
+    path on disk, expected size and expected hashes. This only deals with
+    plain data so that it can be ran in another process.
+    """
+    id_, filename, path, size, expected = task
+
+    hashers = dict(
+        (x, hashlib.new(x)) for x in expected if x in hashlib.algorithms
+    )
+    read = 0
+
+    try:
+        with open(path, "rb") as fp:
+            for block in iter(lambda: fp.read(VERIFY_BLOCK_SIZE), b""):
+                read += len(block)
+                for hasher in hashers.values():
+                    hasher.update(block)
+    except IOError as exc:
+        if exc.errno == errno.ENOENT:
+            return Result(id_, filename, MISSING)
+        return Result(id_, filename, CORRUPT)
+
+    if read != size:
+        # Truncated or otherwise damaged, there is no point comparing hashes
+        return Result(id_, filename, CORRUPT)
+
+    if any(y.hexdigest() != expected[x] for x, y in hashers.items()):
+        return Result(id_, filename, MISMATCHED)
+
+    return Result(id_, filename, OK)
+
+
+class Throttle(object):
+    """
+    Hands out tasks no faster than ``rate`` megabytes of files a second, or
+    as fast as they are consumed if ``rate`` is None. The rate holds across
+    every batch of tasks passed to the same throttle.
+    """
+
+    def __init__(self, rate, clock=time.time, sleep=time.sleep):
+        self.rate = rate
+        self.clock = clock
+        self.sleep = sleep
+
+        self.started = None
+        self.total = 0
+
+    def __call__(self, tasks):
+        if self.started is None:
+            self.started = self.clock()
+
+        for task in tasks:
+            if self.rate:
+                # Wait until the bytes handed out so far fit within the rate
+                ahead = (
+                    self.total / (self.rate * 1024 * 1024)
+                    - (self.clock() - self.started)
+                )
+
+                if ahead > 0:
+                    self.sleep(ahead)
+
+            self.total += task[3]
+            yield task
+
+
+def chunks(after=None, size=VERIFY_CHUNK_SIZE):
+    """
+    Yields every file that still has stored contents in chunks of ``size``,
+    ordered by id and starting after the id ``after``.
+    """
+    while True:
+        query = db.session.query(
+                    File.id,
+                    File.filename,
+                    File.file,
+                    File.filesize,
+                    File.hashes,
+                    File.yanked,
+                ).filter(File.file != "").order_by(File.id)
+
+        if after is not None:
+            query = query.filter(File.id > after)
+
+        chunk = query.limit(size).all()
+
+        if not chunk:
+            return
+
+        yield chunk
+
+        after = chunk[-1].id
+
+
+def verify(processes=None, rate=None, resume=False, storage=None):
+    """
+    Verifies the stored contents of every file against its recorded size and
+    hashes, returning a :class:`Result` for every file that failed along
+    with a count of every status. Yanked files that are missing are only
+    counted as collected.
+
+    Progress is checkpointed in Redis after every chunk of files, and with
+    ``resume`` the verification picks up after the last checkpoint.
+    """
+    if storage is None:
+        storage = get_storage()
+
+    if not hasattr(storage, "path"):
+        # The files are read by the workers straight from the disk
+        raise ValueError("Only files on a filesystem can be verified")
+
+    after = redis.get(REDIS_VERIFY_KEY) if resume else None
+
+    if after is not None:
+        logger.info("Resuming verification after file %s", after)
+
+    pool = multiprocessing.Pool(processes) if processes != 0 else None
+    mapper = pool.imap if pool is not None else itertools.imap
+
+    failed = []
+    counts = collections.Counter()
+    throttled = Throttle(rate)
+
+    try:
+        for chunk in chunks(after=after):
+            yanked = set(str(x.id) for x in chunk if x.yanked)
+
+            tasks = (
+                (
+                    str(x.id),
+                    x.filename,
+                    storage.path(x.file),
+                    x.filesize,
+                    dict(x.hashes or {}),
+                )
+                for x in chunk
+            )
+
+            for result in mapper(check, throttled(tasks)):
+                if result.status == MISSING and result.id in yanked:
+                    result = result._replace(status=COLLECTED)
+
+                counts[result.status] += 1
+
+                if result.status not in [OK, COLLECTED]:
+                    logger.warning("%s is %s", result.filename, result.status)
+                    failed.append(result)
+
+            redis.set(REDIS_VERIFY_KEY, str(chunk[-1].id))
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+    # Everything has been verified, the next run starts from the beginning
+    redis.delete(REDIS_VERIFY_KEY)
+
+    return failed, counts
@@ -0,0 +1,61 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import flask
+
+from warehouse import db
+from warehouse.packages.models import Blob, File, INDEXED_HASHES
+from warehouse.utils import get_storage
+
+
+files = flask.Blueprint("files",  # pylint: disable=C0103
+            __name__,
+            subdomain="api",
+            url_prefix="/files",
+        )
+
+
+@files.route("/<digest>/<filename>")
+def blob(digest, filename):
+    # Only redirect for names the contents are actually known by, so that
+    #   these URLs cannot be used to serve a blob under any name at all
+    stored = db.session.query(Blob.file).join(
+                    File, File.blob_id == Blob.id,
+                ).filter(
+                    Blob.sha256 == digest,
+                    File.filename == filename,
+                ).first()
+
+    if stored is None:
+        flask.abort(404)
+
+    return flask.redirect(get_storage().url(stored.file))
+
+
+@files.route("/by-hash/<algorithm>/<digest>")
+def by_hash(algorithm, digest):
+    if algorithm not in INDEXED_HASHES:
+        flask.abort(404)
+
+    return flask.jsonify(
+        algorithm=algorithm,
+        digest=digest.lower(),
+        files=[
+            {
+                "project": project,
+                "version": version,
+                "filename": filename,
+                "yanked": yanked,
+                "url": flask.url_for("simple.detail",
+                            project=project,
+                            _external=True,
+                        ),
+            }
+            for project, version, filename, yanked
+                in File.by_hash(algorithm, digest)
+        ],
+    )
+
+
+BLUEPRINTS = [files]
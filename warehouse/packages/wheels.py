@@ -0,0 +1,46 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import itertools
+import re
+
+
+_filename_regex = re.compile(
+    r"^(?P<name>[^-]+)-(?P<version>[^-]+)(?:-(?P<build>\d[^-]*))?"
+    r"-(?P<python>[^-]+)-(?P<abi>[^-]+)-(?P<platform>[^-]+)\.whl$",
+    re.IGNORECASE,
+)
+
+
+def normalize_tag(tag):
+    """
+    Normalizes a single python-abi-platform tag so that tags given to us in
+    queries compare equal to the ones we store.
+    """
+    return "-".join(
+        re.sub(r"[^a-z0-9]+", "_", part.strip().lower())
+        for part in tag.split("-", 2)
+    )
+
+
+def parse_filename(filename):
+    """
+    Parses the name of a wheel into its build tag and the sorted list of
+    python-abi-platform tags it is compatible with, with compressed tag sets
+    like ``py2.py3-none-any`` expanded into one tag each. Returns None if
+    ``filename`` is not the name of a wheel.
+    """
+    match = _filename_regex.match(filename)
+
+    if match is None:
+        return
+
+    expanded = itertools.product(*[
+        match.group(part).split(".") for part in ["python", "abi", "platform"]
+    ])
+
+    return {
+        "build": match.group("build") or "",
+        "tags": sorted(set(normalize_tag("-".join(x)) for x in expanded)),
+    }
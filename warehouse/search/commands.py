@@ -0,0 +1,77 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import logging
+
+from flask.ext.script import Command, Option  # pylint: disable=E0611,F0401
+from progress.bar import ShadyBar
+
+from warehouse import db, script
+from warehouse.packages.models import Project, Version
+from warehouse.search.query import search
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def rebuild_index(progress=True):
+    # Touching a column the trigger watches rebuilds the search documents.
+    #   The modified trigger runs before it, as triggers run in order of their
+    #   names, and so sees an unchanged row and leaves modified alone.
+    Version.query.update({"summary": Version.summary},
+        synchronize_session=False,
+    )
+    db.session.commit()
+
+    projects = Project.query.all()
+
+    if progress:
+        projects = ShadyBar("Marking Latest Versions",
+                        max=len(projects),
+                    ).iter(projects)
+
+    for project in projects:
+        Version.refresh_latest(project)
+        db.session.commit()
+
+
+class Search(Command):
+    """
+    Searches the latest versions of every project.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("terms", nargs="*", help="words to search for"),
+        Option("--limit",
+            type=int,
+            dest="limit",
+            default=20,
+            help="maximum number of results to show",
+        ),
+        Option("--reindex",
+            action="store_true",
+            dest="reindex",
+            default=False,
+            help="rebuild the search documents and latest versions first",
+        ),
+        Option("--no-progress",
+            action="store_false",
+            dest="progress",
+            help="do not display a progress bar",
+        ),
+    ]
+
+    def run(self, terms=None, limit=20, reindex=False, progress=True):
+        if reindex:
+            rebuild_index(progress=progress)
+
+        terms = " ".join(x.decode("utf-8") for x in terms or [])
+
+        for name, version, summary, _ in search(terms, limit=limit):
+            print("{0} {1} - {2}".format(name, version, summary))
+
+script.add_command("search", Search())
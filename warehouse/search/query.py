@@ -0,0 +1,48 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from sqlalchemy.sql import func
+
+from warehouse import db
+from warehouse.packages.models import Project, Version
+
+
+# The configuration used to build the search documents in the database
+SEARCH_CONFIG = "english"
+
+MAX_RESULTS = 100
+
+
+def search(terms, limit=20, offset=0):
+    """
+    Returns the latest versions matching the words in ``terms`` as rows of
+    (name, version, summary, rank), best matches first.
+    """
+    if not terms or not terms.strip():
+        return []
+
+    limit = max(min(limit, MAX_RESULTS), 0)
+    offset = max(offset, 0)
+
+    query = func.plainto_tsquery(SEARCH_CONFIG, terms)
+    rank = func.ts_rank_cd(Version.search_vector, query)
+
+    return db.session.query(
+                Project.name,
+                Version.version,
+                Version.summary,
+                rank.label("rank"),
+            ).select_from(Version).join(
+                Project, Project.id == Version.project_id,
+            ).filter(
+                # Both of these need to be here for the partial index on the
+                #   search documents of the latest versions to be used
+                Version.latest,
+                Version.search_vector.op("@@")(query),
+            ).filter(
+                db.not_(Version.yanked),
+            ).order_by(
+                rank.desc(),
+                Project.normalized,
+            ).limit(limit).offset(offset).all()
@@ -0,0 +1,43 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import flask
+
+from warehouse.search.query import search as search_query
+
+
+search = flask.Blueprint("search",  # pylint: disable=C0103
+            __name__,
+            subdomain="api",
+            url_prefix="/search",
+        )
+
+
+@search.route("/")
+def results():
+    terms = flask.request.args.get("q", "")
+    limit = flask.request.args.get("limit", 20, type=int)
+    offset = flask.request.args.get("offset", 0, type=int)
+
+    found = search_query(terms, limit=limit, offset=offset)
+
+    return flask.jsonify(
+        query=terms,
+        results=[
+            {
+                "name": name,
+                "version": version,
+                "summary": summary,
+                "rank": rank,
+                "url": flask.url_for("simple.detail",
+                            project=name,
+                            _external=True,
+                        ),
+            }
+            for name, version, summary, rank in found
+        ],
+    )
+
+
+BLUEPRINTS = [search]
@@ -0,0 +1,156 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import logging
+import multiprocessing
+
+from flask.ext.script import Command, Option  # pylint: disable=E0611,F0401
+from progress.bar import ShadyBar
+
+from warehouse import db, redis, script
+from warehouse.packages.models import Project
+from warehouse.simple import rendering
+from warehouse.simple.models import SimpleLink
+from warehouse.synchronize.commands import REDIS_SYNC_LOCK_KEY
+
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def rebuild_links(projects=None, progress=True):
+    query = Project.query.order_by(Project.name)
+
+    if projects:
+        query = query.filter(Project.name.in_(projects))
+
+    projects = query.all()
+
+    if progress:
+        projects = ShadyBar("Rebuilding Simple Links",
+                        max=len(projects),
+                    ).iter(projects)
+
+    changed = 0
+
+    for project in projects:
+        key = REDIS_SYNC_LOCK_KEY.format(project=project.name)
+
+        # Make sure we are not racing with a synchronization of this project
+        with redis.lock(key, timeout=60 * 10):
+            if SimpleLink.rebuild(project):
+                changed += 1
+
+            db.session.commit()
+
+    return changed
+
+
+def process(jobs, pool):
+    # Render all of the descriptions in parallel, this is the expensive part
+    results = pool.map(rendering.render, [x["description"] for _, x in jobs])
+
+    for (payload, job), (html, links) in zip(jobs, results):
+        key = REDIS_SYNC_LOCK_KEY.format(project=job["project"])
+
+        # Make sure we are not racing with a synchronization of this project
+        with redis.lock(key, timeout=60 * 10):
+            try:
+                if rendering.complete(job, html, links):
+                    logger.info(
+                        "Extracted links from the description of '%s' "
+                            "version '%s'",
+                        job["project"],
+                        job["version"],
+                    )
+
+                db.session.commit()
+            except Exception:  # pylint: disable=W0703
+                # The next synchronization of this project will queue the
+                #   description again, so just carry on with the others
+                db.session.rollback()
+                logger.exception(
+                    "Could not store the description of '%s' version '%s'",
+                    job["project"],
+                    job["version"],
+                )
+
+        rendering.finish(payload)
+
+
+class RenderWorker(Command):
+    """
+    Renders the descriptions queued during synchronization.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("--concurrency",
+            type=int,
+            dest="concurrency",
+            default=None,
+            help="number of processes to render with, defaults to the number "
+                "of CPUs",
+        ),
+        Option("--batch-size",
+            type=int,
+            dest="batch",
+            default=50,
+            help="maximum number of queued descriptions to take at once",
+        ),
+    ]
+
+    def run(self, concurrency=None, batch=50):
+        # Start the pool before we have any connections open that would end
+        #   up being shared with the child processes.
+        pool = multiprocessing.Pool(concurrency)
+
+        recovered = rendering.recover()
+
+        if recovered:
+            logger.info("Queued %s unfinished descriptions again", recovered)
+
+        logger.info("Waiting for descriptions to render")
+
+        try:
+            while True:
+                jobs = rendering.dequeue(count=batch)
+
+                if jobs:
+                    process(jobs, pool)
+        finally:
+            pool.terminate()
+
+
+class RebuildLinks(Command):
+    """
+    Rebuilds the links on the simple pages of projects from their versions
+    and files, for projects that have not been synchronized since the links
+    started being stored.
+    """
+
+    # pylint: disable=W0232
+
+    option_list = [
+        Option("projects",
+            nargs="*",
+            help="projects to rebuild, defaults to every project",
+        ),
+        Option("--no-progress",
+            action="store_false",
+            dest="progress",
+            help="do not display a progress bar",
+        ),
+    ]
+
+    def run(self, projects=None, progress=True):
+        # This is a hack to normalize the incoming projects to unicode
+        projects = [x.decode("utf-8") for x in projects or []]
+
+        changed = rebuild_links(projects=projects, progress=progress)
+        logger.info("Rebuilt the simple links of %s projects", changed)
+
+script.add_command("render-worker", RenderWorker())
+script.add_command("rebuild-simple", RebuildLinks())
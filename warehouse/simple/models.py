@@ -2,18 +2,19 @@ from __future__ import absolute_import
 from __future__ import division
 from __future__ import unicode_literals
 
-from xml.etree import ElementTree
-
-import html5lib
-import html5lib.treebuilders
+import hashlib
 
 from sqlalchemy.dialects import postgresql as pg
 from sqlalchemy.ext.declarative import declared_attr
-from sqlalchemy.orm.exc import NoResultFound
+from sqlalchemy.sql.expression import text
 
 from warehouse import db
-from warehouse.database.mixins import UUIDPrimaryKeyMixin
+from warehouse.database.mixins import UUIDPrimaryKeyMixin, TimeStampedMixin
+from warehouse.database.types import Enum
 from warehouse.database.utils import table_args
+from warehouse.packages.models import Version, File
+from warehouse.utils import get_storage
+from warehouse.utils.html import hrefs
 
 
 class ProjectLink(UUIDPrimaryKeyMixin, db.Model):
@@ -29,23 +30,237 @@ class ProjectLink(UUIDPrimaryKeyMixin, db.Model):
                 )
     link = db.Column(db.UnicodeText, nullable=False)
 
+    @classmethod
+    def add(cls, project, links):
+        """
+        Adds any of ``links`` that ``project`` does not already have, using a
+        single query to find the existing links and a single insert for the
+        missing ones.
+        """
+        links = set(links)
+
+        if not links:
+            return
+
+        # Make sure the project, and any links added through the session, are
+        #   in the database before we look at what already exists.
+        db.session.flush()
+
+        existing = db.session.query(cls.link).filter(
+                        cls.project_id == project.id,
+                        cls.link.in_(links),
+                    )
+        missing = links - set(link for link, in existing)
+
+        if missing:
+            db.session.execute(cls.__table__.insert(), [
+                {"project_id": project.id, "link": link}
+                for link in sorted(missing)
+            ])
+
     @classmethod
     def extract(cls, project, html):
-        parser = html5lib.HTMLParser(
-            tree=html5lib.treebuilders.getTreeBuilder("etree", ElementTree),
-            namespaceHTMLElements=False,
+        cls.add(project, hrefs(html))
+
+
+class RenderedDescription(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
+    """
+    The rendered form of a description, and the links found in it, keyed by
+    a hash of the description text so that a description is only ever
+    rendered once.
+    """
+
+    __tablename__ = "rendered_descriptions"
+
+    digest = db.Column(db.UnicodeText, unique=True, nullable=False)
+    html = db.Column(db.UnicodeText, nullable=False, server_default="")
+    links = db.Column(pg.ARRAY(db.UnicodeText, dimensions=1),
+                nullable=False,
+                server_default="{}"
+            )
+
+    @staticmethod
+    def hash(description):
+        return hashlib.sha256(description.encode("utf-8")).hexdigest()
+
+
+class SimpleLinkType(Enum):
+    file = "file", "File"
+    homepage = "homepage", "Home Page"
+    download = "download", "Download URL"
+    extracted = "extracted", "Extracted"
+
+
+class SimpleLink(UUIDPrimaryKeyMixin, TimeStampedMixin, db.Model):
+    """
+    A denormalized copy of a single link on a project's simple page, rebuilt
+    whenever the project is synchronized so the page can be rendered from a
+    single indexed read. Projects that have not been synchronized since can
+    be rebuilt with the ``rebuild-simple`` command.
+    """
+
+    __tablename__ = "simple_links"
+    __table_args__ = declared_attr(table_args((
+        db.Index("simple_link_idx", "project_id", "version"),
+    )))
+
+    project_id = db.Column(pg.UUID(as_uuid=True),
+                    db.ForeignKey("projects.id", ondelete="CASCADE"),
+                    nullable=False
+                )
+
+    # The version this link belongs to, empty for links that belong to the
+    #   project as a whole
+    version = db.Column(db.UnicodeText, nullable=False, server_default="")
+
+    type = db.Column(SimpleLinkType.db_type(), nullable=False)
+    link = db.Column(db.UnicodeText, nullable=False)
+    label = db.Column(db.UnicodeText, nullable=False)
+
+    yanked = db.Column(db.Boolean,
+                nullable=False,
+                server_default=text("FALSE")
+            )
+
+    # The tags of the wheel a file link points to, copied from the file
+    tags = db.Column(pg.ARRAY(db.UnicodeText, dimensions=1),
+                nullable=False,
+                server_default="{}",
+            )
+
+    @staticmethod
+    def _generate(project):
+        # The yanking of versions and files is done with bulk updates that
+        #   do not synchronize the session, so make sure we are looking at
+        #   what is actually in the database.
+        db.session.flush()
+
+        versions = Version.query.populate_existing().filter_by(
+                                                        project=project).all()
+
+        if versions:
+            files = db.session.query(
+                        File.version_id,
+                        File.filename,
+                        File.file,
+                        File.hashes,
+                        File.hashed_uri,
+                        File.yanked,
+                        File.tags,
+                    ).filter(
+                        File.version_id.in_([v.id for v in versions])
+                    ).all()
+        else:
+            files = []
+
+        vyanked = dict((v.id, v.yanked) for v in versions)
+        vnames = dict((v.id, v.version) for v in versions)
+
+        links = set()
+        storage = None
+
+        for vfile in files:
+            if not vfile.file:
+                # The contents of this yanked file have been collected, so
+                #   there is nothing left to link to
+                continue
+
+            hashed_uri = vfile.hashed_uri
+
+            if not hashed_uri:
+                # Files stored before their URIs were, and not downloaded
+                #   again since, do not have one yet
+                if storage is None:
+                    storage = get_storage()
+
+                hashed_uri = File.with_hash(
+                                storage.url(vfile.file),
+                                vfile.hashes,
+                            )
+
+            links.add((
+                SimpleLinkType.file,
+                vnames[vfile.version_id],
+                hashed_uri,
+                vfile.filename,
+                vfile.yanked or vyanked[vfile.version_id],
+                tuple(vfile.tags or []),
+            ))
+
+        for vers in versions:
+            for label, uri in vers.uris.iteritems():
+                if label.lower() in set(["home page", "homepage"]):
+                    links.add((
+                        SimpleLinkType.homepage,
+                        vers.version,
+                        uri,
+                        "%s home_page" % vers.version,
+                        vers.yanked,
+                        (),
+                    ))
+
+            if vers.download_uri:
+                links.add((
+                    SimpleLinkType.download,
+                    vers.version,
+                    vers.download_uri,
+                    "%s download_url" % vers.version,
+                    vers.yanked,
+                    (),
+                ))
+
+        # ProjectLinks are inserted in bulk, so query for them instead of
+        #   relying on the relationship
+        plinks = db.session.query(ProjectLink.link).filter(
+                                        ProjectLink.project_id == project.id)
+
+        for plink, in plinks:
+            links.add((
+                SimpleLinkType.extracted,
+                "",
+                plink,
+                plink,
+                False,
+                (),
+            ))
+
+        return links
+
+    @classmethod
+    def rebuild(cls, project):
+        """
+        Regenerates the simple links for ``project``. The stored rows are only
+        replaced when something actually changed so that their timestamps can
+        be used to validate cached pages.
+        """
+        links = cls._generate(project)
+
+        current = set(
+            (ltype, version, link, label, yanked, tuple(tags or []))
+            for ltype, version, link, label, yanked, tags in db.session.query(
+                cls.type, cls.version, cls.link, cls.label, cls.yanked,
+                cls.tags,
+            ).filter(cls.project_id == project.id)
         )
-        parsed = parser.parse(html)
-        for anchor in parsed.iter("a"):
-            if "href" in anchor.attrib:
-                href = anchor.attrib["href"]
-
-                try:
-                    link = cls.query.filter_by(
-                                project=project,
-                                link=href,
-                            ).one()
-                except NoResultFound:
-                    link = cls(project=project, link=href)
-
-                db.session.add(link)
+
+        if links == current:
+            return False
+
+        cls.query.filter_by(project_id=project.id).delete(
+                                                    synchronize_session=False)
+
+        if links:
+            db.session.execute(cls.__table__.insert(), [
+                {
+                    "project_id": project.id,
+                    "type": ltype,
+                    "version": version,
+                    "link": link,
+                    "label": label,
+                    "yanked": yanked,
+                    "tags": list(tags),
+                }
+                for ltype, version, link, label, yanked, tags in links
+            ])
+
+        return True
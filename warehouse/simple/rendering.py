@@ -0,0 +1,220 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import functools
+import json
+import logging
+
+import recliner
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.exc import NoResultFound
+
+from warehouse import db, redis
+from warehouse.database.utils import after_commit
+from warehouse.packages.models import Project, Version
+from warehouse.simple.models import (
+                                    ProjectLink,
+                                    RenderedDescription,
+                                    SimpleLink,
+                                )
+from warehouse.utils.html import hrefs
+
+
+REDIS_RENDER_QUEUE_KEY = "warehouse:render:queue"
+REDIS_RENDER_PROCESSING_KEY = "warehouse:render:processing"
+
+# How many times a job is queued again when its version cannot be found
+RENDER_RETRIES = 5
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+def render(text):
+    """
+    Renders ``text`` and returns the resulting html along with the links found
+    in it. This touches neither the database nor Redis so that it can be ran
+    in a separate process. A description that cannot be rendered renders as
+    nothing at all.
+    """
+    try:
+        html = recliner.render(text)
+
+        if not html:
+            return "", []
+
+        return html, hrefs(html)
+    except ValueError:
+        return "", []
+    except Exception:  # pylint: disable=W0703
+        # Anything else going wrong in here would take the whole render
+        #   worker down, and with it every description queued after this one
+        logger.exception("Could not render a description")
+        return "", []
+
+
+def save(digest, html, links):
+    """
+    Stores a rendered description, a description that failed to render is
+    stored as well so we do not try to render it again every time it is
+    synchronized.
+    """
+    rendered = RenderedDescription(digest=digest, html=html, links=links)
+
+    try:
+        with db.session.begin_nested():
+            db.session.add(rendered)
+    except IntegrityError:
+        # Someone else rendered the same description at the same time
+        rendered = RenderedDescription.query.filter_by(digest=digest).one()
+
+    return rendered
+
+
+def apply(vers, rendered, links=None):
+    """
+    Adds the links from ``rendered`` to the project of ``vers`` and records
+    that they have been extracted from its current description. If ``links``
+    is given the links are collected into it to be added later instead.
+    """
+    if links is not None:
+        links.update(rendered.links)
+    elif rendered.links:
+        ProjectLink.add(vers.project, rendered.links)
+
+    vers.description_digest = rendered.digest
+
+
+def _push(payload):
+    redis.lpush(REDIS_RENDER_QUEUE_KEY, payload)
+
+
+def enqueue(vers, digest):
+    """
+    Queues the description of ``vers`` for the render worker once the
+    current transaction has been committed, so that the worker never looks
+    for a version it cannot see yet.
+    """
+    logger.debug(
+        "Queueing the description of '%s' version '%s' for rendering",
+        vers.project.name,
+        vers.version,
+    )
+
+    payload = json.dumps({
+        "project": vers.project.name,
+        "version": vers.version,
+        "digest": digest,
+        "description": vers.description,
+    })
+
+    after_commit(functools.partial(_push, payload))
+
+
+def requeue(job):
+    """
+    Queues ``job`` again to be retried later, returning False instead if it
+    has already been retried ``RENDER_RETRIES`` times.
+    """
+    attempts = job.get("attempts", 0) + 1
+
+    if attempts > RENDER_RETRIES:
+        return False
+
+    _push(json.dumps(dict(job, attempts=attempts)))
+
+    return True
+
+
+def dequeue(count=1, timeout=5):
+    """
+    Waits up to ``timeout`` seconds for a job and then returns it along with
+    any others that are immediately available, up to ``count`` jobs, as
+    (payload, job) pairs.
+
+    The jobs are kept in a processing list until they are passed to
+    :func:`finish`, so that the jobs of a worker that died are not lost.
+    """
+    payload = redis.brpoplpush(REDIS_RENDER_QUEUE_KEY,
+                    REDIS_RENDER_PROCESSING_KEY,
+                    timeout=timeout,
+                )
+
+    payloads = []
+
+    while payload is not None:
+        payloads.append(payload)
+
+        if len(payloads) >= count:
+            break
+
+        payload = redis.rpoplpush(REDIS_RENDER_QUEUE_KEY,
+                        REDIS_RENDER_PROCESSING_KEY,
+                    )
+
+    return [(x, json.loads(x)) for x in payloads]
+
+
+def finish(payload):
+    """
+    Removes a job returned by :func:`dequeue` from the processing list.
+    """
+    redis.lrem(REDIS_RENDER_PROCESSING_KEY, payload, 1)
+
+
+def recover():
+    """
+    Queues every job left in the processing list again, returning how many
+    there were. Completing a job twice is harmless, so this is safe to do
+    even if other workers are still processing some of them.
+    """
+    recovered = 0
+
+    while redis.rpoplpush(REDIS_RENDER_PROCESSING_KEY,
+                REDIS_RENDER_QUEUE_KEY,
+            ) is not None:
+        recovered += 1
+
+    return recovered
+
+
+def complete(job, html, links):
+    """
+    Stores the result of rendering ``job`` and, if the version it came from
+    still has that description, extracts its links and refreshes the simple
+    links of the project.
+    """
+    rendered = save(job["digest"], html, links)
+
+    try:
+        vers = Version.query.join(Project).filter(
+                    Project.name == job["project"],
+                    Version.version == job["version"],
+                ).one()
+    except NoResultFound:
+        # Jobs are only queued once their version has been committed, so
+        #   either we cannot see it yet or it has been removed since
+        if not requeue(job):
+            logger.warning(
+                "Could not find '%s' version '%s' to extract the links of "
+                    "its description",
+                job["project"],
+                job["version"],
+            )
+        return False
+
+    if vers.description_digest == rendered.digest:
+        # Nothing left to do
+        return False
+
+    if RenderedDescription.hash(vers.description) != rendered.digest:
+        # The description has changed since this job was queued, and the
+        #   new one has been queued along with that change
+        return False
+
+    apply(vers, rendered)
+    SimpleLink.rebuild(vers.project)
+
+    return True
@@ -6,7 +6,13 @@ import re
 
 import flask
 
-from warehouse.packages.models import Project, Version, File
+from sqlalchemy.sql import func
+
+from warehouse import db
+from warehouse.packages.models import Project
+from warehouse.packages.wheels import normalize_tag
+from warehouse.simple.models import SimpleLink, SimpleLinkType
+from warehouse.utils import http
 
 
 _normalize_regex = re.compile(r"[^A-Za-z0-9.]+")
@@ -30,8 +36,23 @@ restricted = flask.Blueprint("restricted",  # pylint: disable=C0103
 @simple.route("/")
 @restricted.route("/")
 def index():
-    projects = Project.query.all()
-    return flask.render_template("index.html", projects=projects)
+    # Compute a validator for the index without loading every project
+    last_modified, count = db.session.query(
+                                func.max(Project.modified),
+                                func.count(Project.id),
+                            ).one()
+
+    def render():
+        projects = Project.query.all()
+        return flask.render_template("index.html", projects=projects)
+
+    # The links are relative to the blueprint, so each one has its own page
+    tag = http.etag("index", flask.request.blueprint, last_modified, count)
+
+    return http.conditional(tag, last_modified,
+                lambda: http.precompressed(tag, render),
+                encoded=True,
+            )
 
 
 @simple.route("/<project>")
@@ -46,23 +67,57 @@ def detail(project, version=None, restrict=False):
     normalized = _normalize_regex.sub("-", project).lower()
     project = Project.query.filter_by(normalized=normalized).first_or_404()
 
+    links = SimpleLink.query.filter_by(project_id=project.id)
+
     if version is None:
-        versions = Version.query.filter_by(project=project, yanked=False).all()
-        files = File.query.filter(
-                    File.version_id.in_([v.id for v in versions])
-                ).filter_by(yanked=False).all()
+        links = links.filter_by(yanked=False)
+
+        # Yanking a project yanks its versions and files in the database
+        #   without touching the simple links.
+        if project.yanked:
+            links = links.filter_by(type=SimpleLinkType.extracted)
     else:
-        versions = Version.query.filter_by(
-                                    project=project, version=version).all()
-        files = File.query.filter(
-                    File.version_id.in_([v.id for v in versions]),
-                ).all()
-
-    return flask.render_template("detail.html",
-                project=project,
-                versions=versions,
-                files=files,
-                restricted=restrict,
+        links = links.filter(db.or_(
+                    SimpleLink.version == version,
+                    SimpleLink.type == SimpleLinkType.extracted,
+                ))
+
+    if restrict:
+        links = links.filter_by(type=SimpleLinkType.file)
+
+    # Only list the wheels that are compatible with one of the given tags
+    tags = sorted(set(
+        normalize_tag(x)
+        for x in ",".join(flask.request.args.getlist("tags")).split(",")
+        if x.strip()
+    ))
+
+    if tags:
+        links = links.filter(db.or_(
+                    SimpleLink.tags == [],
+                    SimpleLink.tags.overlap(tags),
+                ))
+
+    modified, count = links.with_entities(
+                            func.max(SimpleLink.modified),
+                            func.count(SimpleLink.id),
+                        ).one()
+    last_modified = max(x for x in [project.modified, modified] if x)
+
+    tag = http.etag(
+                "detail", flask.request.blueprint, project.id, project.name,
+                project.modified, version, restrict, tags, modified, count,
+            )
+
+    def render():
+        return flask.render_template("detail.html",
+                    project=project,
+                    links=links.order_by(SimpleLink.label).all(),
+                )
+
+    return http.conditional(tag, last_modified,
+                lambda: http.precompressed(tag, render),
+                encoded=True,
             )
 
 
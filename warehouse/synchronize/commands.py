@@ -4,34 +4,170 @@ from __future__ import unicode_literals
 
 import datetime
 import logging
+import time
+
+import flask
 
 from flask.ext.script import (  # pylint: disable=E0611,F0401
                             Command, Group, Option)
 from progress.bar import ShadyBar
+from sqlalchemy.engine import Engine
+from sqlalchemy.event import listen
+from sqlalchemy.orm import Session
 
 from warehouse import db, redis, script
 from warehouse import utils
 from warehouse.history.models import Journal
-from warehouse.packages import diff, store
-from warehouse.packages.models import Project, FileType
+from warehouse.packages import archives, diff, metadata, resolver, store
+from warehouse.packages.metadata import MetadataExtractor
+from warehouse.packages.models import (
+                                    Dependent,
+                                    FileType,
+                                    Project,
+                                    ProjectClassifier,
+                                    Version,
+                                )
+from warehouse.simple.models import ProjectLink, SimpleLink
 from warehouse.synchronize.fetchers import PyPIFetcher
+from warehouse.utils import metrics
 
 
 REDIS_JOURNALS_KEY = "warehouse:journals"
 REDIS_SINCE_KEY = "warehouse:since"
 REDIS_SYNC_LOCK_KEY = "warehouse:sync:lock:{project}"
+REDIS_RANGED_KEY = "warehouse:ranged"
+
+# The types of files we extract metadata from, the metadata from later types
+#   is applied after, and so takes over from, the earlier ones
+METADATA_TYPES = [FileType.source, FileType.wheel]
 
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
 
+# When each session currently flushing started to
+_flushing = {}
+
+# Whether the listeners of track_flushes have been registered yet
+_tracking = False
+
+
+def _flush_started(session, flush_context, instances):
+    # pylint: disable=W0613
+    _flushing[id(session)] = time.time()
+
+
+def _flush_finished(session, flush_context):
+    # pylint: disable=W0613
+    started = _flushing.pop(id(session), None)
+
+    if started is not None:
+        metrics.sync.timing("flush", time.time() - started)
+
+
+def _statement_executed(conn, cursor, statement, parameters, context,
+        executemany):
+    # pylint: disable=W0613
+    # The rowcount of an executemany is the total of all of its rows
+    if (statement.lstrip()[:6].upper() in ["INSERT", "UPDATE", "DELETE"]
+            and cursor.rowcount > 0):
+        metrics.sync.increment("rows_written", cursor.rowcount)
+
+
+def track_flushes():
+    """
+    Times every flush of a database session, and counts every row written
+    by the database whether it was flushed or executed in bulk, in the
+    synchronization metrics. The listeners are only registered once no
+    matter how often this is called.
+    """
+    global _tracking  # pylint: disable=W0603
+
+    if _tracking:
+        return
+
+    listen(Session, "before_flush", _flush_started)
+    listen(Session, "after_flush_postexec", _flush_finished)
+    listen(Engine, "after_cursor_execute", _statement_executed)
+
+    _tracking = True
+
+
 class DummyBar(object):
     def iter(self, iterable):
         for item in iterable:
             yield item
 
 
-def synchronize_project(project, fetcher, download=None):
+def ranged_metadata(distribution, dist):
+    """
+    Determines if the metadata of ``distribution`` should be fetched with
+    range requests instead of downloading the whole file.
+    """
+    if distribution.type not in METADATA_TYPES:
+        return False
+
+    try:
+        if archives.compression(distribution.filename) != "zip":
+            # Only zip files can be read without reading the whole file
+            return False
+    except ValueError:
+        return False
+
+    # Don't fetch the same file again on every synchronization
+    if redis.sismember(REDIS_RANGED_KEY, dist["md5_digest"]):
+        metrics.sync.increment("ranged_cached")
+        return False
+
+    return True
+
+
+def fetch_metadata(fetcher, distribution, dist):
+    """
+    Fetches just the metadata of ``distribution`` from PyPI using range
+    requests, returning None if it could not be fetched.
+    """
+    try:
+        remote = fetcher.ranged(dist["url"])
+        data = metadata.read(distribution.filename, remote)
+    except (IOError, ValueError):
+        # Failing to fetch the metadata of a single file is no reason to stop
+        #   synchronizing, requests' errors are all IOErrors as well
+        logger.exception("Could not fetch the metadata of '%s'",
+            distribution.filename,
+        )
+        metrics.sync.increment("ranged_failed")
+        return
+
+    logger.debug("Fetched %s bytes of '%s' for its metadata",
+        remote.fetched,
+        distribution.filename,
+    )
+
+    # Files without any metadata, like most old sdists without a
+    #   requires.txt, will not have any the next time either
+    redis.sadd(REDIS_RANGED_KEY, dist["md5_digest"])
+
+    return data
+
+
+def synchronize_project(project, fetcher, download=None, extractor=None):
+    started = time.time()
+
+    try:
+        _synchronize_project(project, fetcher,
+            download=download,
+            extractor=extractor,
+        )
+    finally:
+        metrics.sync.increment("projects")
+        metrics.sync.observe("project_seconds", time.time() - started)
+
+
+def _synchronize_project(project, fetcher, download=None, extractor=None):
+    if extractor is None:
+        extractor = MetadataExtractor(processes=0)
+
     key = REDIS_SYNC_LOCK_KEY.format(project=project)
 
     with redis.lock(key, timeout=60 * 10):
@@ -40,6 +176,10 @@ def synchronize_project(project, fetcher, download=None):
         project = store.project(project)
         versions = fetcher.versions(project.name)
 
+        # Links extracted from the descriptions of every version, stored all
+        #   at once after the versions have been synchronized
+        links = set()
+
         for ver in versions:
             logger.debug(
                 "Synchronizing version '%s' of '%s' from pypi.python.org",
@@ -48,11 +188,18 @@ def synchronize_project(project, fetcher, download=None):
             )
 
             release = fetcher.release(project.name, ver)
-            version = store.version(project, release)
+            version = store.version(project, release, links=links)
+
+            metrics.sync.increment("versions")
 
             dists = fetcher.distributions(project.name, version.version)
             dists = list(dists)
 
+            # Files whose metadata is being extracted in the background, and
+            #   the metadata that has been extracted already
+            pending = []
+            extracted = []
+
             for dist in dists:
                 logger.debug(
                     "Synchronizing '%s' from version '%s' of '%s' "
@@ -76,15 +223,55 @@ def synchronize_project(project, fetcher, download=None):
                             download is None and
                             dist["md5_digest"] != current_hashes.get("md5")
                         ):
-                    file_data = fetcher.file(dist["url"])
-                    store.distribution_file(distribution, file_data)
-
-                    if distribution.type == FileType.source:
-                        store.setuptools_requires(
-                            version,
-                            distribution.filename,
-                            file_data,
-                        )
+                    spooled = fetcher.download(dist["url"],
+                                    suffix=distribution.filename,
+                                )
+                    store.distribution_file(distribution, spooled)
+
+                    metrics.sync.increment("files_downloaded")
+
+                    if distribution.type in METADATA_TYPES:
+                        handle = extractor.submit(
+                                    distribution.filename,
+                                    spooled.name,
+                                )
+                        pending.append((
+                            METADATA_TYPES.index(distribution.type),
+                            spooled,
+                            handle,
+                        ))
+                    else:
+                        spooled.close()
+                elif download is None:
+                    # Our stored copy is already the same as the one on PyPI
+                    metrics.sync.increment("files_unchanged")
+
+                    # Files stored before their URIs were do not have one yet
+                    if not distribution.uri:
+                        distribution.generate_uris()
+                elif download is False and ranged_metadata(distribution, dist):
+                    # We are not downloading files, but we can still fetch
+                    #   just the metadata out of the zip based ones
+                    data = fetch_metadata(fetcher, distribution, dist)
+
+                    if data is not None:
+                        extracted.append((
+                            METADATA_TYPES.index(distribution.type),
+                            data,
+                        ))
+
+            for index, spooled, handle in pending:
+                try:
+                    with metrics.sync.timer("metadata"):
+                        extracted.append((index, extractor.result(handle)))
+                finally:
+                    spooled.close()
+
+            # Apply the metadata extracted from the files of this version, in
+            #   order of how much we trust each type of file
+            for _, data in sorted(extracted, key=lambda x: x[0]):
+                if data is not None:
+                    store.metadata(version, data)
 
             # Yank distributions that no longer exist in PyPI
             logger.debug("Diffing distributions of '%s' version '%s'",
@@ -97,6 +284,28 @@ def synchronize_project(project, fetcher, download=None):
         logger.debug("Diffing versions of '%s'", project.name)
         diff.versions(project, versions)
 
+        # Store the links extracted from the descriptions
+        ProjectLink.add(project, links)
+
+        with metrics.sync.timer("refresh"):
+            # Regenerate the links served on the simple page for this project
+            logger.debug("Rebuilding the simple links of '%s'", project.name)
+            SimpleLink.rebuild(project)
+
+            # Mark the version that searches should find
+            Version.refresh_latest(project)
+
+            # Update which classifiers the project is listed under
+            ProjectClassifier.refresh(project)
+
+            # Refresh what this project depends on in the reverse dependencies
+            logger.debug("Refreshing the dependencies of '%s'", project.name)
+            Dependent.refresh(project)
+
+        # Forget anything resolved using the previous state of this project
+        #   once the new one has been committed
+        resolver.invalidate(project.name)
+
 
 def synchronize_classifiers(fetcher):
     # Sync the Classifiers
@@ -108,7 +317,7 @@ def synchronize_classifiers(fetcher):
 
 
 def synchronize_by_journals(since=None, fetcher=None, progress=True,
-        download=None):
+        download=None, extractor=None):
     if fetcher is None:
         fetcher = PyPIFetcher()
 
@@ -144,6 +353,9 @@ def synchronize_by_journals(since=None, fetcher=None, progress=True,
                     proj = Project.get(previous)
                     proj.rename(journal.name)
 
+                    resolver.invalidate(previous)
+                    resolver.invalidate(journal.name)
+
         # Commit the renames
         db.session.commit()
 
@@ -170,6 +382,7 @@ def synchronize_by_journals(since=None, fetcher=None, progress=True,
 
                     # Actually yank the project
                     Project.yank(journal.name, synchronize=False)
+                    resolver.invalidate(journal.name)
             elif journal.action.lower().startswith("rename from "):
                 _, _, previous = journal.action.split(" ", 2)
 
@@ -185,6 +398,7 @@ def synchronize_by_journals(since=None, fetcher=None, progress=True,
                     synchronize_project(journal.name,
                         fetcher,
                         download=download,
+                        extractor=extractor,
                     )
 
             try:
@@ -192,7 +406,8 @@ def synchronize_by_journals(since=None, fetcher=None, progress=True,
                 redis.sadd(REDIS_JOURNALS_KEY, journal.id)
 
                 # Commit any changes made from this journal entry
-                db.session.commit()
+                with metrics.sync.timer("commit"):
+                    db.session.commit()
             except:
                 # If any exception occured during committing remove the id
                 #   from redis
@@ -208,7 +423,7 @@ def synchronize_by_journals(since=None, fetcher=None, progress=True,
 
 
 def synchronize_by_projects(projects=None, fetcher=None, progress=True,
-        download=None):
+        download=None, extractor=None):
     if fetcher is None:
         fetcher = PyPIFetcher()
 
@@ -224,7 +439,8 @@ def synchronize_by_projects(projects=None, fetcher=None, progress=True,
 
         # We are not synchronizing a subset of projects, so we can check for
         #   any deletions (if required) and yank them.
-        diff.projects(projects)
+        for name in diff.projects(projects):
+            resolver.invalidate(name)
 
         # Commit our yanked projects
         db.session.commit()
@@ -235,13 +451,31 @@ def synchronize_by_projects(projects=None, fetcher=None, progress=True,
         bar = DummyBar()
 
     for project in bar.iter(projects):
-        synchronize_project(project, fetcher, download=download)
+        synchronize_project(project, fetcher,
+            download=download,
+            extractor=extractor,
+        )
+
+        # Commit the changes made to this project
+        with metrics.sync.timer("commit"):
+            db.session.commit()
 
     logger.info("Finished processing projects at %s", current)
 
     return current
 
 
+def export_metrics(config):
+    """
+    Writes the synchronization metrics to ``SYNC_METRICS_FILE`` if it is
+    configured and prints a summary of them.
+    """
+    if config.get("SYNC_METRICS_FILE"):
+        metrics.sync.write(config["SYNC_METRICS_FILE"])
+
+    print(metrics.sync.summary())
+
+
 class Synchronize(Command):
     """
     Synchronizes Warehouse with PyPI.
@@ -285,7 +519,9 @@ class Synchronize(Command):
             Option("--no-download",
                 action="store_false",
                 dest="download",
-                help="disable downloading of files even if hashes mismatch",
+                help="disable downloading of files even if hashes mismatch, "
+                    "the metadata of wheels and zip files is still fetched "
+                    "using range requests",
             ),
             exclusive=True,
         ),
@@ -296,35 +532,64 @@ class Synchronize(Command):
         # This is a hack to normalize the incoming projects to unicode
         projects = [x.decode("utf-8") for x in projects]
 
+        config = flask.current_app.config
+
+        if config.get("STATSD_HOST"):
+            metrics.sync.statsd = metrics.StatsdClient(
+                                    config["STATSD_HOST"],
+                                    port=config["STATSD_PORT"],
+                                    prefix=config["STATSD_PREFIX"],
+                                )
+
+        track_flushes()
+
         if projects:
             logger.info("Will synchronize %s from pypi.python.org", projects)
         else:
             logger.info("will synchronize all projects from pypi.python.org")
 
-        for _ in utils.repeat_every(
-                    seconds=repeat if repeat else 0,
-                    times=None if repeat else 1,
-                ):
-            if full or projects:
-                # We are preforming a full synchronization, or by a list of
-                #   projects
-                synced = synchronize_by_projects(projects,
+        # Metadata is extracted from the downloaded files in a pool of
+        #   processes that is reused between synchronizations
+        extractor = MetadataExtractor(
+                        processes=config["METADATA_PROCESSES"],
+                        timeout=config["METADATA_TIMEOUT"],
+                    )
+
+        try:
+            for _ in utils.repeat_every(
+                        seconds=repeat if repeat else 0,
+                        times=None if repeat else 1,
+                    ):
+                # Every synchronization is summarized on its own
+                metrics.sync.reset()
+
+                if full or projects:
+                    # We are preforming a full synchronization, or by a list
+                    #   of projects
+                    synced = synchronize_by_projects(projects,
+                                progress=progress,
+                                download=download,
+                                extractor=extractor,
+                            )
+                else:
+                    # Grab the since key from redis
+                    fetched = redis.get(REDIS_SINCE_KEY)
+                    since = int(fetched) if not fetched is None else None
+
+                    # We are preforming a standard journal based
+                    #   synchronization
+                    synced = synchronize_by_journals(since,
                             progress=progress,
                             download=download,
+                            extractor=extractor,
                         )
-            else:
-                # Grab the since key from redis
-                fetched = redis.get(REDIS_SINCE_KEY)
-                since = int(fetched) if not fetched is None else None
 
-                # We are preforming a standard journal based synchronization
-                synced = synchronize_by_journals(since,
-                        progress=progress,
-                        download=download,
-                    )
+                # Save our synchronization time in redis
+                if store_since:
+                    redis.set(REDIS_SINCE_KEY, synced)
 
-            # Save our synchronization time in redis
-            if store_since:
-                redis.set(REDIS_SINCE_KEY, synced)
+                export_metrics(config)
+        finally:
+            extractor.terminate()
 
 script.add_command("sync", Synchronize())
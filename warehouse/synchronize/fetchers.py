@@ -7,6 +7,8 @@ import collections
 import datetime
 import logging
 import os
+import re
+import tempfile
 import urlparse
 
 import requests
@@ -15,8 +17,17 @@ import xmlrpc2.client
 import warehouse
 
 from warehouse.synchronize import validators as warehouse_validators
+from warehouse.utils import metrics
 
 
+# How much of a file to hold in memory at once while downloading it
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# The smallest amount of a file to fetch with a single range request, the
+#   first one fetches this much of the end of the file which is usually enough
+#   to hold the central directory of a zip file.
+RANGE_BLOCK_SIZE = 64 * 1024
+
 logger = logging.getLogger(__name__)
 logger.addHandler(logging.NullHandler())
 
@@ -43,6 +54,110 @@ def filter_dict(unfiltered, required=None):
     return data
 
 
+class RangedFile(object):
+    """
+    A read only file object for the file located at ``url`` which only
+    fetches the parts of the file that are actually read, using HTTP range
+    requests.
+    """
+
+    _content_range_regex = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+    def __init__(self, session, url, block_size=RANGE_BLOCK_SIZE):
+        self.session = session
+        self.url = url
+        self.block_size = block_size
+
+        self.position = 0
+        self.fetched = 0
+
+        # The parts of the file we have fetched so far, as (start, data)
+        self._blocks = []
+
+        # Fetching the end of the file tells us the size of it as well
+        self.size = None
+        self._fetch("bytes=-{size}".format(size=block_size))
+
+    def _fetch(self, spec):
+        logger.debug("Fetching %s of '%s'", spec, self.url)
+
+        with metrics.sync.timer("ranged"):
+            resp = self.session.get(self.url, headers={"Range": spec})
+            resp.raise_for_status()
+
+        metrics.sync.increment("requests")
+        metrics.sync.increment("ranged_bytes", len(resp.content))
+
+        if resp.status_code == 206:
+            match = self._content_range_regex.match(
+                        resp.headers.get("Content-Range", ""),
+                    )
+
+            if match is None:
+                raise IOError(
+                    "Invalid Content-Range for '{url}'".format(url=self.url),
+                )
+
+            start, size = int(match.group(1)), int(match.group(3))
+        else:
+            # The server does not support ranges and sent the whole file
+            start, size = 0, len(resp.content)
+
+        self.size = size
+        self.fetched += len(resp.content)
+        self._blocks.append((start, resp.content))
+
+        return start, resp.content
+
+    def _read(self, start, end):
+        for block_start, data in self._blocks:
+            if block_start <= start and end <= block_start + len(data):
+                return data[start - block_start:end - block_start]
+
+        block_start, data = self._fetch("bytes={start}-{end}".format(
+                                start=start,
+                                end=min(
+                                    max(end, start + self.block_size),
+                                    self.size,
+                                ) - 1,
+                            ))
+
+        if not block_start <= start or end > block_start + len(data):
+            raise IOError(
+                "Short range read of '{url}'".format(url=self.url),
+            )
+
+        return data[start - block_start:end - block_start]
+
+    def seek(self, offset, whence=os.SEEK_SET):
+        if whence == os.SEEK_CUR:
+            offset += self.position
+        elif whence == os.SEEK_END:
+            offset += self.size
+
+        if offset < 0:
+            raise IOError("Invalid seek to {offset}".format(offset=offset))
+
+        self.position = offset
+
+    def tell(self):
+        return self.position
+
+    def read(self, size=-1):
+        if size is None or size < 0:
+            end = self.size
+        else:
+            end = min(self.position + size, self.size)
+
+        if self.position >= end:
+            return b""
+
+        data = self._read(self.position, end)
+        self.position = end
+
+        return data
+
+
 class PyPIFetcher(object):
 
     def __init__(self, client=None, session=None, validators=None):
@@ -77,9 +192,25 @@ class PyPIFetcher(object):
 
         self.validators = validators
 
+    def _call(self, method, *args):
+        metrics.sync.increment("requests")
+
+        with metrics.sync.timer("xmlrpc"):
+            return getattr(self.client, method)(*args)
+
+    def _validate(self, validator, data):
+        with metrics.sync.timer("validation"):
+            return getattr(self.validators, validator).validate(data)
+
+    def _get(self, url, **kwargs):
+        metrics.sync.increment("requests")
+
+        with metrics.sync.timer("http"):
+            return self.session.get(url, **kwargs)
+
     def classifiers(self):
         logger.debug("Fetching classifiers from pypi.python.org")
-        resp = self.session.get(
+        resp = self._get(
                     "https://pypi.python.org/pypi?:action=list_classifiers")
         return [c for c in resp.text.split("\n") if c]
 
@@ -93,9 +224,46 @@ class PyPIFetcher(object):
 
         logger.debug("Fetching '%s'", url)
 
-        resp = self.session.get(url)
+        resp = self._get(url)
         return resp.content
 
+    def download(self, url, suffix=""):
+        """
+        Downloads the file located at ``url`` into a temporary file without
+        holding it in memory and returns that file, positioned at the start.
+        The file is removed once it is closed.
+        """
+        parsed = urlparse.urlparse(url)
+        url = urlparse.urlunparse(("https",) + parsed[1:])
+
+        logger.debug("Downloading '%s'", url)
+
+        resp = self._get(url, stream=True)
+
+        spooled = tempfile.NamedTemporaryFile(prefix="warehouse-",
+                        suffix=suffix,
+                    )
+
+        with metrics.sync.timer("download"):
+            for chunk in resp.iter_content(DOWNLOAD_CHUNK_SIZE):
+                metrics.sync.increment("downloaded_bytes", len(chunk))
+                spooled.write(chunk)
+
+        spooled.flush()
+        spooled.seek(0)
+
+        return spooled
+
+    def ranged(self, url):
+        """
+        Returns a file object for the file located at ``url`` which only
+        fetches the parts of it that are read.
+        """
+        parsed = urlparse.urlparse(url)
+        url = urlparse.urlunparse(("https",) + parsed[1:])
+
+        return RangedFile(self.session, url)
+
     def distributions(self, project, version):
         """
         Takes a project and version and it returns the normalized files for
@@ -108,8 +276,8 @@ class PyPIFetcher(object):
             version,
         )
 
-        urls = self.client.release_urls(project, version)
-        urls = self.validators.release_urls.validate(urls)
+        urls = self._call("release_urls", project, version)
+        urls = self._validate("release_urls", urls)
 
         keys = set([
             "filename", "filesize", "python_version", "type", "comment",
@@ -145,9 +313,9 @@ class PyPIFetcher(object):
             version,
         )
 
-        data = self.client.release_data(project, version)
+        data = self._call("release_data", project, version)
         data = filter_dict(data, required=set(["name", "version"]))
-        data = self.validators.release_data.validate(data)
+        data = self._validate("release_data", data)
 
         # fix classifiers (dedupe + sort)
         data["classifiers"] = list(set(data.get("classifiers", [])))
@@ -212,16 +380,16 @@ class PyPIFetcher(object):
             project,
         )
 
-        versions = self.client.package_releases(project, True)
-        return self.validators.package_releases.validate(versions)
+        versions = self._call("package_releases", project, True)
+        return self._validate("package_releases", versions)
 
     def projects(self):
         """
         Returns a list of all project names
         """
         logger.debug("Fetching all projects from pypi.python.org")
-        packages = self.client.list_packages()
-        return set(self.validators.list_packages.validate(packages))
+        packages = self._call("list_packages")
+        return set(self._validate("list_packages", packages))
 
     def journals(self, since=None):
         if since is None:
@@ -237,14 +405,14 @@ class PyPIFetcher(object):
             "Fetching all changes since %s from pypi.python.org", since,
         )
 
-        changes = self.client.changelog(since, True)
-        changes = self.validators.changelog.validate(changes)
+        changes = self._call("changelog", since, True)
+        changes = self._validate("changelog", changes)
 
         return [Journal(*change) for change in changes]
 
     def current(self):
         logger.debug("Fetching the current time from pypi.python.org")
-        current_string = self.session.get("https://pypi.python.org/daytime")
+        current_string = self._get("https://pypi.python.org/daytime")
         current = datetime.datetime.strptime(
                         current_string.text.strip(),
                         "%Y%m%dT%H:%M:%S"
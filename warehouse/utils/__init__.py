@@ -28,8 +28,15 @@ def get_storage(app=None):
     if app is None:
         app = flask.current_app
 
-    storage_kwargs = app.config.get("STORAGE_OPTIONS", {})
-    storage_class = stockpile.get_storage(app.config["STORAGE"])
-    storage = storage_class(**storage_kwargs)
+    # Resolving and constructing the storage backend is not free, so it is
+    #   done once per application and then reused.
+    storage = app.extensions.get("warehouse.storage")
+
+    if storage is None:
+        storage_kwargs = app.config.get("STORAGE_OPTIONS", {})
+        storage_class = stockpile.get_storage(app.config["STORAGE"])
+        storage = storage_class(**storage_kwargs)
+
+        app.extensions["warehouse.storage"] = storage
 
     return storage
@@ -0,0 +1,116 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+from html5lib.constants import tokenTypes
+
+try:
+    from html5lib._tokenizer import HTMLTokenizer
+except ImportError:
+    # Before 0.99999999 the tokenizer was a public module of html5lib, and the
+    #   tree builder always parsed noscript as if scripting was enabled
+    from html5lib.tokenizer import HTMLTokenizer
+    _SCRIPTING = True
+else:
+    _SCRIPTING = False
+
+
+_START_TAGS = set([tokenTypes["StartTag"], tokenTypes["EmptyTag"]])
+_END_TAG = tokenTypes["EndTag"]
+
+# Elements whose content the tree builder does not parse as markup, mapped to
+#   the name of the tokenizer state it switches to for them.
+_CONTENT_STATES = {
+    "title": "rcdataState",
+    "textarea": "rcdataState",
+    "style": "rawtextState",
+    "xmp": "rawtextState",
+    "iframe": "rawtextState",
+    "noembed": "rawtextState",
+    "noframes": "rawtextState",
+    "script": "scriptDataState",
+    "plaintext": "plaintextState",
+}
+
+if _SCRIPTING:
+    _CONTENT_STATES["noscript"] = "rawtextState"
+
+# Elements that start foreign (SVG or MathML) content, anchors inside of them
+#   are not HTML anchors.
+_FOREIGN = set(["svg", "math"])
+
+# Elements of foreign content whose own content is HTML again, by the element
+#   that started the foreign content.
+_INTEGRATION_POINTS = {
+    "svg": set(["foreignobject", "desc", "title"]),
+    "math": set(["mi", "mo", "mn", "ms", "mtext"]),
+}
+
+# HTML elements that end any foreign content they are found in.
+_BREAKOUT = set([
+    "b", "big", "blockquote", "body", "br", "center", "code", "dd", "div",
+    "dl", "dt", "em", "embed", "h1", "h2", "h3", "h4", "h5", "h6", "head",
+    "hr", "i", "img", "li", "listing", "menu", "meta", "nobr", "ol", "p",
+    "pre", "ruby", "s", "small", "span", "strong", "strike", "sub", "sup",
+    "table", "tt", "u", "ul", "var",
+])
+
+
+def _attribute(data, name):
+    # html5lib has emitted attributes both as a list of pairs and as a dict,
+    #   when an attribute is repeated the first one wins.
+    if isinstance(data, dict):
+        return data.get(name)
+
+    for key, value in data:
+        if key == name:
+            return value
+
+
+def hrefs(html):
+    """
+    Returns the href of every HTML anchor in ``html``, in document order.
+
+    This only runs html5lib's tokenizer, switching it into the same content
+    states the tree builder would, instead of building a whole document tree
+    just to find the anchors in it. Foreign content is only followed as far
+    as where it starts and ends and its HTML integration points, anything
+    the tree builder would do to fix up misnested foreign content is not.
+    """
+    tokenizer = HTMLTokenizer(html)
+    found = []
+
+    # The open foreign elements and integration points, along with the
+    #   foreign content each of them is in, or None for HTML content.
+    stack = []
+
+    for token in tokenizer:
+        foreign = stack[-1][1] if stack else None
+
+        if token["type"] in _START_TAGS:
+            name = token["name"]
+            opened = not token.get("selfClosing")
+
+            if foreign is not None and name in _BREAKOUT:
+                while stack and stack[-1][1] is not None:
+                    stack.pop()
+                foreign = stack[-1][1] if stack else None
+
+            if name in _FOREIGN:
+                if opened:
+                    stack.append((name, name))
+            elif foreign is not None:
+                if name in _INTEGRATION_POINTS[foreign] and opened:
+                    stack.append((name, None))
+            elif name == "a":
+                href = _attribute(token["data"], "href")
+
+                if href is not None:
+                    found.append(href)
+            elif name in _CONTENT_STATES:
+                tokenizer.state = getattr(tokenizer, _CONTENT_STATES[name])
+        elif token["type"] == _END_TAG and stack:
+            if token["name"] == stack[-1][0]:
+                stack.pop()
+
+    return found
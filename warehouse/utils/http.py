@@ -0,0 +1,150 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import gzip
+import hashlib
+import io
+
+import flask
+
+from werkzeug.http import is_resource_modified
+
+try:
+    import brotli  # pylint: disable=F0401
+except ImportError:
+    brotli = None  # pylint: disable=C0103
+
+import warehouse
+
+from warehouse import redis
+
+
+REDIS_PAGE_KEY = "warehouse:pages:{version}:{tag}"
+
+
+def etag(*parts):
+    """
+    Generates a strong ETag out of the representation of ``parts``.
+    """
+    data = "\0".join([repr(part) for part in parts])
+    return hashlib.sha1(data.encode("utf-8")).hexdigest()
+
+
+def conditional(tag, last_modified, render, encoded=False):
+    """
+    Returns a response for a resource identified by ``tag`` and
+    ``last_modified``. If the client already has the current representation
+    a ``304 Not Modified`` is returned and ``render`` is never called.
+
+    If ``render`` returns a body with the content encoding negotiated by
+    :func:`negotiate`, ``encoded`` must be True so that every encoding of
+    the body gets its own ETag.
+    """
+    request = flask.request
+
+    if encoded:
+        tag = etag(tag, negotiate())
+
+    if last_modified is not None:
+        # HTTP dates do not carry microseconds
+        last_modified = last_modified.replace(microsecond=0)
+
+    if is_resource_modified(request.environ,
+                etag=tag,
+                last_modified=last_modified,
+            ):
+        response = flask.make_response(render())
+    else:
+        response = flask.current_app.response_class(status=304)
+
+    response.set_etag(tag)
+
+    if encoded:
+        response.vary.add("Accept-Encoding")
+
+    if last_modified is not None:
+        response.last_modified = last_modified
+
+    return response
+
+
+def _gzip(data):
+    compressed = io.BytesIO()
+
+    # A fixed mtime keeps the output identical for identical input
+    with gzip.GzipFile(fileobj=compressed, mode="wb", mtime=0) as gzipped:
+        gzipped.write(data)
+
+    return compressed.getvalue()
+
+
+def encodings():
+    """
+    Returns the content encodings that bodies are precompressed with, in
+    order of preference.
+    """
+    available = ["gzip", "identity"]
+
+    if brotli is not None:
+        available.insert(0, "br")
+
+    return available
+
+
+def negotiate():
+    """
+    Returns the content encoding that bodies are sent to the current client
+    with.
+    """
+    return flask.request.accept_encodings.best_match(
+                encodings(),
+                default="identity",
+            )
+
+
+def compress(data):
+    """
+    Returns a dictionary mapping each of the supported content encodings to
+    ``data`` encoded with it.
+    """
+    bodies = {"identity": data, "gzip": _gzip(data)}
+
+    if brotli is not None:
+        bodies["br"] = brotli.compress(data)
+
+    return bodies
+
+
+def precompressed(tag, render):
+    """
+    Returns a response for the resource identified by ``tag`` using the best
+    content encoding the client accepts. Every encoding of the body is
+    produced once, the first time ``tag`` is requested, and stored in Redis
+    so later requests neither render nor compress anything.
+    """
+    app = flask.current_app
+    version = warehouse.__version__  # pylint: disable=E1101
+
+    encoding = negotiate()
+
+    key = REDIS_PAGE_KEY.format(version=version, tag=tag)
+    body = redis.hget(key, encoding)
+
+    if body is None:
+        bodies = compress(render().encode("utf-8"))
+
+        pipe = redis.pipeline()
+        pipe.hmset(key, bodies)
+        pipe.expire(key, app.config["PAGE_CACHE_TIMEOUT"])
+        pipe.execute()
+
+        body = bodies[encoding]
+
+    response = app.response_class(body, mimetype="text/html")
+    response.vary.add("Accept-Encoding")
+
+    if encoding != "identity":
+        response.content_encoding = encoding
+
+    return response
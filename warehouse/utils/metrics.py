@@ -0,0 +1,221 @@
+from __future__ import absolute_import
+from __future__ import division
+from __future__ import unicode_literals
+
+import bisect
+import collections
+import contextlib
+import logging
+import os
+import socket
+import tempfile
+import time
+
+
+# The upper bounds, in seconds, of the buckets latencies are counted into
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+
+
+class StatsdClient(object):
+    """
+    Sends metrics to statsd over UDP. Metrics are sent and forgotten, if
+    statsd is not there they are silently lost.
+    """
+
+    def __init__(self, host, port=8125, prefix="warehouse"):
+        self.address = (host, port)
+        self.prefix = prefix
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def send(self, name, value, kind):
+        data = "{0}.{1}:{2}|{3}".format(self.prefix, name, value, kind)
+
+        try:
+            self.socket.sendto(data.encode("utf-8"), self.address)
+        except socket.error:
+            logger.debug("Could not send '%s' to statsd", data)
+
+
+class Histogram(object):
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0
+        self.max = 0
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+
+        if index < len(self.buckets):
+            self.counts[index] += 1
+
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def cumulative(self):
+        """
+        Returns the (upper bound, count) of every bucket, counting everything
+        below its bound the way Prometheus expects.
+        """
+        total = 0
+
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield bound, total
+
+
+class Metrics(object):
+    """
+    Collects counters, per stage timings and histograms in memory so they
+    can be exported as a Prometheus text file and summarized, and sends each
+    of them on to statsd as it happens if a :class:`StatsdClient` is set.
+    """
+
+    def __init__(self, namespace, statsd=None):
+        self.namespace = namespace
+        self.statsd = statsd
+        self.reset()
+
+    def reset(self):
+        self.counters = collections.Counter()
+        self.timings = collections.defaultdict(lambda: [0, 0.0])
+        self.histograms = {}
+
+    def increment(self, name, value=1):
+        self.counters[name] += value
+
+        if self.statsd is not None:
+            self.statsd.send(name, value, "c")
+
+    def timing(self, stage, seconds):
+        timing = self.timings[stage]
+        timing[0] += 1
+        timing[1] += seconds
+
+        if self.statsd is not None:
+            self.statsd.send(stage, int(seconds * 1000), "ms")
+
+    @contextlib.contextmanager
+    def timer(self, stage, clock=time.time):
+        """
+        Adds the time spent inside of the ``with`` block to ``stage``.
+        """
+        started = clock()
+
+        try:
+            yield
+        finally:
+            self.timing(stage, clock() - started)
+
+    def observe(self, name, seconds, buckets=LATENCY_BUCKETS):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(buckets)
+
+        self.histograms[name].observe(seconds)
+
+        if self.statsd is not None:
+            self.statsd.send(name, int(seconds * 1000), "ms")
+
+    def prometheus(self):
+        """
+        Returns everything collected in the Prometheus text format.
+        """
+        lines = []
+
+        for name in sorted(self.counters):
+            metric = "{0}_{1}_total".format(self.namespace, name)
+            lines.extend([
+                "# TYPE {0} counter".format(metric),
+                "{0} {1}".format(metric, self.counters[name]),
+            ])
+
+        if self.timings:
+            metric = "{0}_stage_seconds".format(self.namespace)
+            lines.append("# TYPE {0} summary".format(metric))
+
+            for stage in sorted(self.timings):
+                count, total = self.timings[stage]
+                labels = '{{stage="{0}"}}'.format(stage)
+                lines.extend([
+                    "{0}_sum{1} {2!r}".format(metric, labels, total),
+                    "{0}_count{1} {2}".format(metric, labels, count),
+                ])
+
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            metric = "{0}_{1}".format(self.namespace, name)
+
+            lines.append("# TYPE {0} histogram".format(metric))
+
+            for bound, count in histogram.cumulative():
+                lines.append('{0}_bucket{{le="{1!r}"}} {2}'.format(
+                    metric, float(bound), count,
+                ))
+
+            lines.extend([
+                '{0}_bucket{{le="+Inf"}} {1}'.format(metric, histogram.count),
+                "{0}_sum {1!r}".format(metric, float(histogram.sum)),
+                "{0}_count {1}".format(metric, histogram.count),
+            ])
+
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """
+        Writes :meth:`prometheus` to ``path`` all at once, so that whatever
+        is collecting it never sees half of a file.
+        """
+        directory = os.path.dirname(os.path.abspath(path))
+
+        with tempfile.NamedTemporaryFile(dir=directory, delete=False) as fp:
+            fp.write(self.prometheus().encode("utf-8"))
+
+        os.rename(fp.name, path)
+
+    def summary(self):
+        """
+        Returns a human readable summary of everything collected, with the
+        stages that took the longest first.
+        """
+        lines = []
+
+        if self.timings:
+            lines.append("Time spent per stage:")
+
+            for stage, (count, total) in sorted(
+                        self.timings.items(),
+                        key=lambda x: -x[1][1],
+                    ):
+                lines.append("  {0:<16} {1:>10.2f}s {2:>8} times".format(
+                    stage, total, count,
+                ))
+
+        if self.counters:
+            lines.append("Counters:")
+
+            for name in sorted(self.counters):
+                lines.append("  {0:<24} {1:>10}".format(
+                    name, self.counters[name],
+                ))
+
+        for name in sorted(self.histograms):
+            histogram = self.histograms[name]
+            template = "{0}: {1} observed, {2:.2f}s mean, {3:.2f}s max"
+            lines.append(template.format(
+                name,
+                histogram.count,
+                histogram.sum / histogram.count,
+                histogram.max,
+            ))
+
+        return "\n".join(lines)
+
+
+# The metrics of synchronizing with PyPI
+sync = Metrics("warehouse_sync")  # pylint: disable=C0103
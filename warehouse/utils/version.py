@@ -1,10 +1,11 @@
+import bisect
 import operator
 import re
 
 from .compat import string_type, total_ordering
 
 
-__all__ = ["Version", "VersionPredicate", "suggest"]
+__all__ = ["Version", "VersionPredicate", "SortedVersions", "suggest"]
 
 # A marker used in the second and third parts of the `parts` tuple, for
 # versions that don't have those segments, to sort properly. An example
@@ -74,6 +75,18 @@ class Version(object):
     def final(self):
         return all([x[-1] == "z" for x in self.parts[1:]])
 
+    @property
+    def key(self):
+        """
+        A key that sorts and compares the same way as this version does, but
+        as a plain tuple. Trailing zeros are dropped from the main version
+        instead of padding both sides of every comparison with zeros.
+        """
+        main = list(self.parts[0])
+        while main and main[-1] == 0:
+            main.pop()
+        return (tuple(main),) + tuple(self.parts[1:])
+
     def _parse(self, version):
         """
         Parses a string version into parts.
@@ -160,6 +173,26 @@ def _same_series(version, target):
     return target == version[:len(target)]
 
 
+class SortedVersions(object):
+    """
+    A sequence of versions along with their keys in sorted order, so that
+    predicates can be matched against all of them with bisection. Build it
+    once to filter the same versions with many predicates.
+    """
+
+    def __init__(self, versions):
+        self.versions = [
+            x if isinstance(x, Version) else Version(x) for x in versions
+        ]
+        self.order = sorted(range(len(self.versions)),
+                        key=lambda i: self.versions[i].key,
+                    )
+        self.keys = [self.versions[i].key for i in self.order]
+
+    def __len__(self):
+        return len(self.versions)
+
+
 class VersionPredicate(object):
     """
     Defines a predicate: ProjectName (>ver1,ver2, ..)
@@ -228,8 +261,60 @@ class VersionPredicate(object):
         if isinstance(version, string_type):
             version = Version(version)
 
-        return all([self._operators[op](version, predicate)
-                        for op, predicate in self.predicates])
+        return all(self._operators[op](version, predicate)
+                        for op, predicate in self.predicates)
+
+    def filter(self, versions):
+        """
+        Returns the versions out of ``versions`` that match the predicates,
+        in their original order. ``versions`` is either a
+        :class:`SortedVersions` or a sequence of versions to build one from.
+
+        Ranges are narrowed by bisecting the sorted keys, so only the
+        versions inside the range are looked at individually to apply any
+        ``!=`` or series predicates.
+        """
+        if not isinstance(versions, SortedVersions):
+            versions = SortedVersions(versions)
+
+        keys = versions.keys
+        low, high = 0, len(keys)
+        excluded, series = [], []
+
+        for op, predicate in self.predicates:
+            key = predicate.key
+
+            if op in [">=", "=="]:
+                low = max(low, bisect.bisect_left(keys, key))
+            elif op == ">":
+                low = max(low, bisect.bisect_right(keys, key))
+
+            if op in ["<=", "=="]:
+                high = min(high, bisect.bisect_right(keys, key))
+            elif op == "<":
+                high = min(high, bisect.bisect_left(keys, key))
+
+            if op == "!=":
+                excluded.append((
+                    bisect.bisect_left(keys, key),
+                    bisect.bisect_right(keys, key),
+                ))
+            elif op == "":
+                series.append(predicate)
+
+        matched = []
+
+        for position in range(low, high):
+            if any(start <= position < end for start, end in excluded):
+                continue
+
+            index = versions.order[position]
+            version = versions.versions[index]
+
+            if all(_same_series(version, x) for x in series):
+                matched.append(index)
+
+        return [versions.versions[i] for i in sorted(matched)]
 
     def _split_predicate(self, predicate):
         match = self._split_cmp_regex.match(predicate)